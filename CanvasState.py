@@ -0,0 +1,69 @@
+from typing import Callable, Dict, Hashable, Iterable, Tuple
+
+from reactpy import use_state, use_effect
+
+from DragInfo import DragInfo
+from NodeInfo import NodeInfo
+
+class CanvasState:
+    """
+    The state of a canvas session that changes while a gesture runs: the drag, the
+    viewport translation and the position of the node being dragged.
+
+    ReactPy sends the whole subtree of a component that re-renders, so Drawflow, which
+    renders every node, must not re-render on pointer moves. This state is kept out of
+    it instead. The components showing part of it subscribe to that part (see
+    `use_canvas_state`) and re-render alone: the dragged node, the connections attached
+    to it, the viewport transform or the connection being drawn.
+
+    Keys:
+        ("node", node_id): the node moved or its drag started or ended.
+        ("edges", node_id): the node moved or its ports were measured, for its connections.
+        "viewport": the canvas was panned.
+        "drag": the connection being drawn changed.
+    """
+
+    def __init__(self):
+        self.drag = DragInfo()
+        self.viewport: Tuple[float, float] = (0, 0)
+        self.positions: Dict[str, Tuple[float, float]] = {}  # Nodes dragged and not dropped yet
+        self._subscribers: Dict[Hashable, Dict[Callable[[], None], None]] = {}
+
+    def position(self, node_id: str, node: NodeInfo) -> Tuple[float, float]:
+        """Return where node_id is shown: where it is being dragged, or else where node places it."""
+        return self.positions.get(node_id) or (node.pos_x, node.pos_y)
+
+    def subscribe(self, keys: Iterable[Hashable], callback: Callable[[], None]) -> Callable[[], None]:
+        """Call callback whenever one of keys is notified, until the returned function is called."""
+        keys = list(keys)
+        for key in keys:
+            self._subscribers.setdefault(key, {})[callback] = None
+
+        def unsubscribe():
+            for key in keys:
+                callbacks = self._subscribers.get(key)
+                if callbacks is not None:
+                    callbacks.pop(callback, None)
+                    if not callbacks:
+                        del self._subscribers[key]
+
+        return unsubscribe
+
+    def notify(self, *keys: Hashable):
+        """Re-render the components subscribed to any of keys, once each."""
+        callbacks: Dict[Callable[[], None], None] = {}
+        for key in keys:
+            callbacks.update(self._subscribers.get(key, {}))
+        for callback in callbacks:
+            callback()
+
+def use_canvas_state(canvas: CanvasState, keys: Iterable[Hashable]) -> None:
+    """Re-render the current component whenever one of keys is notified on canvas."""
+    keys = list(keys)
+    _, set_version = use_state(0)
+
+    # Subscribed anew on every render: ReactPy drops the unmount clean-up of an effect
+    # that does not run again, which would leave unmounted components subscribed
+    @use_effect(dependencies=None)
+    def subscribe():
+        return canvas.subscribe(keys, lambda: set_version(lambda version: version + 1))
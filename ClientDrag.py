@@ -0,0 +1,97 @@
+import json
+from typing import Callable, Dict, Any
+
+from reactpy import component, html, event
+from drawflow_logger import log
+
+@component
+def ClientDrag(on_commit: Callable[[Dict[str, Any]], None], *, canvas_id: str = "drawflow", proxy_id: str = "drawflow-client-drag"):
+    """
+    A ReactPy component that moves nodes and pans the canvas in the browser.
+
+    While the mouse button is held the node (or the canvas translation) follows the
+    pointer locally; on release a single commit is reported to the server.
+
+    Args:
+        on_commit (Callable[[Dict[str, Any]], None]): Called with `{"kind": "node", "node_id", "x", "y"}`
+            or `{"kind": "viewport", "x", "y"}` once a gesture ends.
+        canvas_id (str): The ID of the canvas element. Defaults to "drawflow".
+        proxy_id (str): A unique identifier for the proxy element.
+    """
+
+    @event
+    def handle_event(event: dict):
+        """
+        Handle the commit event and report the final coordinates.
+
+        Args:
+            event (dict): The event dictionary containing event data.
+        """
+        current_target = event.get('currentTarget')
+        if current_target:
+            commit_data = current_target.get("value", "")
+            if commit_data:
+                on_commit(json.loads(commit_data))
+
+    script = f"""
+        var element = document.getElementById('{proxy_id}');
+        var canvas = document.getElementById('{canvas_id}');
+        if (element && canvas && !canvas.dataset.clientDrag) {{
+            canvas.dataset.clientDrag = 'installed';
+            // The ReactPy handlers of nodes and canvas stop propagation, so listen while capturing
+            var gesture = null;
+            function translation() {{
+                // The translation comes from a style rule (see ViewportTransform), so read the computed one
+                var transform = getComputedStyle(canvas).transform;
+                if (!transform || transform === 'none') {{
+                    return [0, 0];
+                }}
+                var matrix = new DOMMatrixReadOnly(transform);
+                return [matrix.m41, matrix.m42];
+            }}
+            canvas.addEventListener('mousedown', function (event) {{
+                var target = event.target;
+                if (event.button !== 0 || target.closest('.input, .output, .drawflow-delete, path, input, textarea, select')) {{
+                    return;
+                }}
+                var node = target.closest('.drawflow-node');
+                var origin = node ? [parseFloat(node.style.left) || 0, parseFloat(node.style.top) || 0] : translation();
+                gesture = {{node: node, startX: event.clientX, startY: event.clientY, x: origin[0], y: origin[1], moved: false}};
+            }}, true);
+            window.addEventListener('mousemove', function (event) {{
+                if (!gesture) {{
+                    return;
+                }}
+                gesture.moved = true;
+                var x = gesture.x + event.clientX - gesture.startX;
+                var y = gesture.y + event.clientY - gesture.startY;
+                if (gesture.node) {{
+                    gesture.node.style.left = x + 'px';
+                    gesture.node.style.top = y + 'px';
+                }} else {{
+                    canvas.style.transform = 'translate(' + x + 'px, ' + y + 'px)';
+                }}
+            }}, true);
+            window.addEventListener('mouseup', function (event) {{
+                var ended = gesture;
+                gesture = null;
+                if (!ended || !ended.moved) {{
+                    return;
+                }}
+                var x = ended.x + event.clientX - ended.startX;
+                var y = ended.y + event.clientY - ended.startY;
+                var commit = ended.node
+                    ? {{kind: 'node', node_id: ended.node.id.slice('node-'.length), x: x, y: y}}
+                    : {{kind: 'viewport', x: x, y: y}};
+                element.value = JSON.stringify(commit);
+                element.dispatchEvent(new Event('resize'));
+            }}, true);
+        }}
+    """
+
+    log('ClientDrag ➜ 🆔%s', proxy_id)
+
+    return html.button(
+        { "id": proxy_id, "value": "", "onresize": handle_event, "hidden": "hidden" },
+        html.script(script)
+    )
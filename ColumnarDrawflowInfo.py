@@ -0,0 +1,184 @@
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from NodeInfo import NodeInfo
+from DrawflowInfo import DrawflowInfo
+from Rectangles import Rectangles
+from TopologicalOrder import TopologicalOrder
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("ColumnarDrawflowInfo requires numpy, install it with `pip install numpy`")
+
+class NodeColumns:
+    """
+    Node positions stored as contiguous arrays.
+
+    Row i of `xs` and `ys` holds the position of `ids[i]`; `rows` maps each id back to
+    its row. Instances are never modified once shared: `updated` returns a new one.
+    """
+
+    __slots__ = ("ids", "rows", "xs", "ys")
+
+    def __init__(self, nodes: Dict[str, NodeInfo]):
+        _require_numpy()
+        self.ids: List[str] = list(nodes)
+        self.rows: Dict[str, int] = {node_id: row for row, node_id in enumerate(self.ids)}
+        self.xs = np.fromiter((node.pos_x for node in nodes.values()), dtype=np.float64, count=len(self.ids))
+        self.ys = np.fromiter((node.pos_y for node in nodes.values()), dtype=np.float64, count=len(self.ids))
+
+    def updated(self, nodes: Dict[str, NodeInfo], placed: Iterable[str]) -> 'NodeColumns':
+        """Return the columns of nodes, given that only the ids in placed were added, removed or moved."""
+        placed = list(placed)
+        if not placed:
+            return self
+        columns = NodeColumns.__new__(NodeColumns)
+        added = [node_id for node_id in placed if node_id in nodes and node_id not in self.rows]
+        removed = any(node_id not in nodes and node_id in self.rows for node_id in placed)
+        # Rows only move when nodes are added or removed; otherwise the row map is shared
+        columns.ids = list(self.ids) if added or removed else self.ids
+        columns.rows = dict(self.rows) if added or removed else self.rows
+        columns.xs = np.concatenate((self.xs, np.zeros(len(added))))
+        columns.ys = np.concatenate((self.ys, np.zeros(len(added))))
+        for node_id in added:
+            columns.rows[node_id] = len(columns.ids)
+            columns.ids.append(node_id)
+        size = len(columns.ids)
+        for node_id in placed:
+            node = nodes.get(node_id)
+            if node is not None:
+                row = columns.rows[node_id]
+                columns.xs[row] = node.pos_x
+                columns.ys[row] = node.pos_y
+            elif node_id in columns.rows:
+                # Fill the hole with the last row so the arrays stay contiguous
+                row = columns.rows.pop(node_id)
+                size -= 1
+                if row != size:
+                    last_id = columns.ids[size]
+                    columns.ids[row] = last_id
+                    columns.rows[last_id] = row
+                    columns.xs[row] = columns.xs[size]
+                    columns.ys[row] = columns.ys[size]
+                columns.ids.pop()
+        columns.xs = columns.xs[:size]
+        columns.ys = columns.ys[:size]
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+class PortColumns:
+    """
+    Measured port rectangles stored as contiguous arrays, relative to their node.
+
+    Row i describes `keys[i]`, a (node, name, type) tuple, whose node sits at row
+    `node_rows[i]` of the NodeColumns whose row map is `rows`.
+    """
+
+    __slots__ = ("keys", "rows", "node_rows", "offset_left", "offset_top", "width", "height")
+
+    def __init__(self, rects: Rectangles, columns: NodeColumns):
+        _require_numpy()
+        self.keys: List[Tuple[str, str, str]] = [key for key in rects._rects if key[0] in columns.rows]
+        measured = [rects._rects[key] for key in self.keys]
+        self.rows = columns.rows
+        self.node_rows = np.fromiter((columns.rows[key[0]] for key in self.keys), dtype=np.intp, count=len(self.keys))
+        self.offset_left = np.fromiter((rect.offset_left for rect in measured), dtype=np.float64, count=len(measured))
+        self.offset_top = np.fromiter((rect.offset_top for rect in measured), dtype=np.float64, count=len(measured))
+        self.width = np.fromiter((rect.width for rect in measured), dtype=np.float64, count=len(measured))
+        self.height = np.fromiter((rect.height for rect in measured), dtype=np.float64, count=len(measured))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+class ColumnarDrawflowInfo(DrawflowInfo):
+    """
+    A DrawflowInfo that also keeps node positions in NumPy arrays.
+
+    The NodeInfo objects remain the source of truth and the API is the one of
+    DrawflowInfo; the arrays mirror the positions so that canvas bounds, port hit
+    tests and bulk moves run vectorized. Requires numpy.
+    """
+
+    def __init__(self, nodes: Dict[str, NodeInfo], *, _incoming: Optional[Dict[str, Dict[str, Dict[Tuple[str, str], None]]]] = None, _extent: Optional[Tuple[float, float]] = None, _order: Optional[TopologicalOrder] = None, _is_cyclic: bool = False, _journal: Optional[List[str]] = None, _journal_length: int = 0, _columns: Optional[NodeColumns] = None):
+        self._columns = _columns if _columns is not None else NodeColumns(nodes)
+        super().__init__(nodes, _incoming=_incoming, _extent=_extent if _extent is not None else self.bounds(), _order=_order, _is_cyclic=_is_cyclic, _journal=_journal, _journal_length=_journal_length)
+
+    def _derive(self, nodes: Dict[str, NodeInfo], incoming: Dict[str, Dict[str, Dict[Tuple[str, str], None]]], placed: Iterable[str], order: Optional[TopologicalOrder] = None, is_cyclic: bool = False) -> 'ColumnarDrawflowInfo':
+        placed = list(placed)
+        journal, journal_length = self._journaled(placed)
+        return ColumnarDrawflowInfo(nodes=nodes, _incoming=incoming, _extent=self._extended(nodes, placed), _order=order, _is_cyclic=is_cyclic, _journal=journal, _journal_length=journal_length, _columns=self._columns.updated(nodes, placed))
+
+    def __repr__(self) -> str:
+        return f"ColumnarDrawflowInfo(nodes={self._nodes})"
+
+    def bounds(self) -> Tuple[float, float]:
+        """Return the largest pos_x and pos_y of any node, or (0, 0) when empty."""
+        if not len(self._columns):
+            return (0, 0)
+        return (float(self._columns.xs.max()), float(self._columns.ys.max()))
+
+    def positions(self, node_ids: Iterable[str]) -> Any:
+        """Return an (n, 2) array with the positions of node_ids."""
+        rows = [self._columns.rows[node_id] for node_id in node_ids]
+        return np.column_stack((self._columns.xs[rows], self._columns.ys[rows]))
+
+    def translate(self, node_ids: Iterable[str], dx: float, dy: float) -> 'ColumnarDrawflowInfo':
+        """Return a new version where every node of node_ids is moved by (dx, dy)."""
+        node_ids = list(dict.fromkeys(node_ids))
+        if not node_ids:
+            return self.copy()
+        rows = [self._columns.rows[node_id] for node_id in node_ids]
+        columns = NodeColumns.__new__(NodeColumns)
+        columns.ids = self._columns.ids
+        columns.rows = self._columns.rows
+        columns.xs = self._columns.xs.copy()
+        columns.ys = self._columns.ys.copy()
+        columns.xs[rows] += dx
+        columns.ys[rows] += dy
+        nodes = dict(self._nodes)
+        for node_id, x, y in zip(node_ids, columns.xs[rows].tolist(), columns.ys[rows].tolist()):
+            nodes[node_id] = nodes[node_id].with_position(x, y)
+        max_x, max_y = self._extent
+        extent = (max(max_x, float(columns.xs[rows].max())), max(max_y, float(columns.ys[rows].max())))
+        journal, journal_length = self._journaled(node_ids)
+        return ColumnarDrawflowInfo(nodes=nodes, _incoming=self._incoming, _extent=extent, _order=self._order, _is_cyclic=self._is_cyclic, _journal=journal, _journal_length=journal_length, _columns=columns)
+
+    def port_columns(self, rects: Rectangles) -> PortColumns:
+        """Return the measured ports of rects, as arrays aligned with this version."""
+        return PortColumns(rects, self._columns)
+
+    def hit_test(self, x: float, y: float, ports: PortColumns) -> List[Tuple[str, str, str]]:
+        """Return the keys of the ports containing the absolute canvas point (x, y)."""
+        if not len(ports):
+            return []
+        if ports.rows is not self._columns.rows:
+            # Nodes were added or removed since the ports were collected, so their rows moved
+            ports = self._realigned(ports)
+        left = self._columns.xs[ports.node_rows] + ports.offset_left
+        top = self._columns.ys[ports.node_rows] + ports.offset_top
+        inside = (left <= x) & (x <= left + ports.width) & (top <= y) & (y <= top + ports.height)
+        return [ports.keys[index] for index in np.flatnonzero(inside)]
+
+    def _realigned(self, ports: PortColumns) -> PortColumns:
+        kept = [index for index, key in enumerate(ports.keys) if key[0] in self._columns.rows]
+        realigned = PortColumns.__new__(PortColumns)
+        realigned.keys = [ports.keys[index] for index in kept]
+        realigned.rows = self._columns.rows
+        realigned.node_rows = np.fromiter((self._columns.rows[key[0]] for key in realigned.keys), dtype=np.intp, count=len(kept))
+        realigned.offset_left = ports.offset_left[kept]
+        realigned.offset_top = ports.offset_top[kept]
+        realigned.width = ports.width[kept]
+        realigned.height = ports.height[kept]
+        return realigned
+
+    def remove(self, node_id: str):
+        updated = self.without_node(node_id)
+        self._nodes, self._incoming, self._extent, self._columns = dict(updated._nodes), updated._incoming, updated._extent, updated._columns
+        self._order, self._is_cyclic = updated._order, updated._is_cyclic
+        self._journal, self._journal_length = updated._journal, updated._journal_length
@@ -2,6 +2,8 @@ import json
 from typing import Dict, Any
 
 class ConnectionInfo:
+    __slots__ = ("node", "input")
+
     def __init__(self, node: str, input: str):
         self.node = node
         self.input = input
@@ -11,12 +13,15 @@ class ConnectionInfo:
             return False
         return self.node == other.node and self.input == other.input
 
+    def __hash__(self) -> int:
+        return hash((self.node, self.input))
+
     def __repr__(self) -> str:
         return f"ConnectionInfo(node={self.node}, input={self.input})"
 
     def __str__(self) -> str:
         """Return a JSON-like string representation of the object."""
-        return json.dumps(self, default=vars)
+        return json.dumps(self.to_dict())
 
     def to_dict(self) -> Dict[str, Any]:
         return {"node": self.node, "input": self.input}
@@ -26,4 +31,7 @@ class ConnectionInfo:
         return cls(node=data["node"], input=data["input"])
 
     def copy(self) -> 'ConnectionInfo':
-        return ConnectionInfo(node=self.node, input=self.input)
+        copy = ConnectionInfo.__new__(ConnectionInfo)
+        copy.node = self.node
+        copy.input = self.input
+        return copy
@@ -1,88 +1,150 @@
-from typing import Dict, Any, Optional, Tuple
+from typing import Any, Iterable, Optional, Tuple
 
-from reactpy import component, html, event
+from reactpy import component, html, event, use_ref
 
+from CanvasState import CanvasState, use_canvas_state
 from GeometryProxy import Rect
-from drawflow_logger import log
-from NodeInfo import NodeInfo
+from drawflow_logger import log, span
 from ConnectionInfo import ConnectionInfo
 from DrawflowInfo import DrawflowInfo
 from Rectangles import Rectangles
+from DrawflowMetrics import DrawflowMetrics
+
+# Horizontal reach of the control points of a connection, which bounds its curve
+CONTROL_POINT_MAX_OFFSET = 200
+# Stroke of the connections that a dragged connection would replace or cannot make
+REPLACED_CONNECTION_COLOR = "#ff4e4e97"
+
+path = html.make_vdom_constructor("path")
+g = html.make_vdom_constructor("g")
+
+def connection_path(start_pos: Tuple[float, float], end_pos: Tuple[float, float]) -> str:
+    """Return the SVG path data of the cubic Bézier curve joining two points."""
+    start_x, start_y = start_pos
+    end_x, end_y = end_pos
+
+    # Distance between the start and end points
+    distance = ((end_x - start_x) ** 2 + (end_y - start_y) ** 2) ** 0.5
+
+    # Control points calculation
+    control_point_offset = min(CONTROL_POINT_MAX_OFFSET, distance / 2)
+    control_x1 = start_x + control_point_offset
+    control_y1 = start_y
+    control_x2 = end_x - control_point_offset
+    control_y2 = end_y
+
+    # Create a cubic Bézier path between two points with control points
+    return f"M {start_x},{start_y} C {control_x1},{control_y1} {control_x2},{control_y2} {end_x},{end_y}"
+
+def port_position(nodes_data: DrawflowInfo, rects: Rectangles, canvas: CanvasState, node_id: str, port_id: str, type: str) -> Tuple[float, float]:
+    """Return the canvas position of the center of a port, following its node while dragged."""
+    connection_rect = rects.get_rectangle(node_id, port_id, type) or Rect()
+    pos_x, pos_y = canvas.position(node_id, nodes_data._nodes[node_id])
+    return (pos_x + connection_rect.offset_left + connection_rect.width / 2, pos_y + connection_rect.offset_top + connection_rect.height / 2)
 
 @component
-def Connections(nodes_data: DrawflowInfo, rects: Rectangles, selected_connection: Optional[ConnectionInfo], set_selected_connection: Any, set_selected_node: Any, drag_data: Any):        
-    hovered_port = drag_data.get_hovered_rectangle(rects, nodes_data)
-    
-    def calculate_node_position(node_id: str, port_id: str, type: str) -> Tuple[float, float]:
-        log(f"Connections.calculate_node_position")
-        connection_rect = rects.get_rectangle(node_id, port_id, type) or Rect()
-        node_data = nodes_data._nodes[node_id]
-        pos_x = node_data.pos_x + connection_rect.offset_left + connection_rect.width / 2
-        pos_y = node_data.pos_y + connection_rect.offset_top + connection_rect.height / 2
-        return (pos_x, pos_y)
-    
-    def draw_connection(start_pos: Tuple[float, float], end_pos: Tuple[float, float], connection_data: Optional[ConnectionInfo] = None) -> Any:
-        log(f"Connections.draw_connection")
-        start_x, start_y = start_pos
-        end_x, end_y = end_pos
-
-        # Distance between the start and end points
-        distance = ((end_x - start_x) ** 2 + (end_y - start_y) ** 2) ** 0.5
-    
-        # Control points calculation
-        control_point_offset = min(200, distance / 2)  # Limit maximum control point distance
-        control_x1 = start_x + control_point_offset
-        control_y1 = start_y
-        control_x2 = end_x - control_point_offset
-        control_y2 = end_y
-    
-        # Create a cubic Bézier path between two points with control points
-        path_data = f"M {start_x},{start_y} C {control_x1},{control_y1} {control_x2},{control_y2} {end_x},{end_y}"
-        
-        path = html.make_vdom_constructor("path")
-        if connection_data:
-            @event(prevent_default=True, stop_propagation=True)
-            def on_connection_click(event):
-                set_selected_connection(connection_data)
-                set_selected_node(None)
-
-            connection_classes = "main-path"
-            custom_styles = {}
-            if selected_connection == connection_data:
-                connection_classes += " selected"
-            elif hovered_port and connection_data.node == hovered_port[0] and connection_data.input == hovered_port[1] and not hovered_port[0] == drag_data.node_id:
-                custom_styles = {"stroke": "#ff4e4e97"}
-
-            return path(
-                {"d": path_data, "class_name": connection_classes, "onMouseDown": on_connection_click, "style": custom_styles},
-            )
+def Connections(nodes_data: DrawflowInfo, rects: Rectangles, selected_connection: Optional[ConnectionInfo], set_selected_connection: Any, set_selected_node: Any, canvas: CanvasState, *, receivers: Optional[Iterable[str]] = None, visible_area: Optional[Tuple[float, float, float, float]] = None, metrics: Optional[DrawflowMetrics] = None):
+    """
+    A ReactPy component drawing the connections of a canvas, grouped by receiving node.
+
+    Each group is a component of its own that re-renders when a node at either end of
+    its connections moves or has its ports measured, so dragging a node only redraws
+    the connections attached to it.
+
+    Args:
+        receivers (Optional[Iterable[str]]): The nodes whose incoming connections are drawn, all by default.
+        visible_area (Optional[Tuple[float, float, float, float]]): When given, connections outside it are skipped.
+    """
+    log('Connections ➜ 🖼 %s', nodes_data._nodes.keys())
+    if receivers is None:
+        receivers = nodes_data._incoming
+    return html.svg({"class_name": "connection"}, [
+        InputConnections(node_id, nodes_data, rects, selected_connection, set_selected_connection, set_selected_node, canvas, visible_area=visible_area, metrics=metrics, key=node_id)
+        for node_id in receivers
+    ])
+
+@component
+def InputConnections(node_id: str, nodes_data: DrawflowInfo, rects: Rectangles, selected_connection: Optional[ConnectionInfo], set_selected_connection: Any, set_selected_node: Any, canvas: CanvasState, *, visible_area: Optional[Tuple[float, float, float, float]] = None, metrics: Optional[DrawflowMetrics] = None):
+    """A ReactPy component drawing the connections into the inputs of node_id."""
+    incoming = nodes_data.get_incoming(node_id)
+    emitters = dict.fromkeys(emitter_node_id for emitter_node_id, _, _ in incoming)
+    use_canvas_state(canvas, [("edges", node_id)] + [("edges", emitter_node_id) for emitter_node_id in emitters])
+    # Edge -> (start, end, path data) of the last render
+    path_cache = use_ref({})
+
+    def is_visible(start_pos: Tuple[float, float], end_pos: Tuple[float, float]) -> bool:
+        if visible_area is None:
+            return True
+        left, top, right, bottom = visible_area
+        # The curve never leaves the box of its end points widened by the control point offset
+        min_x = min(start_pos[0], end_pos[0]) - CONTROL_POINT_MAX_OFFSET
+        max_x = max(start_pos[0], end_pos[0]) + CONTROL_POINT_MAX_OFFSET
+        min_y = min(start_pos[1], end_pos[1])
+        max_y = max(start_pos[1], end_pos[1])
+        return max_x >= left and min_x <= right and max_y >= top and min_y <= bottom
+
+    def cached_connection_path(edge: Tuple[str, str, str, str]) -> Tuple[Any, ...]:
+        emitter_node_id, output_port_key, receiver_node_id, receiver_node_port = edge
+        start_pos = port_position(nodes_data, rects, canvas, emitter_node_id, output_port_key, "output")
+        end_pos = port_position(nodes_data, rects, canvas, receiver_node_id, receiver_node_port, "input")
+        cached = path_cache.current.get(edge)
+        if cached and cached[0] == start_pos and cached[1] == end_pos:
+            if metrics:
+                metrics.path_cache_hits += 1
+            entry = cached
         else:
-            if hovered_port and hovered_port[0] == drag_data.node_id:
-                custom_styles = {"stroke": "#ff4e4e97"}
-            else:
-                custom_styles = {}
-            return path({"d": path_data, "class_name": "main-path selected", "style": custom_styles})
-    
-    def render_connections() -> list:
-        log(f"Connections.render_connections")
+            if metrics:
+                metrics.path_cache_misses += 1
+            entry = (start_pos, end_pos, connection_path(start_pos, end_pos))
+        next_path_cache[edge] = entry
+        return entry
+
+    def draw_connection(path_data: str, connection_data: ConnectionInfo) -> Any:
+        log(f"Connections.draw_connection")
+
+        @event(prevent_default=True, stop_propagation=True)
+        def on_connection_click(event):
+            set_selected_connection(connection_data)
+            set_selected_node(None)
+
+        connection_classes = "main-path"
+        if selected_connection == connection_data:
+            connection_classes += " selected"
+        return path({"d": path_data, "class_name": connection_classes, "onMouseDown": on_connection_click, "style": {}})
+
+    # Only edges drawn in this render survive, so removed edges are evicted
+    next_path_cache = {}
+    with span("Connections.render_connections"):
         connections = []
-        for emitter_node_id, emitter_node_data in nodes_data._nodes.items():
-            for output_port_key, output_data in emitter_node_data.outputs.items():
-                for connection in output_data.connections:
-                    receiver_node_id = connection.node
-                    receiver_node_port = connection.input
-                    start_pos = calculate_node_position(emitter_node_id, output_port_key, "output")
-                    end_pos = calculate_node_position(receiver_node_id, receiver_node_port, "input")
-
-                    connections.append(draw_connection(start_pos, end_pos, connection))
-        
-        if drag_data.is_dragging_connection:
-            start_pos = calculate_node_position(drag_data.node_id, drag_data.output_name, "output")
-            end_pos = (drag_data.current_x, drag_data.current_y)
-            connections.append(draw_connection(start_pos, end_pos))
-        
-        return connections
-    
-    log(f'Connections ➜ 🖼 {nodes_data._nodes.keys()}')
-    
-    return html.svg({"class_name": "connection"}, render_connections())
+        for emitter_node_id, output_port_key, connection in incoming:
+            start_pos, end_pos, path_data = cached_connection_path((emitter_node_id, output_port_key, connection.node, connection.input))
+            if is_visible(start_pos, end_pos):
+                connections.append(draw_connection(path_data, connection))
+    path_cache.current = next_path_cache
+
+    return g(connections)
+
+@component
+def ConnectionPreview(nodes_data: DrawflowInfo, rects: Rectangles, canvas: CanvasState):
+    """
+    A ReactPy component drawing the connection being dragged from an output.
+
+    The connection already plugged into the hovered input, which the drop would
+    replace, is drawn again on top in red. It re-renders alone on every pointer move.
+    """
+    use_canvas_state(canvas, ["drag"])
+    drag_data = canvas.drag
+    paths = []
+    if drag_data.is_dragging_connection and drag_data.node_id in nodes_data._nodes:
+        hovered_port = drag_data.get_hovered_rectangle(rects, nodes_data)
+        if hovered_port and hovered_port[0] != drag_data.node_id:
+            receiver_node_id, receiver_port_name, _ = hovered_port
+            for emitter_node_id, output_name in nodes_data.get_sources(receiver_node_id, receiver_port_name):
+                start_pos = port_position(nodes_data, rects, canvas, emitter_node_id, output_name, "output")
+                end_pos = port_position(nodes_data, rects, canvas, receiver_node_id, receiver_port_name, "input")
+                paths.append(path({"d": connection_path(start_pos, end_pos), "class_name": "main-path", "style": {"stroke": REPLACED_CONNECTION_COLOR}}))
+        start_pos = port_position(nodes_data, rects, canvas, drag_data.node_id, drag_data.output_name, "output")
+        end_pos = (drag_data.current_x, drag_data.current_y)
+        custom_styles = {"stroke": REPLACED_CONNECTION_COLOR} if hovered_port and hovered_port[0] == drag_data.node_id else {}
+        paths.append(path({"d": connection_path(start_pos, end_pos), "class_name": "main-path selected", "style": custom_styles}))
+    return html.svg({"class_name": "connection"}, paths)
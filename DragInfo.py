@@ -1,11 +1,17 @@
 import json
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Dict, Any
 
 from Rectangles import Rectangles
 from DrawflowInfo import DrawflowInfo
 
 class DragInfo:
     DECIMAL_POSITIONS = 1
+
+    __slots__ = (
+        "is_dragging", "is_dragging_node", "is_dragging_connection", "is_dragging_viewport",
+        "node_id", "output_name", "input_name",
+        "start_x", "start_y", "offset_x", "offset_y", "current_x", "current_y",
+    )
     
     def __init__(
         self,
@@ -67,39 +73,40 @@ class DragInfo:
 
     def __str__(self) -> str:
         """Return a JSON-like string representation of the object."""
-        return json.dumps(self, default=vars)
+        return json.dumps(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in DragInfo.__slots__}
 
     def copy(self) -> 'DragInfo':
-        return DragInfo(
-            is_dragging=self.is_dragging,
-            is_dragging_node=self.is_dragging_node,
-            is_dragging_connection=self.is_dragging_connection,
-            is_dragging_viewport=self.is_dragging_viewport,
-            node_id=self.node_id,
-            output_name=self.output_name,
-            input_name=self.input_name,
-            start_x=self.start_x,
-            start_y=self.start_y,
-            offset_x=self.offset_x,
-            offset_y=self.offset_y,
-            current_x=self.current_x,
-            current_y=self.current_y,
-        )
+        # Coordinates are already rounded, so skip __init__
+        copy = DragInfo.__new__(DragInfo)
+        copy.is_dragging = self.is_dragging
+        copy.is_dragging_node = self.is_dragging_node
+        copy.is_dragging_connection = self.is_dragging_connection
+        copy.is_dragging_viewport = self.is_dragging_viewport
+        copy.node_id = self.node_id
+        copy.output_name = self.output_name
+        copy.input_name = self.input_name
+        copy.start_x = self.start_x
+        copy.start_y = self.start_y
+        copy.offset_x = self.offset_x
+        copy.offset_y = self.offset_y
+        copy.current_x = self.current_x
+        copy.current_y = self.current_y
+        return copy
     
     def get_hovered_rectangle(self, rects: Rectangles, nodes_data: DrawflowInfo) -> Optional[Tuple[str, str, str]]:
-        deleted = []
-        match = None
-        for (node_id, name, type), rect in rects._rects.items():
-            if node_id in nodes_data._nodes:
-                node = nodes_data[node_id]
-                left = node.pos_x + rect.offset_left
-                top = node.pos_y + rect.offset_top
-                right = left + rect.width
-                bottom = top + rect.height
-                if left <= self.current_x <= right and top <= self.current_y <= bottom:
-                    match = (node_id, name, type)
-                    break
-            else:
-                deleted.append((node_id, name, type))
-        [rects.delete_rectangle(node_id, name, type) for node_id, name, type in deleted]
-        return match
+        for node_id, name, type in rects.find_rectangles(self.current_x, self.current_y):
+            node = nodes_data._nodes.get(node_id)
+            if node is None:
+                continue
+            # The index may lag behind a node another session moved, so check the node itself
+            rect = rects.get_rectangle(node_id, name, type)
+            left = node.pos_x + rect.offset_left
+            top = node.pos_y + rect.offset_top
+            right = left + rect.width
+            bottom = top + rect.height
+            if left <= self.current_x <= right and top <= self.current_y <= bottom:
+                return (node_id, name, type)
+        return None
@@ -1,17 +1,57 @@
-from typing import Any, Dict, Tuple
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from reactpy import component, use_state, html, event
+from reactpy import component, use_state, use_ref, use_effect, html, event
 
-from Connections import Connections
+from CanvasState import CanvasState
+from Connections import Connections, ConnectionPreview
+from DrawflowNode import DrawflowNode, ComponentNotFound
 from GeometryProxy import GeometryProxy, Rect
 from DragInfo import DragInfo
 from DrawflowInfo import DrawflowInfo
-from drawflow_logger import log
+from DrawflowMetrics import DrawflowMetrics
+from NodeInfo import NodeInfo
+from drawflow_logger import log, span
 from ConnectionInfo import ConnectionInfo
+from ClientDrag import ClientDrag
 from Rectangles import Rectangles
+from FlowOperation import FlowOperation
+from FlowHistory import FlowHistory
+from KeyboardShortcuts import KeyboardShortcuts
+from ViewportTransform import ViewportTransform
 
 @component
-def Drawflow(nodes_data: DrawflowInfo, set_nodes_data: Any, component_map: Dict[str, Any], *, _offset: Tuple[float, float] = (0,0)):
+def Drawflow(nodes_data: DrawflowInfo, set_nodes_data: Any, component_map: Dict[str, Any], *, move_interval: float = 0, client_drag: bool = False, virtualize: bool = False, viewport_size: Tuple[float, float] = (1920, 1080), cull_margin: float = 300, metrics: Optional[DrawflowMetrics] = None, on_operation: Optional[Callable[[FlowOperation, DrawflowInfo], None]] = None, history: Optional[FlowHistory] = None, node_status: Optional[Dict[str, str]] = None, _offset: Tuple[float, float] = (0,0)):
+    """
+    A ReactPy component rendering an editable flow of nodes and connections.
+
+    Args:
+        nodes_data (DrawflowInfo): The flow to render.
+        set_nodes_data (Any): State setter used to publish edits to the flow.
+        component_map (Dict[str, Any]): Maps `NodeInfo.component` names to ReactPy components.
+        move_interval (float): Seconds during which mouse-move events are coalesced into
+            a single state update while dragging. Defaults to 0 (apply every event).
+        client_drag (bool): Move nodes and pan the canvas in the browser, committing only the
+            final position on mouse-up. Connections are still dragged server-side. Defaults to False.
+        virtualize (bool): Only render the nodes and connections that intersect the visible
+            window, which is the element holding the canvas. Defaults to False.
+        viewport_size (Tuple[float, float]): Size of the visible window when virtualizing,
+            until that element is measured.
+        cull_margin (float): Extra distance around the visible window that is still rendered.
+            Panning within it does not re-render the canvas.
+        metrics (Optional[DrawflowMetrics]): Collects event counters when given.
+        on_operation (Optional[Callable[[FlowOperation, DrawflowInfo], None]]): Called with every
+            edit made on the canvas and the flow it results in. A dragged node is reported
+            once, with its final position, when the gesture ends.
+        history (Optional[FlowHistory]): Records every edit when given, and enables undo
+            (Ctrl+Z) and redo (Ctrl+Y or Ctrl+Shift+Z).
+        node_status (Optional[Dict[str, str]]): Maps node ids to an execution status (see
+            FlowExecutor), shown on each node as a `status-<status>` class.
+
+    Pointer moves do not re-render the canvas: the drag, the viewport and the position
+    of the dragged node live in a CanvasState, and only the components showing them
+    re-render (see CanvasState). The flow is only edited when the gesture ends.
+    """
     MOUSE_POINTER_OFFSET_X = _offset[0]
     MOUSE_POINTER_OFFSET_Y = _offset[1]
     CANVAS_DEFAULT_WIDTH = 500
@@ -20,77 +60,225 @@ def Drawflow(nodes_data: DrawflowInfo, set_nodes_data: Any, component_map: Dict[
     CANVAS_GROWTH_STEP = 200  # Amount to increase the canvas size by
     LEFT_MOUSE_BUTTON_INDEX = 0
     
-    drag_data, set_drag_data = use_state(DragInfo())
+    # Updated in place during gestures, never re-rendering the canvas
+    canvas, _ = use_state(CanvasState)
     selected_node, set_selected_node = use_state(None)
     selected_connection, set_selected_connection = use_state(None)
-    rects, set_rects = use_state(Rectangles())
+    # Updated in place; measured ports re-render the connections attached to their node
+    rects, _ = use_state(Rectangles)
+    # Whether the browser must send pointer moves while client_drag moves nodes itself
+    is_dragging_connection, set_is_dragging_connection = use_state(False)
+    # The viewport the nodes were culled for when virtualizing, and the measured window
+    culled_viewport, set_culled_viewport = use_state((0, 0))
+    window_size, set_window_size = use_state(viewport_size)
+    pending_move = use_ref(None)  # Latest pointer position not applied yet
+    node_callbacks = use_ref(None)
+    drag_origin = use_ref(None)  # Position of the dragged node when the gesture started
 
-    canvas_width, set_canvas_width = use_state(CANVAS_DEFAULT_WIDTH)
-    canvas_height, set_canvas_height = use_state(CANVAS_DEFAULT_HEIGHT)
-    viewport_x, set_viewport_x = use_state(0)
-    viewport_y, set_viewport_y = use_state(0)
+    if metrics:
+        metrics.move_interval = move_interval
 
-    @event(prevent_default=True, stop_propagation=True)
-    def on_mouse_move(event):
-        log(f"Drawflow.on_mouse_move")
-        
-        if not drag_data.is_dragging:
+    # Edits from this canvas and from other sessions alike: only the nodes they placed are re-indexed
+    @use_effect(dependencies=[nodes_data])
+    def follow_nodes_data():
+        rects.follow(nodes_data)
+
+    def apply_operations(operations_of: Callable[[DrawflowInfo], List[FlowOperation]], *, inverse: Optional[List[FlowOperation]] = None, record: bool = True) -> None:
+        """
+        Apply the operations computed against the latest flow and report each of them.
+
+        Unless record is False, they are added to the history as one edit, undone by
+        inverse when given or else by the inverse of each operation.
+        """
+        def update(current_nodes_data: DrawflowInfo) -> DrawflowInfo:
+            updated_nodes_data = current_nodes_data
+            applied = []
+            undo_operations = []
+            for operation in operations_of(current_nodes_data):
+                if not operation.applies_to(updated_nodes_data):
+                    # Another session removed what the operation refers to
+                    continue
+                if history is not None and record and inverse is None:
+                    undo_operations = operation.inverse(updated_nodes_data) + undo_operations
+                updated_nodes_data = operation.apply(updated_nodes_data)
+                applied.append(operation)
+                if on_operation:
+                    on_operation(operation, updated_nodes_data)
+            if history is not None and record:
+                history.record(applied, inverse if inverse is not None else undo_operations)
+            return updated_nodes_data
+
+        set_nodes_data(update)
+
+    def set_drag_data(new_drag_data: DragInfo) -> None:
+        """Replace the drag, re-rendering the components that show it."""
+        previous_drag_data = canvas.drag
+        canvas.drag = new_drag_data
+        keys = []
+        if previous_drag_data.is_dragging_connection or new_drag_data.is_dragging_connection:
+            keys.append("drag")
+        if previous_drag_data.is_dragging != new_drag_data.is_dragging and selected_node is not None:
+            # The delete button of the selected node hides while dragging
+            keys.append(("node", selected_node))
+        canvas.notify(*keys)
+        if client_drag:
+            set_is_dragging_connection(new_drag_data.is_dragging_connection)
+
+    def window_area(viewport: Tuple[float, float], margin: float) -> Tuple[float, float, float, float]:
+        # The canvas is translated by the viewport, so the window starts at minus its offset
+        viewport_x, viewport_y = viewport
+        window_width, window_height = window_size
+        return (-viewport_x - margin, -viewport_y - margin, -viewport_x + window_width + margin, -viewport_y + window_height + margin)
+
+    def set_viewport(new_viewport: Tuple[float, float]) -> None:
+        canvas.viewport = new_viewport
+        canvas.notify("viewport")
+        if virtualize:
+            left, top, right, bottom = window_area(culled_viewport, cull_margin)
+            window_left, window_top, window_right, window_bottom = window_area(new_viewport, 0)
+            if window_left < left or window_top < top or window_right > right or window_bottom > bottom:
+                # The window leaves the rendered nodes, so render the ones around it
+                set_culled_viewport(new_viewport)
+
+    def measure_window(rect: Rect) -> None:
+        log(f"Drawflow.measure_window")
+        set_window_size((rect.width, rect.height))
+
+    def apply_move(client_x: float, client_y: float) -> None:
+        log(f"Drawflow.apply_move")
+        drag_data = canvas.drag
+        viewport_x, viewport_y = canvas.viewport
+        drag_data.current_x = DragInfo.rounded_number(client_x - MOUSE_POINTER_OFFSET_X - viewport_x)
+        drag_data.current_y = DragInfo.rounded_number(client_y - MOUSE_POINTER_OFFSET_Y - viewport_y)
+
+        if drag_data.is_dragging_viewport:
+            set_viewport((client_x - drag_data.offset_x, client_y - drag_data.offset_y))
+
+        elif drag_data.is_dragging_node:
+            node_id = drag_data.node_id
+            if node_id in nodes_data._nodes:
+                canvas.positions[node_id] = (client_x - drag_data.offset_x, client_y - drag_data.offset_y)
+                canvas.notify(("node", node_id), ("edges", node_id))
+
+        elif drag_data.is_dragging_connection:
+            canvas.notify("drag")
+
+    def flush_pending_move() -> None:
+        if pending_move.current is not None:
+            client_x, client_y = pending_move.current
+            pending_move.current = None
+            apply_move(client_x, client_y)
+
+    def report_drop() -> None:
+        # Intermediate positions of a dragged node are not reported, only where it was dropped
+        origin = drag_origin.current
+        drag_origin.current = None
+        drag_data = canvas.drag
+        if not drag_data.is_dragging_node or origin is None:
             return
+        node_id = drag_data.node_id
+        position = canvas.positions.pop(node_id, None)
+        if position is None or position == origin:
+            return
+
+        def drop(current_nodes_data: DrawflowInfo) -> List[FlowOperation]:
+            if node_id not in current_nodes_data._nodes:
+                return []
+            return [FlowOperation.move(node_id, *position)]
+
+        # The drop is undone as a whole, back to where the gesture started
+        apply_operations(drop, inverse=[FlowOperation.move(node_id, *origin)])
+
+    def receive_mouse_move(event) -> bool:
+        """Handle a pointer move and return whether the caller must flush it after move_interval."""
+        drag_data = canvas.drag
+        if not drag_data.is_dragging:
+            return False
         
         if event.get("buttons", 0) == 0 or event.get("button", -1) != LEFT_MOUSE_BUTTON_INDEX:
             # Mouse was released, but we missed the event
+            pending_move.current = None
+            report_drop()
             set_drag_data(DragInfo())
-            return
+            return False
+
+        if client_drag and not drag_data.is_dragging_connection:
+            # The browser moves nodes and the viewport itself in this mode
+            return False
         
+        if metrics:
+            metrics.mouse_move_events += 1
+
         client_x = event.get("clientX", 0)
         client_y = event.get("clientY", 0)
 
-        drag_data.current_x = client_x - MOUSE_POINTER_OFFSET_X - viewport_x
-        drag_data.current_y = client_y - MOUSE_POINTER_OFFSET_Y - viewport_y
-        set_drag_data(drag_data.copy())
+        if move_interval <= 0:
+            if metrics:
+                metrics.mouse_move_updates += 1
+            apply_move(client_x, client_y)
+            return False
 
-        if drag_data.is_dragging_viewport:
-            new_x = client_x - drag_data.offset_x
-            new_y = client_y - drag_data.offset_y
-            set_viewport_x(new_x)
-            set_viewport_y(new_y)
-            
-        elif drag_data.is_dragging_node:
-            node_id = drag_data.node_id
-            new_x = client_x - drag_data.offset_x
-            new_y = client_y - drag_data.offset_y
-            nodes_data[node_id].pos_x = new_x
-            nodes_data[node_id].pos_y = new_y
-            set_nodes_data(nodes_data.copy())
+        # Keep only the latest position; the first event of a window schedules the flush
+        is_flush_scheduled = pending_move.current is not None
+        pending_move.current = (client_x, client_y)
+        return not is_flush_scheduled
+
+    @event(prevent_default=True, stop_propagation=True)
+    async def on_mouse_move(event):
+        log(f"Drawflow.on_mouse_move")
+        with span("Drawflow.on_mouse_move"):
+            must_flush = receive_mouse_move(event)
+        if must_flush:
+            await asyncio.sleep(move_interval)
+            with span("Drawflow.flush_pending_move"):
+                if metrics and pending_move.current is not None:
+                    metrics.mouse_move_updates += 1
+                flush_pending_move()
         
     @event(prevent_default=True, stop_propagation=True)
     def on_mouse_up(event):
         log(f"Drawflow.on_mouse_up")
-        if drag_data.is_dragging_connection:
-            hovered_rectangle = drag_data.get_hovered_rectangle(rects, nodes_data)
-            if hovered_rectangle and hovered_rectangle[0] != drag_data.node_id:
-                receiver_node_id, receiver_port_name, receiver_type = hovered_rectangle
-                if receiver_type == "input":
-                    # Remove any existing connections to this input
-                    for other_node_id, other_node_data in nodes_data._nodes.items():
-                        for output_name, output_data in other_node_data.outputs.items():
-                            connections = output_data.connections
-                            for connection in connections:
-                                if connection.node == receiver_node_id and connection.input == receiver_port_name:
-                                    connections.remove(connection)
-                                    set_nodes_data(nodes_data.copy())
-                                    break
-                    # Add the new connection
-                    if receiver_port_name not in nodes_data[drag_data.node_id].outputs:
-                        nodes_data[drag_data.node_id].outputs[drag_data.output_name].connections.append(ConnectionInfo(node=receiver_node_id, input=receiver_port_name))
-                        set_nodes_data(nodes_data.copy())
+        with span("Drawflow.on_mouse_up"):
+            if move_interval > 0 and canvas.drag.is_dragging and "clientX" in event:
+                # Commit the exact release position instead of the last coalesced one
+                pending_move.current = (event["clientX"], event.get("clientY", 0))
+                flush_pending_move()
+            drag_data = canvas.drag
+            if drag_data.is_dragging_connection:
+                hovered_rectangle = drag_data.get_hovered_rectangle(rects, nodes_data)
+                if hovered_rectangle and hovered_rectangle[0] != drag_data.node_id:
+                    receiver_node_id, receiver_port_name, receiver_type = hovered_rectangle
+                    if receiver_type == "input":
+                        emitter_node_id = drag_data.node_id
+                        emitter_output_name = drag_data.output_name
+
+                        def connect(current_nodes_data: DrawflowInfo) -> List[FlowOperation]:
+                            if current_nodes_data.would_create_cycle(emitter_node_id, receiver_node_id):
+                                # The receiver already feeds the emitter
+                                log("Drawflow.on_mouse_up ➜ rejected cycle %s ➜ %s", emitter_node_id, receiver_node_id)
+                                return []
+                            connection = ConnectionInfo(node=receiver_node_id, input=receiver_port_name)
+                            # Remove any existing connections to this input
+                            operations = [
+                                FlowOperation.disconnect(other_node_id, output_name, connection)
+                                for other_node_id, output_name in current_nodes_data.get_sources(receiver_node_id, receiver_port_name)
+                            ]
+                            # Add the new connection
+                            if emitter_node_id in current_nodes_data._nodes and receiver_port_name not in current_nodes_data[emitter_node_id].outputs:
+                                operations.append(FlowOperation.connect(emitter_node_id, emitter_output_name, connection))
+                            return operations
+
+                        apply_operations(connect)
         
-        else:
-            set_drag_data(DragInfo())
+            else:
+                if not client_drag:
+                    # The browser already committed the drop (see on_drag_commit)
+                    report_drop()
+                set_drag_data(DragInfo())
 
-    @event(prevent_default=True, stop_propagation=True)
     def on_mouse_over_node(event):
         log(f"Drawflow.on_mouse_over_node")
+        drag_data = canvas.drag
         if not drag_data.is_dragging:
             start_x = event.get("clientX", 0)
             start_y = event.get("clientY", 0)
@@ -99,56 +287,46 @@ def Drawflow(nodes_data: DrawflowInfo, set_nodes_data: Any, component_map: Dict[
             if is_beyond_threshold:
                 set_drag_data(DragInfo())
 
-    @event(prevent_default=True, stop_propagation=True)
     def on_delete_click(event):
         log(f"Drawflow.on_delete_click")
         if selected_node in nodes_data._nodes:
-            # Remove deleted node
-            nodes_data.remove(selected_node)
-            # Remove connections pointing to the deleted node
-            for node in nodes_data._nodes.values():
-                for output in node.outputs.values():
-                    for connection in output.connections:
-                        if connection.node == selected_node:
-                            output.connections.remove(connection)
-            set_nodes_data(nodes_data.copy())
+            # Remove deleted node and the connections pointing to it
+            apply_operations(lambda current_nodes_data: [FlowOperation.remove_node(selected_node)])
         elif selected_connection:
             # Remove selected connection
-            for node in nodes_data._nodes.values():
-                for output in node.outputs.values():
-                    if selected_connection in output.connections:
-                        output.connections.remove(selected_connection)
-            set_nodes_data(nodes_data.copy())
+            def disconnect(current_nodes_data: DrawflowInfo) -> List[FlowOperation]:
+                return [
+                    FlowOperation.disconnect(node_id, output_name, selected_connection)
+                    for node_id, output_name in current_nodes_data.get_sources(selected_connection.node, selected_connection.input)
+                ]
+
+            apply_operations(disconnect)
             set_selected_connection(None)
     
-    def update_canvas_size():
-        log(f"Drawflow.update_canvas_size")
-        corrected_canvas_width = canvas_width
-        corrected_canvas_height = canvas_height
-        for node_id, node in nodes_data._nodes.items():
-            if node.pos_x > corrected_canvas_width - CANVAS_GROWTH_MARGIN:
-                corrected_canvas_width = max(corrected_canvas_width + CANVAS_GROWTH_STEP, node.pos_x + CANVAS_GROWTH_STEP)
-            if node.pos_y > corrected_canvas_height - CANVAS_GROWTH_MARGIN:
-                corrected_canvas_height = max(corrected_canvas_height + CANVAS_GROWTH_STEP, node.pos_y + CANVAS_GROWTH_STEP)
-        set_canvas_width(corrected_canvas_width)
-        set_canvas_height(corrected_canvas_height)
+    def canvas_size(furthest, default_size):
+        # Grow once a node gets within the margin of the edge; the extent never shrinks,
+        # so neither does the canvas while the same flow is edited
+        if furthest > default_size - CANVAS_GROWTH_MARGIN:
+            return max(default_size + CANVAS_GROWTH_STEP, furthest + CANVAS_GROWTH_STEP)
+        return default_size
     
     def start_dragging_node_or_connection(node_id, client_x, client_y):
         log(f"Drawflow.start_dragging")
+        drag_data = canvas.drag
+        viewport_x, viewport_y = canvas.viewport
         output_name = drag_data.output_name
         if drag_data.input_name:
-            for candidate_node_id, node in nodes_data._nodes.items():
-                for candidate_output_name, output_data in node.outputs.items():
-                    connections = output_data.connections
-                    for connection in connections:
-                        if connection.node == node_id and connection.input == drag_data.input_name:
-                            connections.remove(connection)
-                            node_id = candidate_node_id
-                            output_name = candidate_output_name
-                            set_nodes_data(nodes_data.copy())
-                            break
+            sources = nodes_data.get_sources(node_id, drag_data.input_name)
+            if sources:
+                # Detach the connection from the input and keep dragging it from its output
+                connection = ConnectionInfo(node=node_id, input=drag_data.input_name)
+                node_id, output_name = sources[0]
+                apply_operations(lambda current_nodes_data, node_id=node_id, output_name=output_name:
+                    [FlowOperation.disconnect(node_id, output_name, connection)])
         
         node = nodes_data[node_id]
+        # With client_drag the browser moves the node and commits the drop itself
+        drag_origin.current = (node.pos_x, node.pos_y) if output_name is None and not client_drag else None
         offset_x = client_x - node.pos_x
         offset_y = client_y - node.pos_y
 
@@ -172,6 +350,7 @@ def Drawflow(nodes_data: DrawflowInfo, set_nodes_data: Any, component_map: Dict[
         if event.get("button") == LEFT_MOUSE_BUTTON_INDEX:
             client_x = event.get("clientX", 0)
             client_y = event.get("clientY", 0)
+            viewport_x, viewport_y = canvas.viewport
             offset_x = client_x - viewport_x
             offset_y = client_y - viewport_y
             new_drag_data = DragInfo(
@@ -185,157 +364,160 @@ def Drawflow(nodes_data: DrawflowInfo, set_nodes_data: Any, component_map: Dict[
             )
             set_drag_data(new_drag_data)
 
-    def add_node(node_id: str, dataNode: Any) -> Any:
-        log(f"Drawflow.add_node")
-        custom_class = dataNode.custom_class
-        component_name = dataNode.component
-        pos_x = dataNode.pos_x
-        pos_y = dataNode.pos_y
+    def on_drag_commit(commit: Dict[str, Any]) -> None:
+        log(f"Drawflow.on_drag_commit")
+        if commit.get("kind") == "node":
+            node_id = commit.get("node_id")
+            new_x = commit.get("x", 0)
+            new_y = commit.get("y", 0)
+            node = nodes_data._nodes.get(node_id)
+            if node is None or (node.pos_x, node.pos_y) == (new_x, new_y):
+                return
+            # The node only moved in the browser, so the flow still holds where the gesture started
+            apply_operations(
+                lambda current_nodes_data: [FlowOperation.move(node_id, new_x, new_y)] if node_id in current_nodes_data._nodes else [],
+                inverse=[FlowOperation.move(node_id, node.pos_x, node.pos_y)],
+            )
+        elif commit.get("kind") == "viewport":
+            set_viewport((commit.get("x", 0), commit.get("y", 0)))
 
-        # Get the ReactPy component based on the component name
-        component = component_map.get(component_name, lambda data, set_data: html.div("Component not found"))
+    def on_shortcut(action: str) -> None:
+        log(f"Drawflow.on_shortcut")
+        if canvas.drag.is_dragging:
+            return
+        apply_operations(lambda current_nodes_data: history.undo() if action == "undo" else history.redo(), record=False)
 
-        def update_node(new_data):
-            nodes_data[node_id].data = new_data
-            set_nodes_data(nodes_data.copy())
+    def update_node(node_id: str, new_data: Any) -> None:
+        if isinstance(new_data, NodeInfo):
+            # Node components hand back their edited NodeInfo copy
+            new_data = new_data.data
+        apply_operations(lambda current_nodes_data: [FlowOperation.data(node_id, new_data)])
 
-        # Create node content with the selected component
-        content = component(dataNode, update_node)
+    def store_rects(node_id: str, measured: List[Tuple[str, str, Rect]]) -> None:
+        log(f"Drawflow.store_rects")
+        node = nodes_data._nodes.get(node_id)
+        if node is None:
+            return
+        rects.move_node(node_id, node.pos_x, node.pos_y)
+        changed = False
+        for key, type, rect in measured:
+            if rects.get_rectangle(node_id, key, type) != rect:
+                rects.add_rectangle(node_id, key, type, rect)
+                changed = True
+        if changed:
+            canvas.notify(("edges", node_id))
 
-        # Create inputs and outputs containers
-        
-        def store_rect(key: str, type: str, rect: Any) -> None:
-            log(f"Drawflow.add_node.store_rect")
-            rects.add_rectangle(node_id, key, type, rect)
-            set_rects(rects.copy())
-
-        def on_mouse_over_input(event, input_name):
-            log(f"Drawflow.add_node.on_mouse_over_input")
-            if not drag_data.is_dragging:
-                drag_data.node_id = node_id
-                drag_data.input_name = input_name
-                drag_data.start_x = event.get("clientX", 0)
-                drag_data.start_y = event.get("clientY", 0)
-
-        inputs = html.div(
-            {"class_name": "inputs"},
-            [
-                html.div(
-                    {
-                        "class_name": f"input input_{index+1}",
-                        "onMouseOver" : lambda event, input_name=input_name:
-                            on_mouse_over_input(event, input_name),
-                    },
-                    GeometryProxy(
-                        lambda rect, input_name=input_name:
-                            store_rect(input_name, "input", rect),
-                        proxy_id=f"{node_id} input_{index+1}",
-                        observe_resizes=False,
-                    )
-                )
-                for index, input_name in enumerate(dataNode.inputs)
-            ]
-        )
-                
-        def on_mouse_over_output(event, output_name):
-            log(f"Drawflow.add_node.on_mouse_over_output")
-            if not drag_data.is_dragging:
-                drag_data.node_id = node_id
-                drag_data.output_name = output_name
-                drag_data.start_x = event.get("clientX", 0)
-                drag_data.start_y = event.get("clientY", 0)
-        
-        outputs = html.div(
-            {"class_name": "outputs"},
-            [
-                html.div(
-                    {
-                        "class_name": f"output output_{index+1}",
-                        "onMouseOver" : lambda event, output_name=output_name:
-                            on_mouse_over_output(event, output_name),
-                    },
-                    GeometryProxy(
-                        lambda rect, output_name=output_name:
-                            store_rect(output_name, "output", rect),
-                        proxy_id=f"{node_id} output_{index+1}",
-                        observe_resizes=False,
-                    )
-                )
-                for index, output_name in enumerate(dataNode.outputs)
-            ]
-        )
-        
-        @event(prevent_default=False, stop_propagation=True)
-        def on_mouse_down_node(event):
-            log(f"Drawflow.add_node.on_mouse_down_node")
-            if event.get("button", -1) == LEFT_MOUSE_BUTTON_INDEX:
-                clientX = event.get("clientX", 0)
-                clientY = event.get("clientY", 0)
-                start_dragging_node_or_connection(node_id, clientX, clientY)
-            set_selected_node(node_id)
-            set_selected_connection(None)
+    def on_mouse_over_input(node_id: str, input_name: str, event: Dict[str, Any]) -> None:
+        log(f"Drawflow.on_mouse_over_input")
+        drag_data = canvas.drag
+        if not drag_data.is_dragging:
+            drag_data.node_id = node_id
+            drag_data.input_name = input_name
+            drag_data.start_x = event.get("clientX", 0)
+            drag_data.start_y = event.get("clientY", 0)
 
-        # Determine the class name, adding a 'selected' class if this is the selected node
-        node_classes = f"drawflow-node {custom_class}"
-        
-        # Initially hidden delete button
-        delete_box = html.div(
-            {
-                "class_name": "drawflow-delete-hidden",
-                "hidden": "hidden",
-            },
+    def on_mouse_over_output(node_id: str, output_name: str, event: Dict[str, Any]) -> None:
+        log(f"Drawflow.on_mouse_over_output")
+        drag_data = canvas.drag
+        if not drag_data.is_dragging:
+            drag_data.node_id = node_id
+            drag_data.output_name = output_name
+            drag_data.start_x = event.get("clientX", 0)
+            drag_data.start_y = event.get("clientY", 0)
+
+    def on_mouse_down_node(node_id: str, event: Dict[str, Any]) -> None:
+        log(f"Drawflow.on_mouse_down_node")
+        if event.get("button", -1) == LEFT_MOUSE_BUTTON_INDEX:
+            clientX = event.get("clientX", 0)
+            clientY = event.get("clientY", 0)
+            start_dragging_node_or_connection(node_id, clientX, clientY)
+        set_selected_node(node_id)
+        set_selected_connection(None)
+
+    # Memoized nodes keep their handlers across renders, so they call the latest ones through this ref
+    node_callbacks.current = {
+        "update_node": update_node,
+        "store_rects": store_rects,
+        "on_mouse_over_input": on_mouse_over_input,
+        "on_mouse_over_output": on_mouse_over_output,
+        "on_mouse_down_node": on_mouse_down_node,
+        "on_mouse_over_node": on_mouse_over_node,
+        "on_delete_click": on_delete_click,
+    }
+
+    def add_node(node_id: str, dataNode: NodeInfo) -> Any:
+        log(f"Drawflow.add_node")
+        is_selected = selected_node == node_id
+        return DrawflowNode(
+            node_id,
+            dataNode,
+            component_map.get(dataNode.component, ComponentNotFound),
+            is_selected,
+            node_callbacks,
+            canvas,
+            node_status.get(node_id) if node_status else None,
+            key=node_id,
         )
-        
-        if selected_node == node_id:
-            node_classes += " selected"  # Add a custom 'selected' class
-            if not drag_data.is_dragging: # Show delete button only when not dragging
-                delete_box = html.div(
-                    {
-                        "class_name": "drawflow-delete",
-                        "onMouseDown": on_delete_click,
-                        "style": {"position": "absolute", "top": -38, "right": -20, "cursor": "pointer"}
-                    },
-                    "x"
-                )
-
-        # Create the main node div
-        node = html.div({
-            "id": f"node-{node_id}",
-            "class_name": node_classes,
-            "style": {"top": f"{pos_y}px", "left": f"{pos_x}px"},
-            "onMouseDown": on_mouse_down_node,
-            "onMouseOver": on_mouse_over_node
-        }, [inputs, content, outputs, delete_box])
-
-        return node
-
-    nodes_vdom = [add_node(node_id, node_data) for node_id, node_data in nodes_data._nodes.items()] + [
+
+    visible_area = None
+    node_ids = nodes_data._nodes
+    receivers = None
+    if virtualize:
+        visible_area = window_area(culled_viewport, cull_margin)
+        # Looked up in the node grid; the selected and dragged nodes are always rendered
+        node_ids = set(rects.find_nodes(nodes_data, *visible_area))
+        node_ids.update(node_id for node_id in (selected_node, canvas.drag.node_id) if node_id in nodes_data._nodes)
+        node_ids = sorted(node_ids)
+        # Connections are grouped by receiver: the visible nodes and the nodes they feed
+        receivers = dict.fromkeys(node_id for node_id in node_ids if node_id in nodes_data._incoming)
+        for node_id in node_ids:
+            for output in nodes_data[node_id].outputs.values():
+                receivers.update(dict.fromkeys(connection.node for connection in output.connections))
+
+    nodes_vdom = [add_node(node_id, nodes_data[node_id]) for node_id in node_ids] + [
         Connections(
             nodes_data, 
             rects, 
             selected_connection, 
             set_selected_connection,
             set_selected_node,
-            drag_data
-        )
+            canvas,
+            receivers=receivers,
+            visible_area=visible_area,
+            metrics=metrics,
+            key="connections",
+        ),
+        ConnectionPreview(nodes_data, rects, canvas, key="connection-preview"),
+        ViewportTransform(canvas, key="viewport-transform"),
     ]
     
-    update_canvas_size()
-
-    log(f'Drawflow ➜ 🖼 {nodes_data._nodes.keys()}')
-
-    return html.div(
-        {
-            "id": "drawflow",
-            "class_name": "drawflow",
-            "onMouseMove": on_mouse_move,
-            "onMouseUp": on_mouse_up,
-            "onMouseDown": on_mouse_down_canvas,
-            "style": {
-                "width": f"{canvas_width}px",
-                "height": f"{canvas_height}px",
-                "transform": f"translate({viewport_x}px, {viewport_y}px)"
-            },
+    extent_x, extent_y = nodes_data.extent()
+    canvas_width = canvas_size(extent_x, CANVAS_DEFAULT_WIDTH)
+    canvas_height = canvas_size(extent_y, CANVAS_DEFAULT_HEIGHT)
+
+    log('Drawflow ➜ 🖼 %s', nodes_data._nodes.keys())
+
+    canvas_attributes = {
+        "id": "drawflow",
+        "class_name": "drawflow",
+        "onMouseUp": on_mouse_up,
+        "onMouseDown": on_mouse_down_canvas,
+        "style": {
+            "width": f"{canvas_width}px",
+            "height": f"{canvas_height}px",
         },
-        nodes_vdom
-    )
+    }
+    if history is not None:
+        nodes_vdom.append(KeyboardShortcuts(on_shortcut, key="shortcuts"))
+    if client_drag:
+        nodes_vdom.append(ClientDrag(on_drag_commit, canvas_id="drawflow", key="client-drag"))
+    if not client_drag or is_dragging_connection:
+        # Without this handler the browser does not send pointer moves to the server at all
+        canvas_attributes["onMouseMove"] = on_mouse_move
+
+    canvas_vdom = html.div(canvas_attributes, nodes_vdom)
+    if virtualize:
+        # Measures the element holding the canvas, which is the visible window
+        window_proxy = GeometryProxy(measure_window, Rect(width=window_size[0], height=window_size[1]), proxy_id="drawflow-window")
+        return html._(canvas_vdom, window_proxy)
+    return canvas_vdom
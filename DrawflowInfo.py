@@ -1,43 +1,485 @@
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple, Iterable
 
 from NodeInfo import NodeInfo
+from ConnectionInfo import ConnectionInfo
+from OutputInfo import OutputInfo
+from TopologicalOrder import TopologicalOrder
+
+class FlowValidationError(ValueError):
+    """Raised by `DrawflowInfo.from_dict(data, validate=True)` with every problem found in data."""
+
+    def __init__(self, problems: List[str]):
+        super().__init__(f"Invalid flow, {len(problems)} problem(s):\n" + "\n".join(f"- {problem}" for problem in problems))
+        self.problems = problems
 
 class DrawflowInfo:
-    def __init__(self, nodes: Dict[str, NodeInfo]):
+    """
+    A versioned flow graph.
+
+    Edits return a new DrawflowInfo that shares every untouched NodeInfo with the
+    previous version, so nodes, outputs and connections must be treated as immutable
+    once they belong to a DrawflowInfo.
+
+    Each version still owns its dict of nodes, so an edit costs O(n) in the number of
+    nodes: the references are copied, not the nodes. Many edits at once are cheaper
+    through the batch methods (with_node_positions, with_connections), which copy the
+    dict once.
+
+    Every version also carries an index of incoming connections, mapping each
+    receiving node and input to the (node, output) pairs feeding it. Versions that
+    do not change connections share the same index.
+
+    Versions also carry their extent: the largest pos_x and pos_y reached by any
+    node since the flow was loaded. It is updated as nodes are placed and never
+    shrinks, which makes it a cheap upper bound for sizing the canvas.
+
+    Once requested, versions also maintain a topological order of the nodes (see
+    TopologicalOrder). It is computed once, then carried to the following versions
+    and updated only around the connections they add, so execution, layout and
+    export can reuse it and a new connection is checked for cycles without walking
+    the whole flow.
+
+    Successive versions also share a journal of the nodes they placed (added, removed
+    or moved), so that a view of the flow, such as the port index of a canvas, can
+    catch up with a later version by visiting only those nodes (see placed_since).
+    """
+
+    # Placements a journal holds before versions start a new one, which costs a full comparison
+    JOURNAL_LIMIT = 10000
+
+    def __init__(self, nodes: Dict[str, NodeInfo], *, _incoming: Optional[Dict[str, Dict[str, Dict[Tuple[str, str], None]]]] = None, _extent: Optional[Tuple[float, float]] = None, _order: Optional[TopologicalOrder] = None, _is_cyclic: bool = False, _journal: Optional[List[str]] = None, _journal_length: int = 0):
         self._nodes = nodes
+        self._incoming = _incoming if _incoming is not None else DrawflowInfo._build_incoming(nodes)
+        self._extent = _extent if _extent is not None else DrawflowInfo.bounds(self)
+        self._order = _order
+        self._is_cyclic = _is_cyclic  # Whether the flow is known to have a cycle, so _order cannot exist
+        # This version holds the first _journal_length placements of _journal, which later versions extend
+        self._journal = _journal if _journal is not None else []
+        self._journal_length = _journal_length if _journal is not None else 0
+
+    @staticmethod
+    def _build_incoming(nodes: Dict[str, NodeInfo]) -> Dict[str, Dict[str, Dict[Tuple[str, str], None]]]:
+        incoming: Dict[str, Dict[str, Dict[Tuple[str, str], None]]] = {}
+        for node_id, node in nodes.items():
+            for output_name, output in node.outputs.items():
+                for connection in output.connections:
+                    incoming.setdefault(connection.node, {}).setdefault(connection.input, {})[(node_id, output_name)] = None
+        return incoming
+
+    @staticmethod
+    def _outgoing_edges(node_id: str, node: Optional[NodeInfo], output_names: Iterable[str]) -> Dict[Tuple[str, str, str, str], None]:
+        edges: Dict[Tuple[str, str, str, str], None] = {}
+        if node is not None:
+            for output_name in output_names:
+                output = node.outputs.get(output_name)
+                if output is not None:
+                    for connection in output.connections:
+                        edges[(node_id, output_name, connection.node, connection.input)] = None
+        return edges
+
+    def _reindexed(self, node_id: str, old_node: Optional[NodeInfo], new_node: Optional[NodeInfo]) -> Dict[str, Dict[str, Dict[Tuple[str, str], None]]]:
+        """Return the incoming index after old_node is replaced by new_node, copying only what changes."""
+        if old_node is not None and new_node is not None and old_node.outputs is new_node.outputs:
+            return self._incoming
+
+        changed_outputs = set(old_node.outputs if old_node is not None else ()) | set(new_node.outputs if new_node is not None else ())
+        if old_node is not None and new_node is not None:
+            changed_outputs = {name for name in changed_outputs if old_node.outputs.get(name) is not new_node.outputs.get(name)}
+        old_edges = DrawflowInfo._outgoing_edges(node_id, old_node, changed_outputs)
+        new_edges = DrawflowInfo._outgoing_edges(node_id, new_node, changed_outputs)
+        removed = [edge for edge in old_edges if edge not in new_edges]
+        added = [edge for edge in new_edges if edge not in old_edges]
+        if not removed and not added:
+            return self._incoming
+
+        incoming = dict(self._incoming)
+        copied = set()
+
+        def inputs_of(receiver_node_id: str) -> Dict[str, Dict[Tuple[str, str], None]]:
+            if receiver_node_id not in copied:
+                incoming[receiver_node_id] = {name: dict(sources) for name, sources in incoming.get(receiver_node_id, {}).items()}
+                copied.add(receiver_node_id)
+            return incoming[receiver_node_id]
+
+        for emitter_node_id, output_name, receiver_node_id, input_name in removed:
+            inputs = inputs_of(receiver_node_id)
+            sources = inputs.get(input_name, {})
+            sources.pop((emitter_node_id, output_name), None)
+            if not sources:
+                inputs.pop(input_name, None)
+            if not inputs:
+                del incoming[receiver_node_id]
+                copied.discard(receiver_node_id)
+        for emitter_node_id, output_name, receiver_node_id, input_name in added:
+            inputs_of(receiver_node_id).setdefault(input_name, {})[(emitter_node_id, output_name)] = None
+        return incoming
+
+    @staticmethod
+    def _successors_in(nodes: Dict[str, NodeInfo]):
+        def successors(node_id: str) -> Iterable[str]:
+            node = nodes.get(node_id)
+            if node is None:
+                return ()
+            return [connection.node for output in node.outputs.values() for connection in output.connections]
+        return successors
+
+    @staticmethod
+    def _predecessors_in(incoming: Dict[str, Dict[str, Dict[Tuple[str, str], None]]]):
+        def predecessors(node_id: str) -> Iterable[str]:
+            return [emitter_node_id for sources in incoming.get(node_id, {}).values() for emitter_node_id, _ in sources]
+        return predecessors
+
+    def _reordered(self, nodes: Dict[str, NodeInfo], incoming: Dict[str, Dict[str, Dict[Tuple[str, str], None]]], added_nodes: Iterable[str], removed_nodes: Iterable[str], added_edges: List[Tuple[str, str]], removes_edges: bool = False) -> Tuple[Optional[TopologicalOrder], bool]:
+        """
+        Return the topological order of the version over nodes and incoming, or None to
+        compute it on request, and whether that version is known to be cyclic.
+
+        removes_edges tells whether the version also drops connections besides the ones
+        of removed_nodes.
+        """
+        removed_nodes = list(removed_nodes)
+        order = self._order
+        if order is None:
+            # Adding nodes or connections never breaks a cycle, so a cyclic flow stays cyclic
+            return None, self._is_cyclic and not removed_nodes and not removes_edges
+        for node_id in removed_nodes:
+            order = order.without_node(node_id)
+        for node_id in added_nodes:
+            order = order.with_node(node_id)
+        if added_edges:
+            order = order.with_edges(added_edges, DrawflowInfo._successors_in(nodes), DrawflowInfo._predecessors_in(incoming))
+        return order, order is None
+
+    def _topological_order(self) -> Optional[TopologicalOrder]:
+        if self._order is None and not self._is_cyclic:
+            self._order = TopologicalOrder.build(self._nodes, DrawflowInfo._successors_in(self._nodes))
+            self._is_cyclic = self._order is None
+        return self._order
+
+    def topological_order(self) -> Optional[List[str]]:
+        """Return the node ids so that every connection goes to a later node, or None when the flow has a cycle."""
+        order = self._topological_order()
+        return order.sorted() if order is not None else None
+
+    def would_create_cycle(self, emitter_node_id: str, receiver_node_id: str) -> bool:
+        """Return whether connecting an output of emitter_node_id to receiver_node_id would close a cycle."""
+        if emitter_node_id == receiver_node_id:
+            return True
+        if emitter_node_id not in self._nodes or receiver_node_id not in self._nodes:
+            return False
+        successors = DrawflowInfo._successors_in(self._nodes)
+        order = self._topological_order()
+        if order is not None:
+            return order.reaches(receiver_node_id, emitter_node_id, successors)
+        # The flow already has a cycle, so there is no order to bound the search
+        visited = {receiver_node_id}
+        stack = [receiver_node_id]
+        while stack:
+            for node_id in successors(stack.pop()):
+                if node_id == emitter_node_id:
+                    return True
+                if node_id not in visited:
+                    visited.add(node_id)
+                    stack.append(node_id)
+        return False
+
+    def get_sources(self, node_id: str, input_name: str) -> List[Tuple[str, str]]:
+        """Return the (node, output) pairs connected to input_name of node_id."""
+        return list(self._incoming.get(node_id, {}).get(input_name, ()))
+
+    def get_incoming(self, node_id: str) -> List[Tuple[str, str, ConnectionInfo]]:
+        """Return every (node, output, connection) whose connection points to node_id."""
+        return [
+            (emitter_node_id, output_name, ConnectionInfo(node=node_id, input=input_name))
+            for input_name, sources in self._incoming.get(node_id, {}).items()
+            for emitter_node_id, output_name in sources
+        ]
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, DrawflowInfo):
             return False
-        return self._nodes == other.nodes
+        return self._nodes == other._nodes
 
     def __repr__(self) -> str:
         return f"DrawflowInfo(nodes={self._nodes})"
 
     def __str__(self) -> str:
         """Return a JSON-like string representation of the object."""
-        return json.dumps(self, default=vars)
+        return json.dumps(self.to_dict())
 
     def to_dict(self) -> Dict[str, Any]:
         return {node_id: node.to_dict() for node_id, node in self._nodes.items()}
 
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'DrawflowInfo':
+    def from_dict(cls, data: Dict[str, Any], *, validate: bool = False) -> 'DrawflowInfo':
+        """
+        Build a flow from the `to_dict` format.
+
+        With validate, data is checked as it is read and FlowValidationError lists
+        every problem at once, instead of trusting it (see `_load_validated`).
+        """
+        if validate:
+            return cls._load_validated(data)
         nodes = {k: NodeInfo.from_dict(v) for k, v in data.items()}
         return cls(nodes=nodes)
 
+    @classmethod
+    def _load_validated(cls, data: Dict[str, Any]) -> 'DrawflowInfo':
+        """
+        Validate and load data in a single pass over it.
+
+        Each node is checked (required fields, types, duplicate ports and connections)
+        while the nodes, the extent and the edge lists are built. Connections may refer
+        to nodes declared later, so their ends are resolved against the loaded nodes
+        once the pass is over, filling the incoming index. The topological order is then
+        built from the same edge lists: loading is linear in nodes and connections.
+
+        An invalid node is still read as far as possible, so that its connections, and
+        the connections to its declared inputs, are checked along with everything else.
+        """
+        problems: List[str] = []
+        nodes: Dict[str, NodeInfo] = {}
+        edges: List[Tuple[str, str, ConnectionInfo]] = []
+        input_names: Dict[str, set] = {}  # Per node whose inputs could be read
+        max_x = max_y = None
+
+        for node_id, node_data in data.items():
+            if not isinstance(node_data, dict):
+                problems.append(f"Node {node_id!r} is not an object")
+                continue
+            is_valid = True
+            missing = [key for key in ("name", "data", "class", "component", "inputs", "pos_x", "pos_y") if key not in node_data]
+            if missing:
+                problems.append(f"Node {node_id!r} misses {', '.join(missing)}")
+                is_valid = False
+            pos_x, pos_y = node_data.get("pos_x", 0), node_data.get("pos_y", 0)
+            if not all(isinstance(pos, (int, float)) and not isinstance(pos, bool) for pos in (pos_x, pos_y)):
+                problems.append(f"Node {node_id!r} has a non-numeric position ({pos_x!r}, {pos_y!r})")
+                is_valid = False
+            inputs = node_data.get("inputs", [])
+            if not isinstance(inputs, list) or not all(isinstance(input_name, str) for input_name in inputs):
+                problems.append(f"Node {node_id!r} inputs are not a list of names")
+                is_valid = False
+            else:
+                if len(set(inputs)) != len(inputs):
+                    problems.append(f"Node {node_id!r} declares input names more than once")
+                if "inputs" in node_data:
+                    input_names[node_id] = set(inputs)
+            outputs_data = node_data.get("outputs", {})
+            if not isinstance(outputs_data, dict):
+                problems.append(f"Node {node_id!r} outputs are not an object")
+                is_valid = False
+                outputs_data = {}
+
+            outputs: Dict[str, OutputInfo] = {}
+            for output_name, output_data in outputs_data.items():
+                connections: Dict[ConnectionInfo, None] = {}
+                connections_data = output_data.get("connections", []) if isinstance(output_data, dict) else None
+                if not isinstance(connections_data, list):
+                    problems.append(f"Output {output_name!r} of node {node_id!r} has no list of connections")
+                    is_valid = False
+                    continue
+                for connection_data in connections_data:
+                    if not isinstance(connection_data, dict) or not isinstance(connection_data.get("node"), str) or not isinstance(connection_data.get("input"), str):
+                        problems.append(f"Output {output_name!r} of node {node_id!r} has a malformed connection {connection_data!r}")
+                        is_valid = False
+                        continue
+                    connection = ConnectionInfo(node=connection_data["node"], input=connection_data["input"])
+                    if connection in connections:
+                        problems.append(f"Output {output_name!r} of node {node_id!r} connects to input {connection.input!r} of node {connection.node!r} more than once")
+                        continue
+                    connections[connection] = None
+                    edges.append((node_id, output_name, connection))
+                outputs[output_name] = OutputInfo._from_connections(connections)
+
+            if is_valid:
+                nodes[node_id] = NodeInfo(
+                    name=node_data["name"],
+                    data=node_data["data"],
+                    custom_class=node_data["class"],
+                    component=node_data["component"],
+                    inputs=inputs,
+                    outputs=outputs,
+                    pos_x=pos_x,
+                    pos_y=pos_y,
+                )
+                max_x = pos_x if max_x is None else max(max_x, pos_x)
+                max_y = pos_y if max_y is None else max(max_y, pos_y)
+
+        incoming: Dict[str, Dict[str, Dict[Tuple[str, str], None]]] = {}
+        successors: Dict[str, List[str]] = {}
+        for emitter_node_id, output_name, connection in edges:
+            if connection.node not in data:
+                problems.append(f"Output {output_name!r} of node {emitter_node_id!r} connects to missing node {connection.node!r}")
+                continue
+            if connection.node not in input_names:
+                continue  # The inputs of the receiver are already reported as invalid
+            if connection.input not in input_names[connection.node]:
+                problems.append(f"Output {output_name!r} of node {emitter_node_id!r} connects to missing input {connection.input!r} of node {connection.node!r}")
+                continue
+            if problems:
+                continue  # Nothing will be loaded, so only the problems matter
+            incoming.setdefault(connection.node, {}).setdefault(connection.input, {})[(emitter_node_id, output_name)] = None
+            successors.setdefault(emitter_node_id, []).append(connection.node)
+
+        if problems:
+            raise FlowValidationError(problems)
+        order = TopologicalOrder.build(nodes, lambda node_id: successors.get(node_id, ()))
+        return cls(nodes=nodes, _incoming=incoming, _extent=(max_x or 0, max_y or 0), _order=order, _is_cyclic=order is None)
+
+    def _derive(self, nodes: Dict[str, NodeInfo], incoming: Dict[str, Dict[str, Dict[Tuple[str, str], None]]], placed: Iterable[str], order: Optional[TopologicalOrder] = None, is_cyclic: bool = False) -> 'DrawflowInfo':
+        """
+        Return a new version over nodes, incoming and order, or known to be cyclic.
+
+        placed lists the nodes that were added, removed or may have moved, so that
+        subclasses can update their own indexes incrementally.
+        """
+        placed = list(placed)
+        journal, journal_length = self._journaled(placed)
+        return DrawflowInfo(nodes=nodes, _incoming=incoming, _extent=self._extended(nodes, placed), _order=order, _is_cyclic=is_cyclic, _journal=journal, _journal_length=journal_length)
+
+    def _journaled(self, placed: List[str]) -> Tuple[List[str], int]:
+        """Return the journal and its length for a version derived from this one by placing placed."""
+        journal = self._journal
+        if not placed:
+            return journal, self._journal_length
+        if self._journal_length != len(journal) or len(journal) + len(placed) > DrawflowInfo.JOURNAL_LIMIT:
+            # Another version was already derived from this one, or the journal is full
+            journal = []
+        journal.extend(placed)
+        return journal, len(journal)
+
+    def placement_mark(self) -> Tuple[List[str], int]:
+        """Return a mark of this version to pass to placed_since later."""
+        return (self._journal, self._journal_length)
+
+    def placed_since(self, mark: Optional[Tuple[List[str], int]]) -> Optional[List[str]]:
+        """
+        Return the nodes placed (added, removed or moved) since the version of mark, or
+        None when this version does not derive from it, and the positions of every node
+        must be compared instead.
+        """
+        if mark is None:
+            return None
+        journal, journal_length = mark
+        if journal is not self._journal or journal_length > self._journal_length:
+            return None
+        return list(dict.fromkeys(journal[journal_length:self._journal_length]))
+
+    def _extended(self, nodes: Dict[str, NodeInfo], placed: Iterable[str]) -> Tuple[float, float]:
+        """Return the extent after the nodes in placed were added or moved."""
+        max_x, max_y = self._extent
+        for node_id in placed:
+            node = nodes.get(node_id)
+            if node is not None:
+                max_x = max(max_x, node.pos_x)
+                max_y = max(max_y, node.pos_y)
+        return (max_x, max_y)
+
+    def extent(self) -> Tuple[float, float]:
+        """Return the largest pos_x and pos_y reached by any node, including nodes since moved or deleted."""
+        return self._extent
+
+    def bounds(self) -> Tuple[float, float]:
+        """Return the largest pos_x and pos_y of any node, or (0, 0) when empty."""
+        max_x = max((node.pos_x for node in self._nodes.values()), default=0)
+        max_y = max((node.pos_y for node in self._nodes.values()), default=0)
+        return (max_x, max_y)
+
     def copy(self) -> 'DrawflowInfo':
-        return DrawflowInfo(nodes={k: v.copy() for k, v in self._nodes.items()})
+        """Return a new version sharing every node with this one, in O(n) for the dict of nodes."""
+        return self._derive(dict(self._nodes), self._incoming, (), self._order, self._is_cyclic)
+
+    def deep_copy(self) -> 'DrawflowInfo':
+        """Return a new version with private copies of every node."""
+        return type(self)(nodes={k: v.copy() for k, v in self._nodes.items()})
+
+    def with_node(self, node_id: str, node: NodeInfo) -> 'DrawflowInfo':
+        """Return a new version where node_id is added or replaced by node."""
+        nodes = dict(self._nodes)
+        nodes[node_id] = node
+        old_node = self._nodes.get(node_id)
+        incoming = self._reindexed(node_id, old_node, node)
+        order, is_cyclic = self._order, self._is_cyclic
+        if old_node is None or old_node.outputs is not node.outputs:
+            old_receivers = {connection.node for output in old_node.outputs.values() for connection in output.connections} if old_node is not None else set()
+            new_receivers = {connection.node for output in node.outputs.values() for connection in output.connections}
+            added_edges = [(node_id, receiver_node_id) for receiver_node_id in new_receivers if receiver_node_id not in old_receivers]
+            order, is_cyclic = self._reordered(nodes, incoming, () if old_node is not None else (node_id,), (), added_edges, removes_edges=not old_receivers <= new_receivers)
+        return self._derive(nodes, incoming, (node_id,), order, is_cyclic)
+
+    def with_node_position(self, node_id: str, pos_x: float, pos_y: float) -> 'DrawflowInfo':
+        return self.with_node(node_id, self._nodes[node_id].with_position(pos_x, pos_y))
+
+    def with_node_positions(self, positions: Dict[str, Tuple[float, float]]) -> 'DrawflowInfo':
+        """Return a new version where every node of positions is moved to its (pos_x, pos_y), copying the flow once."""
+        nodes = dict(self._nodes)
+        for node_id, (pos_x, pos_y) in positions.items():
+            nodes[node_id] = nodes[node_id].with_position(pos_x, pos_y)
+        return self._derive(nodes, self._incoming, positions, self._order, self._is_cyclic)
+
+    def with_node_data(self, node_id: str, data: Dict[str, Any]) -> 'DrawflowInfo':
+        return self.with_node(node_id, self._nodes[node_id].with_data(data))
+
+    def with_connection(self, node_id: str, output_name: str, connection: ConnectionInfo) -> 'DrawflowInfo':
+        """Return a new version where output_name of node_id also feeds connection."""
+        node = self._nodes[node_id]
+        output = node.outputs[output_name].with_connection(connection)
+        return self.with_node(node_id, node.with_output(output_name, output))
+
+    def with_connections(self, connections: Iterable[Tuple[str, str, ConnectionInfo]]) -> 'DrawflowInfo':
+        """Return a new version where every (node, output, connection) is added, copying each touched node once."""
+        added: Dict[Tuple[str, str], Dict[ConnectionInfo, None]] = {}
+        for node_id, output_name, connection in connections:
+            if connection not in self._nodes[node_id].outputs[output_name]._connections:
+                added.setdefault((node_id, output_name), {})[connection] = None
+        if not added:
+            return self.copy()
+
+        nodes = dict(self._nodes)
+        incoming = dict(self._incoming)
+        copied = set()
+        for (node_id, output_name), new_connections in added.items():
+            node = nodes[node_id]
+            output = node.outputs[output_name]
+            nodes[node_id] = node.with_output(output_name, OutputInfo._from_connections({**output._connections, **new_connections}))
+            for connection in new_connections:
+                if connection.node not in copied:
+                    incoming[connection.node] = {name: dict(sources) for name, sources in incoming.get(connection.node, {}).items()}
+                    copied.add(connection.node)
+                incoming[connection.node].setdefault(connection.input, {})[(node_id, output_name)] = None
+        added_edges = [(node_id, connection.node) for (node_id, _), new_connections in added.items() for connection in new_connections]
+        return self._derive(nodes, incoming, (), *self._reordered(nodes, incoming, (), (), added_edges))
+
+    def without_connection(self, node_id: str, output_name: str, connection: ConnectionInfo) -> 'DrawflowInfo':
+        """Return a new version where output_name of node_id no longer feeds connection."""
+        node = self._nodes[node_id]
+        output = node.outputs[output_name].without_connection(connection)
+        return self.with_node(node_id, node.with_output(output_name, output))
+
+    def without_node(self, node_id: str) -> 'DrawflowInfo':
+        """Return a new version without node_id and without the connections pointing to it."""
+        nodes = dict(self._nodes)
+        incoming = self._reindexed(node_id, nodes.pop(node_id), None)
+        if incoming is self._incoming:
+            incoming = dict(incoming)
+        for input_name, sources in incoming.pop(node_id, {}).items():
+            connection = ConnectionInfo(node=node_id, input=input_name)
+            for emitter_node_id, output_name in sources:
+                emitter_node = nodes[emitter_node_id]
+                output = emitter_node.outputs[output_name].without_connection(connection)
+                nodes[emitter_node_id] = emitter_node.with_output(output_name, output)
+        return self._derive(nodes, incoming, (node_id,), *self._reordered(nodes, incoming, (), (node_id,), []))
     
     def __getitem__(self, item):
          return self._nodes[item]
      
     def remove(self, node_id: str):
-        del self._nodes[node_id]
+        updated = self.without_node(node_id)
+        self._nodes, self._incoming, self._extent = dict(updated._nodes), updated._incoming, updated._extent
+        self._order, self._is_cyclic = updated._order, updated._is_cyclic
+        self._journal, self._journal_length = updated._journal, updated._journal_length
         
     def list_nodes(self) -> List[str]:
         return list(self._nodes.keys())
-    
-    def __del__(self):
-        self._nodes.clear()
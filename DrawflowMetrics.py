@@ -0,0 +1,34 @@
+import json
+from typing import Dict, Any
+
+class DrawflowMetrics:
+    """Counters describing how a Drawflow instance handles events and renders."""
+
+    def __init__(self):
+        self.move_interval = 0.0
+        self.mouse_move_events = 0
+        self.mouse_move_updates = 0
+        self.path_cache_hits = 0
+        self.path_cache_misses = 0
+
+    @property
+    def coalesced_events(self) -> int:
+        """Number of mouse-move events folded into a later state update."""
+        return self.mouse_move_events - self.mouse_move_updates
+
+    def __repr__(self) -> str:
+        return f"DrawflowMetrics(move_interval={self.move_interval}, mouse_move_events={self.mouse_move_events}, mouse_move_updates={self.mouse_move_updates}, path_cache_hits={self.path_cache_hits}, path_cache_misses={self.path_cache_misses})"
+
+    def __str__(self) -> str:
+        """Return a JSON-like string representation of the object."""
+        return json.dumps(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "move_interval": self.move_interval,
+            "mouse_move_events": self.mouse_move_events,
+            "mouse_move_updates": self.mouse_move_updates,
+            "coalesced_events": self.coalesced_events,
+            "path_cache_hits": self.path_cache_hits,
+            "path_cache_misses": self.path_cache_misses,
+        }
@@ -0,0 +1,139 @@
+from typing import Any, Callable, Optional
+
+from reactpy import component, html, event, use_memo
+
+from CanvasState import CanvasState, use_canvas_state
+from PortGeometryProxy import PortGeometryProxy
+from NodeInfo import NodeInfo
+from drawflow_logger import log, span
+
+@component
+def ComponentNotFound(data: NodeInfo, set_data: Any):
+    return html.div("Component not found")
+
+@component
+def DrawflowNode(node_id: str, node_data: NodeInfo, content_component: Callable[..., Any], is_selected: bool, callbacks: Any, canvas: CanvasState, status: Optional[str] = None):
+    """
+    A ReactPy component rendering one node of a Drawflow canvas.
+
+    The vdom is memoized on the node's own state, so re-rendering the canvas only
+    rebuilds the nodes that changed. Event handlers reach the canvas through
+    `callbacks`, a ref whose `current` dict always holds the latest canvas handlers.
+    While the node is dragged, it re-renders alone at the position held by `canvas`.
+
+    Args:
+        node_id (str): The identifier of the node in the flow.
+        node_data (NodeInfo): The node to render.
+        content_component (Callable[..., Any]): The ReactPy component rendering the node body.
+        is_selected (bool): Whether the node is the selected one, which shows a delete button unless dragging.
+        callbacks (Any): A ref to the canvas handlers.
+        canvas (CanvasState): The gesture state of the canvas.
+        status (Optional[str]): The execution status of the node, shown as a `status-<status>` class.
+    """
+    use_canvas_state(canvas, [("node", node_id)])
+    pos_x, pos_y = canvas.position(node_id, node_data)
+    show_delete = is_selected and not canvas.drag.is_dragging
+
+    def render_node() -> Any:
+        log(f"DrawflowNode.render_node")
+
+        def update_node(new_data):
+            callbacks.current["update_node"](node_id, new_data)
+
+        # Create node content with the selected component
+        content = content_component(node_data, update_node)
+
+        # Create inputs and outputs containers
+        inputs = html.div(
+            {"class_name": "inputs"},
+            [
+                html.div(
+                    {
+                        "class_name": f"input input_{index+1}",
+                        "data-port": input_name,
+                        "onMouseOver" : lambda event, input_name=input_name:
+                            callbacks.current["on_mouse_over_input"](node_id, input_name, event),
+                    },
+                )
+                for index, input_name in enumerate(node_data.inputs)
+            ]
+        )
+
+        outputs = html.div(
+            {"class_name": "outputs"},
+            [
+                html.div(
+                    {
+                        "class_name": f"output output_{index+1}",
+                        "data-port": output_name,
+                        "onMouseOver" : lambda event, output_name=output_name:
+                            callbacks.current["on_mouse_over_output"](node_id, output_name, event),
+                    },
+                )
+                for index, output_name in enumerate(node_data.outputs)
+            ]
+        )
+
+        @event(prevent_default=False, stop_propagation=True)
+        def on_mouse_down_node(event):
+            callbacks.current["on_mouse_down_node"](node_id, event)
+
+        @event(prevent_default=True, stop_propagation=True)
+        def on_mouse_over_node(event):
+            callbacks.current["on_mouse_over_node"](event)
+
+        @event(prevent_default=True, stop_propagation=True)
+        def on_delete_click(event):
+            callbacks.current["on_delete_click"](event)
+
+        # Determine the class name, adding a 'selected' class if this is the selected node
+        node_classes = f"drawflow-node {node_data.custom_class}"
+        if status:
+            node_classes += f" status-{status}"
+
+        # Initially hidden delete button
+        delete_box = html.div(
+            {
+                "class_name": "drawflow-delete-hidden",
+                "hidden": "hidden",
+            },
+        )
+
+        if is_selected:
+            node_classes += " selected"  # Add a custom 'selected' class
+            if show_delete: # Show delete button only when not dragging
+                delete_box = html.div(
+                    {
+                        "class_name": "drawflow-delete",
+                        "onMouseDown": on_delete_click,
+                        "style": {"position": "absolute", "top": -38, "right": -20, "cursor": "pointer"}
+                    },
+                    "x"
+                )
+
+        # Create the main node div
+        return html.div({
+            "id": f"node-{node_id}",
+            "class_name": node_classes,
+            "style": {"top": f"{pos_y}px", "left": f"{pos_x}px"},
+            "onMouseDown": on_mouse_down_node,
+            "onMouseOver": on_mouse_over_node
+        }, [
+            inputs,
+            content,
+            outputs,
+            delete_box,
+            # Measures all ports at once; remounted (and so re-run) when the port layout changes
+            PortGeometryProxy(
+                lambda measured: callbacks.current["store_rects"](node_id, measured),
+                proxy_id=f"{node_id} ports",
+                key=f"ports {len(node_data.inputs)} {len(node_data.outputs)}",
+            ),
+        ])
+
+    def timed_render_node() -> Any:
+        # Only runs when the memo misses, so the span times actual node renders
+        with span("DrawflowNode.render"):
+            return render_node()
+
+    return use_memo(timed_render_node, [node_id, node_data, content_component, is_selected, show_delete, status, pos_x, pos_y])
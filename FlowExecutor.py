@@ -0,0 +1,278 @@
+import asyncio
+import multiprocessing
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from DrawflowInfo import DrawflowInfo
+from NodeInfo import NodeInfo
+from drawflow_logger import log
+
+# Runs one node: called with the node id, the node and, per input name, the results
+# of the nodes connected to it
+NodeTask = Callable[[str, NodeInfo, Dict[str, List[Any]]], Awaitable[Any]]
+# Runs one CPU-bound node in a worker process: a picklable, module-level function
+# called with the node id, the node data and the inputs
+CpuNodeTask = Callable[[str, Dict[str, Any], Dict[str, List[Any]]], Any]
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+# Bytes from which buffers go to and from worker processes through shared memory
+SHARED_BUFFER_THRESHOLD = 64 * 1024
+
+class _SharedBuffer:
+    """A picklable reference to a buffer copied into shared memory."""
+
+    __slots__ = ("name", "size")
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+
+def _is_large_buffer(value: Any) -> bool:
+    return isinstance(value, (bytes, bytearray, memoryview)) and memoryview(value).nbytes >= SHARED_BUFFER_THRESHOLD
+
+def _to_shared_memory(value: Any) -> SharedMemory:
+    view = memoryview(value).cast("B")
+    shared_memory = SharedMemory(create=True, size=view.nbytes)
+    shared_memory.buf[:view.nbytes] = view
+    return shared_memory
+
+def _run_in_process(task: CpuNodeTask, node_id: str, data: Dict[str, Any], inputs: Dict[str, List[Any]]) -> Any:
+    """Run task in a worker process, mapping the shared input buffers and sharing a large result."""
+    attached = []
+
+    def attach(value: Any) -> Any:
+        if not isinstance(value, _SharedBuffer):
+            return value
+        shared_memory = SharedMemory(name=value.name)
+        view = shared_memory.buf[:value.size]
+        attached.append((shared_memory, view))
+        return view
+
+    try:
+        result = task(node_id, data, {input_name: [attach(value) for value in values] for input_name, values in inputs.items()})
+        if _is_large_buffer(result):
+            shared_memory = _to_shared_memory(result)
+            shared_memory.close()
+            return _SharedBuffer(shared_memory.name, memoryview(result).nbytes)
+        if isinstance(result, memoryview):
+            # A view of an input cannot be pickled, nor outlive the shared memory
+            return result.tobytes()
+        return result
+    finally:
+        for shared_memory, view in attached:
+            try:
+                view.release()
+                shared_memory.close()
+            except BufferError:
+                # The task kept a view of the buffer; it is unmapped when the worker exits
+                pass
+
+class FlowExecutor:
+    """
+    Runs a flow on asyncio, each node once every node feeding it has finished.
+
+    `task_map` maps component names to the coroutine functions running their nodes,
+    the way `component_map` maps them to the components rendering them. Nodes
+    without a task pass their inputs through. Independent branches run concurrently,
+    at most `max_concurrency` nodes at a time, and each node is cancelled after
+    `timeout` seconds. When a node fails or times out, the nodes downstream of it are
+    skipped while the other branches carry on. Nodes on a cycle never get all their
+    inputs, so they are skipped too, along with the nodes downstream of them.
+
+    CPU-bound nodes would block the event loop serving every session, so
+    `cpu_task_map` runs their components in worker processes instead, with the node
+    data and inputs pickled. Inputs and results that are buffers (bytes, bytearray,
+    memoryview) of at least SHARED_BUFFER_THRESHOLD bytes go through shared memory
+    rather than the pool pipe; such inputs reach the task as read-only memoryviews
+    of that memory. At most `process_workers` CPU-bound nodes are handed to the pool
+    at once: further ones wait in the event loop, without queuing work or buffers in
+    the pool, while asynchronous nodes keep running.
+    """
+
+    MAX_CONCURRENCY = 8
+    TIMEOUT = 30.0
+
+    def __init__(self, task_map: Dict[str, NodeTask], *, max_concurrency: int = MAX_CONCURRENCY, timeout: Optional[float] = TIMEOUT, cpu_task_map: Optional[Dict[str, CpuNodeTask]] = None, process_workers: Optional[int] = None, process_pool: Optional[Executor] = None):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.task_map = task_map
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.cpu_task_map = cpu_task_map or {}
+        self.process_workers = process_workers or multiprocessing.cpu_count()
+        self._process_pool = process_pool
+        self._owns_process_pool = process_pool is None
+        self._process_slots = asyncio.Semaphore(self.process_workers)
+
+    def _pool(self) -> Executor:
+        if self._process_pool is None:
+            # Spawned workers do not inherit the event loop, sockets and database connections
+            self._process_pool = ProcessPoolExecutor(self.process_workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._process_pool
+
+    def shutdown(self):
+        """Stop the worker processes started by this executor."""
+        if self._owns_process_pool and self._process_pool is not None:
+            self._process_pool.shutdown(cancel_futures=True)
+            self._process_pool = None
+
+    @staticmethod
+    def _downstream(nodes_data: DrawflowInfo, node_id: str) -> Set[str]:
+        return {connection.node for output in nodes_data[node_id].outputs.values() for connection in output.connections}
+
+    @staticmethod
+    def _upstream(nodes_data: DrawflowInfo, node_id: str) -> Set[str]:
+        return {emitter_node_id for emitter_node_id, _, _ in nodes_data.get_incoming(node_id)}
+
+    @staticmethod
+    def _blocked_by_cycles(nodes_data: DrawflowInfo, waiting: Dict[str, int]) -> Set[str]:
+        """Return the nodes that can never become ready: those on a cycle and downstream of one."""
+        remaining = dict(waiting)
+        ready = [node_id for node_id, count in remaining.items() if count == 0]
+        while ready:
+            node_id = ready.pop()
+            for receiver_node_id in FlowExecutor._downstream(nodes_data, node_id):
+                remaining[receiver_node_id] -= 1
+                if remaining[receiver_node_id] == 0:
+                    ready.append(receiver_node_id)
+        return {node_id for node_id, count in remaining.items() if count > 0}
+
+    async def _run_in_pool(self, cpu_task: CpuNodeTask, node_id: str, node: NodeInfo, inputs: Dict[str, List[Any]]) -> Any:
+        await self._process_slots.acquire()
+        shared = []
+
+        def share(value: Any) -> Any:
+            if not _is_large_buffer(value):
+                return value
+            shared_memory = _to_shared_memory(value)
+            shared.append(shared_memory)
+            return _SharedBuffer(shared_memory.name, memoryview(value).nbytes)
+
+        def release(abandoned: Optional[asyncio.Future] = None):
+            for shared_memory in shared:
+                shared_memory.close()
+                shared_memory.unlink()
+            self._process_slots.release()
+            if abandoned is not None and not abandoned.cancelled() and abandoned.exception() is None:
+                # Nobody awaits the result anymore, so free the memory the worker shared it through
+                result = abandoned.result()
+                if isinstance(result, _SharedBuffer):
+                    shared_memory = SharedMemory(name=result.name)
+                    shared_memory.close()
+                    shared_memory.unlink()
+
+        try:
+            shared_inputs = {input_name: [share(value) for value in values] for input_name, values in inputs.items()}
+            future = asyncio.get_running_loop().run_in_executor(self._pool(), _run_in_process, cpu_task, node_id, node.data, shared_inputs)
+        except BaseException:
+            release()
+            raise
+        try:
+            # Only the work itself is timed, not the wait for a free worker
+            result = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            # A worker cannot be interrupted: keep its slot and buffers until it is done
+            future.add_done_callback(release)
+            raise
+        except BaseException:
+            release()
+            raise
+        release()
+
+        if isinstance(result, _SharedBuffer):
+            shared_memory = SharedMemory(name=result.name)
+            try:
+                result = bytes(shared_memory.buf[:result.size])
+            finally:
+                shared_memory.close()
+                shared_memory.unlink()
+        return result
+
+    async def _run_node(self, node_id: str, node: NodeInfo, inputs: Dict[str, List[Any]]) -> Any:
+        cpu_task = self.cpu_task_map.get(node.component)
+        if cpu_task is not None:
+            return await self._run_in_pool(cpu_task, node_id, node, inputs)
+        task = self.task_map.get(node.component)
+        if task is None:
+            return inputs
+        if self.timeout is None:
+            return await task(node_id, node, inputs)
+        return await asyncio.wait_for(task(node_id, node, inputs), self.timeout)
+
+    async def run(self, nodes_data: DrawflowInfo, *, on_status: Optional[Callable[[str, str, Any], None]] = None) -> Dict[str, Any]:
+        """
+        Run every node of nodes_data and return the results of the nodes that succeeded.
+
+        on_status is called with the node id, its new status and the node result,
+        exception or None, as each node progresses: every node is first PENDING, then
+        RUNNING and DONE or FAILED, or SKIPPED.
+        """
+        log(f"FlowExecutor.run")
+        waiting = {node_id: len(FlowExecutor._upstream(nodes_data, node_id)) for node_id in nodes_data._nodes}
+        # The order maintained by the flow rules out cycles without another pass over it
+        order = nodes_data.topological_order()
+        blocked_by_cycles = FlowExecutor._blocked_by_cycles(nodes_data, waiting) if order is None else set()
+        if order is not None:
+            waiting = {node_id: waiting[node_id] for node_id in order}
+
+        def report(node_id: str, status: str, value: Any = None):
+            if on_status:
+                on_status(node_id, status, value)
+
+        for node_id in nodes_data._nodes:
+            report(node_id, SKIPPED if node_id in blocked_by_cycles else PENDING)
+
+        results: Dict[str, Any] = {}
+        blocked: Set[str] = set()  # Nodes downstream of a failure
+        ready = deque(node_id for node_id, count in waiting.items() if count == 0)
+        running: Dict[asyncio.Task, str] = {}
+
+        def finish(node_id: str):
+            for receiver_node_id in FlowExecutor._downstream(nodes_data, node_id):
+                waiting[receiver_node_id] -= 1
+                if waiting[receiver_node_id] == 0:
+                    ready.append(receiver_node_id)
+
+        try:
+            while ready or running:
+                while ready and len(running) < self.max_concurrency:
+                    node_id = ready.popleft()
+                    if node_id in blocked:
+                        report(node_id, SKIPPED)
+                        blocked.update(FlowExecutor._downstream(nodes_data, node_id))
+                        finish(node_id)
+                        continue
+                    inputs: Dict[str, List[Any]] = {}
+                    for input_name in nodes_data[node_id].inputs:
+                        inputs[input_name] = [results[emitter_node_id] for emitter_node_id, _ in nodes_data.get_sources(node_id, input_name)]
+                    report(node_id, RUNNING)
+                    running[asyncio.ensure_future(self._run_node(node_id, nodes_data[node_id], inputs))] = node_id
+                if not running:
+                    continue
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    node_id = running.pop(task)
+                    error = asyncio.CancelledError() if task.cancelled() else task.exception()
+                    if error is None:
+                        results[node_id] = task.result()
+                        report(node_id, DONE, results[node_id])
+                    else:
+                        log("FlowExecutor ➜ %s failed: %r", node_id, error)
+                        report(node_id, FAILED, error)
+                        blocked.update(FlowExecutor._downstream(nodes_data, node_id))
+                    finish(node_id)
+        finally:
+            # Leave nothing running when the run itself is cancelled, nor tasks pending destruction
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+        return results
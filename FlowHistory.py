@@ -0,0 +1,79 @@
+from collections import deque
+from typing import Deque, List, Tuple
+
+from FlowOperation import FlowOperation
+
+class FlowHistory:
+    """
+    Undo and redo stacks of flow edits.
+
+    Each entry keeps the operations of one edit together with their inverse, so the
+    history costs memory in proportion to what changed rather than to the size of
+    the flow. Once the entries weigh more than `memory_budget` (see
+    FlowOperation.weight), the oldest ones are forgotten.
+    """
+
+    MEMORY_BUDGET = 100000
+
+    def __init__(self, *, memory_budget: int = MEMORY_BUDGET):
+        self.memory_budget = memory_budget
+        self._undo: Deque[Tuple[List[FlowOperation], List[FlowOperation], int]] = deque()
+        self._redo: List[Tuple[List[FlowOperation], List[FlowOperation], int]] = []
+        self._weight = 0
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def record(self, operations: List[FlowOperation], inverse: List[FlowOperation]):
+        """Record one edit made of operations, undone by applying inverse in order."""
+        if not operations:
+            return
+        for _, _, weight in self._redo:
+            self._weight -= weight
+        self._redo.clear()
+
+        if self._undo and FlowHistory._is_same_field_edit(self._undo[-1][0], operations):
+            # Successive edits of the same node data (e.g. typing) are undone together
+            _, first_inverse, weight = self._undo.pop()
+            self._weight -= weight
+            inverse = first_inverse
+
+        weight = sum(operation.weight() for operation in operations) + sum(operation.weight() for operation in inverse)
+        self._undo.append((operations, inverse, weight))
+        self._weight += weight
+        while self._weight > self.memory_budget and len(self._undo) > 1:
+            self._weight -= self._undo.popleft()[2]
+
+    @staticmethod
+    def _is_same_field_edit(previous: List[FlowOperation], operations: List[FlowOperation]) -> bool:
+        return (
+            len(previous) == 1 and len(operations) == 1 and
+            previous[0].kind == "data" and operations[0].kind == "data" and
+            previous[0].node_id == operations[0].node_id
+        )
+
+    def undo(self) -> List[FlowOperation]:
+        """Move the latest edit to the redo stack and return the operations undoing it."""
+        if not self._undo:
+            return []
+        entry = self._undo.pop()
+        self._redo.append(entry)
+        return entry[1]
+
+    def redo(self) -> List[FlowOperation]:
+        """Move the latest undone edit back to the undo stack and return its operations."""
+        if not self._redo:
+            return []
+        entry = self._redo.pop()
+        self._undo.append(entry)
+        return entry[0]
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._weight = 0
@@ -0,0 +1,190 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from DrawflowInfo import DrawflowInfo
+
+# Pixels between the left edges of consecutive layers, and between the tops of the
+# nodes of a layer
+LAYER_SPACING = 350
+NODE_SPACING = 200
+# Where a whole-flow layout puts its top-left node
+ORIGIN = (50, 50)
+# Barycenter sweeps of the crossing reduction, alternately downstream and upstream
+SWEEPS = 4
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("FlowLayout requires numpy, install it with `pip install numpy`")
+
+def _edges(nodes_data: DrawflowInfo, node_ids: List[str], rows: Dict[str, int]) -> Tuple[List[int], List[int]]:
+    """Return the emitter and receiver rows of the connections between node_ids, once per pair."""
+    emitters: List[int] = []
+    receivers: List[int] = []
+    for emitter, node_id in enumerate(node_ids):
+        seen = set()
+        for output in nodes_data[node_id].outputs.values():
+            for connection in output.connections:
+                receiver = rows.get(connection.node)
+                if receiver is not None and receiver != emitter and receiver not in seen:
+                    seen.add(receiver)
+                    emitters.append(emitter)
+                    receivers.append(receiver)
+    return emitters, receivers
+
+def _ranks(count: int, emitters: List[int], receivers: List[int]) -> List[int]:
+    """
+    Return a rank per row so that most connections go to a higher rank.
+
+    Rows are ranked as they become free of unranked emitters. When only cycles are
+    left, the first unranked row is taken anyway, which turns the connections into it
+    from its cycle into the only ones going backwards.
+    """
+    successors: List[List[int]] = [[] for _ in range(count)]
+    waiting = [0] * count
+    for emitter, receiver in zip(emitters, receivers):
+        successors[emitter].append(receiver)
+        waiting[receiver] += 1
+    ranks = [-1] * count
+    ready = [row for row in reversed(range(count)) if waiting[row] == 0]
+    next_rank = 0
+    next_row = 0  # Rows before it are ranked
+    while next_rank < count:
+        if not ready:
+            while ranks[next_row] >= 0:
+                next_row += 1
+            ready.append(next_row)
+        row = ready.pop()
+        if ranks[row] >= 0:
+            continue
+        ranks[row] = next_rank
+        next_rank += 1
+        for receiver in successors[row]:
+            waiting[receiver] -= 1
+            if waiting[receiver] == 0 and ranks[receiver] < 0:
+                ready.append(receiver)
+    return ranks
+
+def _layers(count: int, emitters: List[int], receivers: List[int], ranks: List[int]) -> 'np.ndarray':
+    """
+    Return the layer of each row: the longest path reaching it, ignoring the
+    connections going backwards.
+
+    Rows without emitters are then moved next to their first receiver, so that
+    sources feeding deep nodes do not all pile up in the first layer.
+    """
+    predecessors: List[List[int]] = [[] for _ in range(count)]
+    successors: List[List[int]] = [[] for _ in range(count)]
+    for emitter, receiver in zip(emitters, receivers):
+        if ranks[emitter] < ranks[receiver]:
+            predecessors[receiver].append(emitter)
+            successors[emitter].append(receiver)
+    in_order = sorted(range(count), key=ranks.__getitem__)
+    layers = [0] * count
+    for row in in_order:
+        if predecessors[row]:
+            layers[row] = max(layers[emitter] for emitter in predecessors[row]) + 1
+    for row in reversed(in_order):
+        if not predecessors[row] and successors[row]:
+            layers[row] = min(layers[receiver] for receiver in successors[row]) - 1
+    return np.asarray(layers, dtype=np.int64)
+
+def _positions_in_layers(layers: 'np.ndarray', keys: 'np.ndarray', ties: 'np.ndarray') -> 'np.ndarray':
+    """Return the position of each row in its layer, ordering rows by keys then ties, centered on 0."""
+    order = np.lexsort((ties, keys, layers))
+    sizes = np.bincount(layers)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    positions = np.empty(len(layers), dtype=np.float64)
+    positions[order] = np.arange(len(layers)) - starts[layers[order]]
+    return positions - (sizes[layers] - 1) / 2
+
+def _reduce_crossings(layers: 'np.ndarray', positions: 'np.ndarray', emitters: 'np.ndarray', receivers: 'np.ndarray', sweeps: int) -> 'np.ndarray':
+    """
+    Reorder the rows of each layer by the barycenter of their neighbors.
+
+    Sweeps alternately go downstream, ordering each layer by the emitters feeding it,
+    and upstream, by the receivers it feeds, so every layer is ordered against
+    positions the sweep already settled. Each layer is reordered with a few array
+    operations over its own connections; connections spanning several layers pull
+    their ends toward each other directly instead of through dummy nodes.
+    """
+    positions = positions.copy()
+    layer_count = int(layers.max()) + 1
+    rows_by_layer = np.argsort(layers, kind="stable")
+    starts = np.searchsorted(layers[rows_by_layer], np.arange(layer_count + 1))
+    # Index of each row among the rows of its layer
+    local = np.empty(len(layers), dtype=np.int64)
+    local[rows_by_layer] = np.arange(len(layers)) - starts[layers[rows_by_layer]]
+
+    def by_layer(sources: 'np.ndarray', targets: 'np.ndarray') -> List[Tuple['np.ndarray', 'np.ndarray']]:
+        """Return, per layer, the sources and local target indexes of the connections into it."""
+        order = np.argsort(layers[targets], kind="stable")
+        sources, targets = sources[order], targets[order]
+        bounds = np.searchsorted(layers[targets], np.arange(layer_count + 1))
+        return [(sources[bounds[layer]:bounds[layer + 1]], local[targets[bounds[layer]:bounds[layer + 1]]]) for layer in range(layer_count)]
+
+    downstream = by_layer(emitters, receivers)
+    upstream = by_layer(receivers, emitters)
+    for sweep in range(sweeps):
+        connections, layer_order = (downstream, range(1, layer_count)) if sweep % 2 == 0 else (upstream, range(layer_count - 2, -1, -1))
+        for layer in layer_order:
+            sources, targets = connections[layer]
+            if not len(sources):
+                continue
+            rows = rows_by_layer[starts[layer]:starts[layer + 1]]
+            current = positions[rows]
+            degrees = np.bincount(targets, minlength=len(rows))
+            sums = np.bincount(targets, weights=positions[sources], minlength=len(rows))
+            # Rows without neighbors on that side keep their place
+            barycenters = np.divide(sums, degrees, out=current.copy(), where=degrees > 0)
+            positions[rows[np.lexsort((current, barycenters))]] = np.arange(len(rows)) - (len(rows) - 1) / 2
+    return positions
+
+def layered_layout(nodes_data: DrawflowInfo, node_ids: Optional[Iterable[str]] = None, *, layer_spacing: float = LAYER_SPACING, node_spacing: float = NODE_SPACING, sweeps: int = SWEEPS) -> Dict[str, Tuple[float, float]]:
+    """
+    Return new positions for the nodes of nodes_data, arranged in layers from left to right.
+
+    Every connection goes to a later layer, except the ones closing a cycle, and the
+    nodes of each layer are ordered to reduce crossings (Sugiyama-style). Nodes keep
+    their current vertical order until the sweeps reorder them.
+
+    When node_ids is given, only those nodes are laid out, by the connections between
+    them, and placed where their bounding box started; the other nodes are left
+    untouched and not even visited, so re-laying out a selection costs the same on a
+    large flow as on a small one. Requires numpy.
+
+    Apply the positions with `nodes_data.with_node_positions(positions)`.
+    """
+    _require_numpy()
+    order = None
+    if node_ids is None:
+        order = nodes_data.topological_order()
+        node_ids = order or list(nodes_data._nodes)
+        origin = ORIGIN
+    else:
+        node_ids = [node_id for node_id in dict.fromkeys(node_ids) if node_id in nodes_data._nodes]
+        origin = (
+            min((nodes_data[node_id].pos_x for node_id in node_ids), default=0),
+            min((nodes_data[node_id].pos_y for node_id in node_ids), default=0),
+        )
+    if not node_ids:
+        return {}
+
+    count = len(node_ids)
+    rows = {node_id: row for row, node_id in enumerate(node_ids)}
+    emitters, receivers = _edges(nodes_data, node_ids, rows)
+    # Rows in the flow's topological order are their own ranks
+    ranks = list(range(count)) if order else _ranks(count, emitters, receivers)
+    layers = _layers(count, emitters, receivers, ranks)
+    layers -= layers.min()
+
+    current_ys = np.fromiter((nodes_data[node_id].pos_y for node_id in node_ids), dtype=np.float64, count=count)
+    positions = _positions_in_layers(layers, current_ys, np.arange(count))
+    positions = _reduce_crossings(layers, positions, np.asarray(emitters, dtype=np.int64), np.asarray(receivers, dtype=np.int64), sweeps)
+
+    xs = (origin[0] + layers * layer_spacing).astype(np.float64)
+    ys = (origin[1] + (positions - positions.min()) * node_spacing).astype(np.float64)
+    return dict(zip(node_ids, zip(xs.tolist(), ys.tolist())))
@@ -0,0 +1,118 @@
+import io
+import json
+import sqlite3
+from typing import List, Optional, Tuple, Type
+
+from DrawflowInfo import DrawflowInfo
+from FlowOperation import FlowOperation
+from drawflow_serialization import dump_binary, load_binary
+from drawflow_logger import log
+
+class FlowLog:
+    """
+    Persists a flow as an append-only log of FlowOperations in a SQLite database.
+
+    Every operation is a single small row, so recording an edit costs the same whatever
+    the size of the flow. Every `snapshot_interval` operations the whole flow is saved
+    in the binary format and the operations it covers are dropped, which bounds both
+    the size of the database and the replay work of `load`.
+    """
+
+    SNAPSHOT_INTERVAL = 1000
+
+    def __init__(self, path: str, *, snapshot_interval: int = SNAPSHOT_INTERVAL):
+        self.snapshot_interval = snapshot_interval
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS operations (seq INTEGER PRIMARY KEY AUTOINCREMENT, operation TEXT NOT NULL)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS snapshots (seq INTEGER PRIMARY KEY, flow BLOB NOT NULL)")
+        self._connection.commit()
+        self._pending = self._connection.execute(
+            "SELECT COUNT(*) FROM operations WHERE seq > (SELECT COALESCE(MAX(seq), 0) FROM snapshots)"
+        ).fetchone()[0]
+
+    @property
+    def snapshot_due(self) -> bool:
+        """Whether snapshot_interval operations were appended since the last snapshot."""
+        return self._pending >= self.snapshot_interval
+
+    def append(self, operation: FlowOperation, nodes_data: Optional[DrawflowInfo] = None) -> int:
+        """
+        Record operation and return its sequence number.
+
+        nodes_data is the flow once operation is applied; when given and a snapshot
+        is due, it is saved as the new snapshot.
+        """
+        log(f"FlowLog.append")
+        with self._connection:
+            seq = self._connection.execute("INSERT INTO operations (operation) VALUES (?)", (json.dumps(operation.to_dict()),)).lastrowid
+        self._pending += 1
+        if nodes_data is not None and self.snapshot_due:
+            self.snapshot(nodes_data)
+        return seq
+
+    def snapshot(self, nodes_data: DrawflowInfo, seq: Optional[int] = None):
+        """
+        Save nodes_data as covering every operation up to seq, and compact the log.
+
+        seq defaults to the latest operation recorded.
+        """
+        log(f"FlowLog.snapshot")
+        stream = io.BytesIO()
+        dump_binary(nodes_data, stream)
+        with self._connection:
+            if seq is None:
+                seq = self._connection.execute("SELECT COALESCE(MAX(seq), 0) FROM operations").fetchone()[0]
+            self._connection.execute("INSERT OR REPLACE INTO snapshots (seq, flow) VALUES (?, ?)", (seq, stream.getvalue()))
+            self._connection.execute("DELETE FROM snapshots WHERE seq < ?", (seq,))
+            self._connection.execute("DELETE FROM operations WHERE seq <= ?", (seq,))
+        self._pending = 0
+
+    def load(self, cls: Type[DrawflowInfo] = DrawflowInfo) -> Optional[DrawflowInfo]:
+        """
+        Return the latest snapshot with the later operations replayed, or None when nothing was saved.
+
+        Without a snapshot, the operations are replayed from an empty flow.
+        """
+        return self.load_versioned(cls)[0]
+
+    def load_versioned(self, cls: Type[DrawflowInfo] = DrawflowInfo) -> Tuple[Optional[DrawflowInfo], int]:
+        """Like load, also returning the sequence number of the last operation replayed."""
+        log(f"FlowLog.load")
+        with self._connection:
+            # Read the snapshot and the operations after it in one transaction, so a
+            # concurrent compaction cannot remove operations in between
+            self._connection.execute("BEGIN")
+            row = self._connection.execute("SELECT seq, flow FROM snapshots ORDER BY seq DESC LIMIT 1").fetchone()
+            if row is not None:
+                seq, flow = row
+                nodes_data = load_binary(io.BytesIO(flow), cls)
+            else:
+                seq, nodes_data = 0, cls({})
+            operations = self.operations_after(seq)
+            if row is None and not operations:
+                return (None, 0)
+            for seq, operation in operations:
+                # Concurrent sessions may have logged edits of nodes deleted earlier in the log
+                if operation.applies_to(nodes_data):
+                    nodes_data = operation.apply(nodes_data)
+        return (nodes_data, seq)
+
+    def operations_after(self, seq: int) -> List[Tuple[int, FlowOperation]]:
+        """Return the (sequence number, operation) pairs recorded after seq, in order."""
+        return [
+            (operation_seq, FlowOperation.from_dict(json.loads(operation)))
+            for operation_seq, operation in self._connection.execute("SELECT seq, operation FROM operations WHERE seq > ? ORDER BY seq", (seq,))
+        ]
+
+    def snapshot_seq(self) -> int:
+        """Return the sequence number covered by the latest snapshot, 0 when there is none."""
+        return self._connection.execute("SELECT COALESCE(MAX(seq), 0) FROM snapshots").fetchone()[0]
+
+    def data_version(self) -> int:
+        """Return a number that changes whenever another connection commits to the database."""
+        return self._connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        self._connection.close()
@@ -0,0 +1,148 @@
+import json
+from typing import Dict, Any, List, Optional, Tuple
+
+from NodeInfo import NodeInfo
+from ConnectionInfo import ConnectionInfo
+from DrawflowInfo import DrawflowInfo
+
+class FlowOperation:
+    """
+    One edit of a flow, small enough to be logged or sent on its own.
+
+    `kind` is one of KINDS and `args` holds the JSON-compatible arguments of that kind:
+
+    - "move": pos_x, pos_y
+    - "data": data
+    - "connect" / "disconnect": output, node, input
+    - "add_node": node (in the NodeInfo.to_dict format), and optionally incoming, a list of
+      [node, output, input] connections feeding the added node
+    - "remove_node": no arguments
+
+    Every operation can produce its inverse from the flow it is applied to, which is
+    what the undo history records instead of copies of the flow.
+    """
+
+    KINDS = ("move", "data", "connect", "disconnect", "add_node", "remove_node")
+
+    __slots__ = ("kind", "node_id", "args")
+
+    def __init__(self, kind: str, node_id: str, args: Dict[str, Any] = None):
+        if kind not in FlowOperation.KINDS:
+            raise ValueError(f"Unknown flow operation kind {kind!r}")
+        self.kind = kind
+        self.node_id = node_id
+        self.args = args or {}
+
+    @classmethod
+    def move(cls, node_id: str, pos_x: float, pos_y: float) -> 'FlowOperation':
+        return cls("move", node_id, {"pos_x": pos_x, "pos_y": pos_y})
+
+    @classmethod
+    def data(cls, node_id: str, data: Dict[str, Any]) -> 'FlowOperation':
+        return cls("data", node_id, {"data": data})
+
+    @classmethod
+    def connect(cls, node_id: str, output_name: str, connection: ConnectionInfo) -> 'FlowOperation':
+        return cls("connect", node_id, {"output": output_name, "node": connection.node, "input": connection.input})
+
+    @classmethod
+    def disconnect(cls, node_id: str, output_name: str, connection: ConnectionInfo) -> 'FlowOperation':
+        return cls("disconnect", node_id, {"output": output_name, "node": connection.node, "input": connection.input})
+
+    @classmethod
+    def add_node(cls, node_id: str, node: NodeInfo, incoming: Optional[List[Tuple[str, str, str]]] = None) -> 'FlowOperation':
+        args = {"node": node.to_dict()}
+        if incoming:
+            args["incoming"] = [list(source) for source in incoming]
+        return cls("add_node", node_id, args)
+
+    @classmethod
+    def remove_node(cls, node_id: str) -> 'FlowOperation':
+        return cls("remove_node", node_id)
+
+    def applies_to(self, nodes_data: DrawflowInfo) -> bool:
+        """Return whether the nodes and ports this operation refers to exist in nodes_data."""
+        if self.kind == "add_node":
+            return all(
+                emitter_node_id in nodes_data._nodes and output_name in nodes_data._nodes[emitter_node_id].outputs
+                for emitter_node_id, output_name, _ in self.args.get("incoming", ())
+            )
+        node = nodes_data._nodes.get(self.node_id)
+        if node is None:
+            return False
+        if self.kind in ("connect", "disconnect"):
+            return self.args["output"] in node.outputs and self.args["node"] in nodes_data._nodes
+        return True
+
+    def apply(self, nodes_data: DrawflowInfo) -> DrawflowInfo:
+        """Return the version of nodes_data with this operation applied."""
+        args = self.args
+        if self.kind == "move":
+            return nodes_data.with_node_position(self.node_id, args["pos_x"], args["pos_y"])
+        if self.kind == "data":
+            return nodes_data.with_node_data(self.node_id, args["data"])
+        if self.kind == "connect":
+            return nodes_data.with_connection(self.node_id, args["output"], ConnectionInfo(node=args["node"], input=args["input"]))
+        if self.kind == "disconnect":
+            return nodes_data.without_connection(self.node_id, args["output"], ConnectionInfo(node=args["node"], input=args["input"]))
+        if self.kind == "add_node":
+            nodes_data = nodes_data.with_node(self.node_id, NodeInfo.from_dict(args["node"]))
+            if "incoming" in args:
+                nodes_data = nodes_data.with_connections(
+                    (emitter_node_id, output_name, ConnectionInfo(node=self.node_id, input=input_name))
+                    for emitter_node_id, output_name, input_name in args["incoming"]
+                )
+            return nodes_data
+        return nodes_data.without_node(self.node_id)
+
+    def inverse(self, nodes_data: DrawflowInfo) -> List['FlowOperation']:
+        """Return the operations undoing this one, given the flow it is about to be applied to."""
+        args = self.args
+        node = nodes_data._nodes.get(self.node_id)
+        if self.kind == "move":
+            return [FlowOperation.move(self.node_id, node.pos_x, node.pos_y)]
+        if self.kind == "data":
+            return [FlowOperation.data(self.node_id, node.data)]
+        if self.kind in ("connect", "disconnect"):
+            connection = ConnectionInfo(node=args["node"], input=args["input"])
+            was_connected = connection in node.outputs[args["output"]].connections
+            if self.kind == "connect":
+                return [] if was_connected else [FlowOperation.disconnect(self.node_id, args["output"], connection)]
+            return [FlowOperation.connect(self.node_id, args["output"], connection)] if was_connected else []
+        if self.kind == "add_node":
+            # Replacing a node keeps the connections feeding it, so restoring the node is enough
+            return [FlowOperation.add_node(self.node_id, node)] if node is not None else [FlowOperation.remove_node(self.node_id)]
+        if node is None:
+            return []
+        incoming = [
+            (emitter_node_id, output_name, input_name)
+            for input_name, sources in nodes_data._incoming.get(self.node_id, {}).items()
+            for emitter_node_id, output_name in sources
+        ]
+        return [FlowOperation.add_node(self.node_id, node, incoming)]
+
+    def weight(self) -> int:
+        """Return a rough measure of the memory held by this operation: one plus the connections it carries."""
+        if self.kind != "add_node":
+            return 1
+        outputs = self.args["node"].get("outputs", {})
+        return 1 + len(self.args.get("incoming", ())) + sum(len(output.get("connections", ())) for output in outputs.values())
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FlowOperation):
+            return False
+        return self.kind == other.kind and self.node_id == other.node_id and self.args == other.args
+
+    def __repr__(self) -> str:
+        return f"FlowOperation(kind={self.kind}, node_id={self.node_id}, args={self.args})"
+
+    def __str__(self) -> str:
+        """Return a JSON-like string representation of the object."""
+        return json.dumps(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "node_id": self.node_id, "args": self.args}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'FlowOperation':
+        return cls(kind=data["kind"], node_id=data["node_id"], args=data.get("args", {}))
@@ -10,6 +10,8 @@ class Rect:
     
     DECIMAL_POSITIONS = 1
 
+    __slots__ = ("offset_left", "offset_top", "width", "height")
+
     def __init__(self, *, offset_left: float = 0, offset_top: float = 0, width: float = 0, height: float = 0):
         self.offset_left = Rect.rounded_number(offset_left)
         self.offset_top = Rect.rounded_number(offset_top)
@@ -24,10 +26,10 @@ class Rect:
     @classmethod
     def from_dict(cls, data: dict) -> 'Rect':
         return cls(
-            offset_left=Rect.rounded_number(data.get('offsetLeft', 0)),
-            offset_top=Rect.rounded_number(data.get('offsetTop', 0)),
-            width=Rect.rounded_number(data.get('width', 0)),
-            height=Rect.rounded_number(data.get('height', 0)),
+            offset_left=data.get('offsetLeft', 0),
+            offset_top=data.get('offsetTop', 0),
+            width=data.get('width', 0),
+            height=data.get('height', 0),
         )
     
     def to_dict(self) -> dict:
@@ -55,15 +57,16 @@ class Rect:
 
     def __str__(self) -> str:
         """Return a JSON-like string representation of the object."""
-        return json.dumps(self, default=vars)
+        return json.dumps(self.to_dict())
     
     def copy(self) -> 'Rect':
-        return Rect(
-            offset_left=self.offset_left,
-            offset_top=self.offset_top,
-            width=self.width,
-            height=self.height
-        )
+        # Values are already rounded, so skip __init__
+        copy = Rect.__new__(Rect)
+        copy.offset_left = self.offset_left
+        copy.offset_top = self.offset_top
+        copy.width = self.width
+        copy.height = self.height
+        return copy
 
 @component
 def GeometryProxy(
@@ -145,9 +148,9 @@ def GeometryProxy(
            }}
         """
     
-    log(f'GeometryProxy ➜ 🆔{proxy_id} 📐{repr(default_value)}')
+    log('GeometryProxy ➜ 🆔%s 📐%r', proxy_id, default_value)
         
     return html.button(
-        { "id": proxy_id, "value": json.dumps(default_value, default=vars), "onresize": handle_event, "hidden": "hidden" },
+        { "id": proxy_id, "value": json.dumps(default_value.to_dict()), "onresize": handle_event, "hidden": "hidden" },
         html.script(script)
     )
@@ -0,0 +1,59 @@
+from typing import Callable
+
+from reactpy import component, html, event
+from drawflow_logger import log
+
+@component
+def KeyboardShortcuts(on_shortcut: Callable[[str], None], *, proxy_id: str = "drawflow-shortcuts"):
+    """
+    A ReactPy component reporting the undo and redo key combinations pressed on the page.
+
+    Ctrl+Z (Cmd+Z on macOS) reports "undo"; Ctrl+Y and Ctrl+Shift+Z report "redo". Keys
+    typed in text fields are left to the browser.
+
+    Args:
+        on_shortcut (Callable[[str], None]): Called with "undo" or "redo".
+        proxy_id (str): A unique identifier for the proxy element.
+    """
+
+    @event
+    def handle_event(event: dict):
+        """
+        Handle the shortcut event and report the action.
+
+        Args:
+            event (dict): The event dictionary containing event data.
+        """
+        current_target = event.get('currentTarget')
+        if current_target:
+            action = current_target.get("value", "")
+            if action in ("undo", "redo"):
+                on_shortcut(action)
+
+    script = f"""
+        window.drawflowShortcuts = window.drawflowShortcuts || {{}};
+        if (!window.drawflowShortcuts['{proxy_id}']) {{
+            window.drawflowShortcuts['{proxy_id}'] = true;
+            document.addEventListener('keydown', function (event) {{
+                var element = document.getElementById('{proxy_id}');
+                var target = event.target;
+                if (!element || !(event.ctrlKey || event.metaKey) || target.isContentEditable || target.closest('input, textarea, select')) {{
+                    return;
+                }}
+                var key = event.key.toLowerCase();
+                var action = key === 'z' ? (event.shiftKey ? 'redo' : 'undo') : (key === 'y' ? 'redo' : null);
+                if (action) {{
+                    event.preventDefault();
+                    element.value = action;
+                    element.dispatchEvent(new Event('resize'));
+                }}
+            }});
+        }}
+    """
+
+    log('KeyboardShortcuts ➜ 🆔%s', proxy_id)
+
+    return html.button(
+        { "id": proxy_id, "value": "", "onresize": handle_event, "hidden": "hidden" },
+        html.script(script)
+    )
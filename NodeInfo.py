@@ -4,6 +4,8 @@ from typing import List, Dict, Any
 from OutputInfo import OutputInfo
 
 class NodeInfo:
+    __slots__ = ("name", "data", "custom_class", "component", "inputs", "outputs", "pos_x", "pos_y")
+
     def __init__(self, name: str, data: Dict[str, Any], custom_class: str, component: str, inputs: List[str], outputs: Dict[str, OutputInfo], pos_x: float, pos_y: float):
         self.name = name
         self.data = data
@@ -33,7 +35,7 @@ class NodeInfo:
 
     def __str__(self) -> str:
         """Return a JSON-like string representation of the object."""
-        return json.dumps(self, default=vars)
+        return json.dumps(self.to_dict())
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -61,6 +63,30 @@ class NodeInfo:
             pos_y=data["pos_y"]
         )
 
+    def _replace(self, **changes: Any) -> 'NodeInfo':
+        """Return a shallow copy with the given fields replaced; untouched fields are shared."""
+        copy = NodeInfo.__new__(NodeInfo)
+        copy.name = changes.get("name", self.name)
+        copy.data = changes.get("data", self.data)
+        copy.custom_class = changes.get("custom_class", self.custom_class)
+        copy.component = changes.get("component", self.component)
+        copy.inputs = changes.get("inputs", self.inputs)
+        copy.outputs = changes.get("outputs", self.outputs)
+        copy.pos_x = changes.get("pos_x", self.pos_x)
+        copy.pos_y = changes.get("pos_y", self.pos_y)
+        return copy
+
+    def with_position(self, pos_x: float, pos_y: float) -> 'NodeInfo':
+        return self._replace(pos_x=pos_x, pos_y=pos_y)
+
+    def with_data(self, data: Dict[str, Any]) -> 'NodeInfo':
+        return self._replace(data=data)
+
+    def with_output(self, output_name: str, output: OutputInfo) -> 'NodeInfo':
+        outputs = dict(self.outputs)
+        outputs[output_name] = output
+        return self._replace(outputs=outputs)
+
     def copy(self) -> 'NodeInfo':
         return NodeInfo(
             name=self.name,
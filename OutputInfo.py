@@ -1,23 +1,30 @@
 import json
-from typing import List, Dict, Any
+from typing import Iterable, Dict, Any, KeysView
 
 from ConnectionInfo import ConnectionInfo
 
 class OutputInfo:
-    def __init__(self, connections: List[ConnectionInfo] = None):
-        self.connections = connections or []
+    __slots__ = ("_connections",)
+
+    def __init__(self, connections: Iterable[ConnectionInfo] = None):
+        # Insertion-ordered set: O(1) membership and removal, stable serialization order
+        self._connections: Dict[ConnectionInfo, None] = dict.fromkeys(connections or ())
+
+    @property
+    def connections(self) -> KeysView[ConnectionInfo]:
+        return self._connections.keys()
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, OutputInfo):
             return False
-        return self.connections == other.connections
+        return self._connections == other._connections
 
     def __repr__(self) -> str:
-        return f"Output(connections={self.connections})"
+        return f"Output(connections={list(self._connections)})"
 
     def __str__(self) -> str:
         """Return a JSON-like string representation of the object."""
-        return json.dumps(self, default=vars)
+        return json.dumps(self.to_dict())
 
     def to_dict(self) -> Dict[str, Any]:
         return {"connections": [conn.to_dict() for conn in self.connections]}
@@ -27,5 +34,23 @@ class OutputInfo:
         connections = [ConnectionInfo.from_dict(conn) for conn in data.get("connections", [])]
         return cls(connections=connections)
 
+    def with_connection(self, connection: ConnectionInfo) -> 'OutputInfo':
+        """Return a new output with the connection appended; existing connections are shared."""
+        connections = dict(self._connections)
+        connections[connection] = None
+        return OutputInfo._from_connections(connections)
+
+    def without_connection(self, connection: ConnectionInfo) -> 'OutputInfo':
+        """Return a new output without the connection; remaining connections are shared."""
+        connections = dict(self._connections)
+        connections.pop(connection, None)
+        return OutputInfo._from_connections(connections)
+
+    @classmethod
+    def _from_connections(cls, connections: Dict[ConnectionInfo, None]) -> 'OutputInfo':
+        output = cls.__new__(cls)
+        output._connections = connections
+        return output
+
     def copy(self) -> 'OutputInfo':
-        return OutputInfo(connections=[conn.copy() for conn in self.connections])
\ No newline at end of file
+        return OutputInfo._from_connections({conn.copy(): None for conn in self._connections})
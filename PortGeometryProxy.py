@@ -0,0 +1,71 @@
+import json
+from typing import Callable, List, Tuple
+from uuid import uuid4
+
+from reactpy import component, html, event
+
+from GeometryProxy import Rect
+from drawflow_logger import log, span
+
+@component
+def PortGeometryProxy(
+    set_values: Callable[[List[Tuple[str, str, Rect]]], None],
+    *,
+    proxy_id: str = str(uuid4()),
+):
+    """
+    A ReactPy component measuring every port of its parent node in one pass.
+
+    The ports are the `.input` and `.output` elements of the parent, named by their
+    `data-port` attribute. All of them are reported in a single event.
+
+    Args:
+        set_values (Callable[[List[Tuple[str, str, Rect]]], None]): Called with (name, type, Rect) per port.
+        proxy_id (str): A unique identifier for the proxy. Defaults to a random UUID.
+    """
+
+    @event
+    def handle_event(event: dict):
+        """
+        Handle the resize event and report the measured ports.
+
+        Args:
+            event (dict): The event dictionary containing event data.
+        """
+        with span("PortGeometryProxy.handle_event"):
+            current_target = event.get('currentTarget')
+            if current_target:
+                ports_data = current_target.get("value", "[]")
+                if ports_data:
+                    set_values([
+                        (port["name"], port["type"], Rect.from_dict(port))
+                        for port in json.loads(ports_data)
+                    ])
+
+    script = f"""
+        var element = document.getElementById('{proxy_id}');
+        if (element && element.parentElement) {{
+            var ports = element.parentElement.querySelectorAll(':scope > .inputs > .input, :scope > .outputs > .output');
+            var measured = [];
+            ports.forEach(function (port) {{
+                const rect = port.getBoundingClientRect();
+                measured.push({{
+                    name: port.dataset.port,
+                    type: port.classList.contains('input') ? 'input' : 'output',
+                    offsetLeft: port.offsetLeft,
+                    offsetTop: port.offsetTop,
+                    width: rect.width,
+                    height: rect.height
+                }});
+            }});
+            element.value = JSON.stringify(measured);
+            element.dispatchEvent(new Event('resize'));
+        }}
+    """
+
+    log('PortGeometryProxy ➜ 🆔%s', proxy_id)
+
+    return html.button(
+        { "id": proxy_id, "value": "[]", "onresize": handle_event, "hidden": "hidden" },
+        html.script(script)
+    )
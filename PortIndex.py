@@ -0,0 +1,61 @@
+from typing import Dict, Tuple, List, Hashable
+
+class PortIndex:
+    """A uniform grid over rectangles in absolute canvas coordinates, for point and area lookups."""
+
+    CELL_SIZE = 64
+
+    def __init__(self, *, cell_size: float = CELL_SIZE):
+        self._cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], Dict[Hashable, None]] = {}
+        self._bounds: Dict[Hashable, Tuple[float, float, float, float]] = {}
+
+    def _cell_range(self, left: float, top: float, right: float, bottom: float):
+        size = self._cell_size
+        for cell_x in range(int(left // size), int(right // size) + 1):
+            for cell_y in range(int(top // size), int(bottom // size) + 1):
+                yield (cell_x, cell_y)
+
+    def insert(self, key: Hashable, left: float, top: float, right: float, bottom: float):
+        """Add key with the given bounds, replacing any previous bounds."""
+        if self._bounds.get(key) == (left, top, right, bottom):
+            return
+        self.remove(key)
+        self._bounds[key] = (left, top, right, bottom)
+        for cell in self._cell_range(left, top, right, bottom):
+            self._cells.setdefault(cell, {})[key] = None
+
+    def remove(self, key: Hashable):
+        bounds = self._bounds.pop(key, None)
+        if bounds is None:
+            return
+        for cell in self._cell_range(*bounds):
+            keys = self._cells.get(cell)
+            if keys is not None:
+                keys.pop(key, None)
+                if not keys:
+                    del self._cells[cell]
+
+    def query(self, x: float, y: float) -> List[Hashable]:
+        """Return the keys whose bounds contain the point, in insertion order."""
+        size = self._cell_size
+        matches = []
+        for key in self._cells.get((int(x // size), int(y // size)), ()):
+            left, top, right, bottom = self._bounds[key]
+            if left <= x <= right and top <= y <= bottom:
+                matches.append(key)
+        return matches
+
+    def query_area(self, left: float, top: float, right: float, bottom: float) -> List[Hashable]:
+        """Return the keys whose bounds intersect the area, each once."""
+        matches: Dict[Hashable, None] = {}
+        for cell in self._cell_range(left, top, right, bottom):
+            for key in self._cells.get(cell, ()):
+                if key not in matches:
+                    key_left, key_top, key_right, key_bottom = self._bounds[key]
+                    if key_right >= left and key_left <= right and key_bottom >= top and key_top <= bottom:
+                        matches[key] = None
+        return list(matches)
+
+    def __len__(self) -> int:
+        return len(self._bounds)
@@ -1,12 +1,47 @@
 from typing import Dict, Tuple, List, Optional
 
+from DrawflowInfo import DrawflowInfo
+from NodeInfo import NodeInfo
+from PortIndex import PortIndex
+
 class Rectangles:
+    """
+    The measured ports of a canvas, indexed by absolute position for hit tests, and
+    the boxes of its nodes, indexed for culling.
+
+    A canvas keeps a single instance and updates it in place, as ports are measured
+    and nodes move, so each change only touches the ports of the nodes involved.
+    """
+
+    # Assumed size of a node until its ports are measured
+    NODE_MIN_WIDTH = 160
+    NODE_MIN_HEIGHT = 80
+    # Nodes are larger than ports and looked up by area, so their grid is coarser
+    NODE_CELL_SIZE = 512
+
     def __init__(self):
         self._rects: Dict[Tuple[str, str, str], Tuple[float, float, float, float]] = {}
+        # Absolute placement of the ports, kept in sync with node positions
+        self._origins: Dict[str, Tuple[float, float]] = {}
+        self._keys_by_node: Dict[str, Dict[Tuple[str, str, str], None]] = {}
+        self._index = PortIndex()
+        self._node_index = PortIndex(cell_size=Rectangles.NODE_CELL_SIZE)
+        # Placement mark of the version of the flow the origins were last synced with
+        self._synced: Optional[Tuple[List[str], int]] = None
+
+    def _index_rectangle(self, key: Tuple[str, str, str]):
+        rect = self._rects[key]
+        origin_x, origin_y = self._origins.get(key[0], (0, 0))
+        left = origin_x + rect.offset_left
+        top = origin_y + rect.offset_top
+        self._index.insert(key, left, top, left + rect.width, top + rect.height)
 
     def add_rectangle(self, node_id: str, name: str, type: str, rect: Tuple[float, float, float, float]):
         key: Tuple[int, str] = (node_id, name, type)
         self._rects[key] = rect
+        self._keys_by_node.setdefault(node_id, {})[key] = None
+        self._index_rectangle(key)
+        self._index_node(node_id)
 
     def get_rectangle(self, node_id: str, name: str, type: str) -> Optional[Tuple[float, float, float, float]]:
         key: Tuple[int, str] = (node_id, name, type)
@@ -16,11 +51,85 @@ class Rectangles:
         key: Tuple[int, str] = (node_id, name, type)
         if key in self._rects:
             del self._rects[key]
+            self._index.remove(key)
+            keys = self._keys_by_node.get(node_id, {})
+            keys.pop(key, None)
+            if not keys:
+                self._keys_by_node.pop(node_id, None)
+            self._index_node(node_id)
+
+    def delete_node(self, node_id: str):
+        for key in list(self._keys_by_node.get(node_id, ())):
+            self.delete_rectangle(*key)
+        self._origins.pop(node_id, None)
+        self._node_index.remove(node_id)
+
+    def move_node(self, node_id: str, pos_x: float, pos_y: float):
+        """Record the canvas position of node_id and re-index its ports if it changed."""
+        if self._origins.get(node_id) == (pos_x, pos_y):
+            return
+        self._origins[node_id] = (pos_x, pos_y)
+        for key in self._keys_by_node.get(node_id, ()):
+            self._index_rectangle(key)
+        self._index_node(node_id)
+
+    def node_bounds(self, node_id: str, pos_x: float, pos_y: float) -> Tuple[float, float, float, float]:
+        """Return the box of node_id placed at (pos_x, pos_y), at least NODE_MIN_WIDTH by NODE_MIN_HEIGHT."""
+        width, height = self.get_node_extent(node_id)
+        return (pos_x, pos_y, pos_x + max(width, Rectangles.NODE_MIN_WIDTH), pos_y + max(height, Rectangles.NODE_MIN_HEIGHT))
+
+    def _index_node(self, node_id: str):
+        origin = self._origins.get(node_id)
+        if origin is not None:
+            self._node_index.insert(node_id, *self.node_bounds(node_id, *origin))
+
+    def follow(self, nodes_data: DrawflowInfo):
+        """
+        Re-index the ports of the nodes that moved or were removed in nodes_data, e.g. by another session.
+
+        Only the nodes placed since the version followed last are visited when nodes_data
+        derives from it (see DrawflowInfo.placed_since), every node otherwise.
+        """
+        placed = nodes_data.placed_since(self._synced)
+        self._synced = nodes_data.placement_mark()
+        if placed is None:
+            placed = list(dict.fromkeys([*self._origins, *nodes_data._nodes]))
+        for node_id in placed:
+            node = nodes_data._nodes.get(node_id)
+            if node is None:
+                self.delete_node(node_id)
+            else:
+                self.move_node(node_id, node.pos_x, node.pos_y)
+
+    def get_node_extent(self, node_id: str) -> Tuple[float, float]:
+        """Return the width and height spanned by the measured ports of node_id."""
+        width = height = 0
+        for key in self._keys_by_node.get(node_id, ()):
+            rect = self._rects[key]
+            width = max(width, rect.offset_left + rect.width)
+            height = max(height, rect.offset_top + rect.height)
+        return (width, height)
+
+    def find_rectangles(self, x: float, y: float) -> List[Tuple[str, str, str]]:
+        """Return the keys of the ports containing the absolute canvas point."""
+        return self._index.query(x, y)
+
+    def find_nodes(self, nodes_data: DrawflowInfo, left: float, top: float, right: float, bottom: float) -> List[str]:
+        """
+        Return the nodes of nodes_data whose box intersects the area, sorted by id.
+
+        The nodes placed since the version followed last are checked where nodes_data
+        places them and the others are looked up in the node grid, so nodes_data needs
+        not be followed first. A flow that does not derive from that version is scanned.
+        """
+        def intersects(node_id: str, node: NodeInfo) -> bool:
+            node_left, node_top, node_right, node_bottom = self.node_bounds(node_id, node.pos_x, node.pos_y)
+            return node_right >= left and node_left <= right and node_bottom >= top and node_top <= bottom
 
-    def __del__(self):
-        self._rects.clear()
-        
-    def copy(self) -> 'Rectangles':
-        copy = Rectangles()
-        copy._rects = self._rects.copy()
-        return copy
+        placed = nodes_data.placed_since(self._synced)
+        if placed is None:
+            return sorted(node_id for node_id, node in nodes_data._nodes.items() if intersects(node_id, node))
+        pending = set(placed)
+        found = [node_id for node_id in self._node_index.query_area(left, top, right, bottom) if node_id not in pending]
+        found += [node_id for node_id in pending if node_id in nodes_data._nodes and intersects(node_id, nodes_data._nodes[node_id])]
+        return sorted(found)
@@ -0,0 +1,67 @@
+from typing import Any, Callable, Dict, Tuple
+
+from reactpy import use_state, use_effect
+
+from DrawflowInfo import DrawflowInfo
+from drawflow_logger import log
+
+class SharedFlow:
+    """
+    A flow edited by several sessions at once.
+
+    The store holds the current DrawflowInfo version and hands the same object to every
+    subscribed session after each edit. Versions share every untouched node, so an
+    edit costs the sessions one new reference each, and memory holds a single graph
+    whatever the number of sessions. Selection and drag state stay in each session's
+    Drawflow.
+    """
+
+    def __init__(self, nodes_data: DrawflowInfo):
+        self._nodes_data = nodes_data
+        self._subscribers: Dict[Callable[[DrawflowInfo], None], None] = {}
+
+    @property
+    def nodes_data(self) -> DrawflowInfo:
+        return self._nodes_data
+
+    def set_nodes_data(self, new: Any):
+        """Replace the flow, like a state setter: new is a DrawflowInfo or a function of the current one."""
+        log(f"SharedFlow.set_nodes_data")
+        nodes_data = new(self._nodes_data) if callable(new) else new
+        if nodes_data is self._nodes_data:
+            return
+        self._nodes_data = nodes_data
+        for callback in list(self._subscribers):
+            callback(nodes_data)
+
+    def subscribe(self, callback: Callable[[DrawflowInfo], None]) -> Callable[[], None]:
+        """Call callback with every new version of the flow, until the returned function is called."""
+        self._subscribers[callback] = None
+
+        def unsubscribe():
+            self._subscribers.pop(callback, None)
+
+        return unsubscribe
+
+    def __len__(self) -> int:
+        """Return the number of subscribed sessions."""
+        return len(self._subscribers)
+
+def use_shared_flow(shared_flow: SharedFlow) -> Tuple[DrawflowInfo, Callable[[Any], None]]:
+    """
+    Subscribe the current component to shared_flow.
+
+    Returns the current version, re-rendering whenever it changes, and the setter to
+    pass to Drawflow so that edits reach every session.
+    """
+    nodes_data, set_nodes_data = use_state(shared_flow.nodes_data)
+
+    # Subscribed anew on every render: ReactPy drops the unmount clean-up of an effect
+    # that does not run again, which would leave closed sessions subscribed
+    @use_effect(dependencies=None)
+    def subscribe():
+        # Catch up with edits made between the first render and the subscription
+        set_nodes_data(shared_flow.nodes_data)
+        return shared_flow.subscribe(set_nodes_data)
+
+    return nodes_data, shared_flow.set_nodes_data
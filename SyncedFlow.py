@@ -0,0 +1,98 @@
+import asyncio
+from typing import Dict, Optional, Type
+
+from DrawflowInfo import DrawflowInfo
+from FlowLog import FlowLog
+from FlowOperation import FlowOperation
+from SharedFlow import SharedFlow
+from drawflow_logger import log
+
+class SyncedFlow(SharedFlow):
+    """
+    A SharedFlow kept consistent across processes through a FlowLog.
+
+    Each process (e.g. each uvicorn worker) opens the same SQLite log. Edits of local
+    sessions are appended to it through `append`, which is meant to be the Drawflow
+    `on_operation` callback. Edits of other processes are picked up by polling the
+    database, which only reads the log when another connection has committed.
+
+    The log order is authoritative: besides the version shown to the sessions, the
+    store keeps the version obtained by replaying the log. When concurrent edits from
+    another process were logged before a local one, the sessions are reset to it, so
+    every process converges to the same flow.
+    """
+
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, flow_log: FlowLog, *, poll_interval: float = POLL_INTERVAL, cls: Type[DrawflowInfo] = DrawflowInfo):
+        nodes_data, seq = flow_log.load_versioned(cls)
+        if nodes_data is None:
+            raise ValueError("The flow log is empty, save a snapshot with FlowLog.snapshot first")
+        super().__init__(nodes_data)
+        self.flow_log = flow_log
+        self.poll_interval = poll_interval
+        self._cls = cls
+        self._confirmed = nodes_data  # The log replayed up to _seq
+        self._seq = seq
+        self._own: Dict[int, None] = {}  # Local operations logged after _seq
+        self._data_version = flow_log.data_version()
+        self._task: Optional[asyncio.Task] = None
+
+    def append(self, operation: FlowOperation, nodes_data: Optional[DrawflowInfo] = None):
+        """Log an operation already applied to the local sessions."""
+        seq = self.flow_log.append(operation)
+        if seq == self._seq + 1 and not self._own:
+            # Nothing was logged in between, so the local order is the log order
+            self._confirm(operation)
+            self._seq = seq
+        else:
+            self._own[seq] = None
+        if self.flow_log.snapshot_due and not self._own:
+            self.flow_log.snapshot(self._confirmed, self._seq)
+
+    def _confirm(self, operation: FlowOperation):
+        if operation.applies_to(self._confirmed):
+            self._confirmed = operation.apply(self._confirmed)
+
+    def sync(self):
+        """Apply the operations logged by other processes since the last sync."""
+        log(f"SyncedFlow.sync")
+        self._data_version = self.flow_log.data_version()
+        if self.flow_log.snapshot_seq() > self._seq:
+            # Another process compacted operations we never saw
+            self._confirmed, self._seq = self.flow_log.load_versioned(self._cls)
+            self._own.clear()
+            self.set_nodes_data(self._confirmed)
+            return
+
+        nodes_data = self._nodes_data
+        is_reordered = False
+        seen_other = False
+        for seq, operation in self.flow_log.operations_after(self._seq):
+            self._confirm(operation)
+            self._seq = seq
+            if seq in self._own:
+                del self._own[seq]
+                # A local edit was applied before this other one, but the log orders it after
+                is_reordered = is_reordered or seen_other
+            else:
+                seen_other = True
+                if operation.applies_to(nodes_data):
+                    nodes_data = operation.apply(nodes_data)
+        self.set_nodes_data(self._confirmed if is_reordered else nodes_data)
+
+    async def run(self):
+        """Poll the log for changes made by other processes, forever."""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                if self.flow_log.data_version() != self._data_version:
+                    self.sync()
+            except Exception as error:
+                # A failed poll (e.g. a locked database) is retried on the next one
+                log("SyncedFlow.run ➜ %s", error)
+
+    def start(self):
+        """Start polling in the running event loop, unless already started."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
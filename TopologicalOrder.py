@@ -0,0 +1,120 @@
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+class TopologicalOrder:
+    """
+    A topological order of an acyclic flow, as a rank per node.
+
+    Every connection goes from a node to a node of higher rank. Ranks are unique
+    but not contiguous, so that adding a node or a connection that already agrees
+    with the order costs no renumbering. A connection that does not is handled with
+    the Pearce-Kelly online algorithm, which only visits and renumbers the nodes
+    ranked between its two ends.
+
+    Like the flow versions holding them, orders are treated as immutable: updates
+    return a new order and leave this one untouched.
+    """
+
+    __slots__ = ("ranks", "next_rank")
+
+    def __init__(self, ranks: Dict[str, int], next_rank: int):
+        self.ranks = ranks
+        self.next_rank = next_rank
+
+    @classmethod
+    def build(cls, node_ids: Iterable[str], successors: Callable[[str], Iterable[str]]) -> Optional['TopologicalOrder']:
+        """Return an order of the nodes, or None when their connections form a cycle."""
+        node_ids = list(node_ids)
+        waiting = dict.fromkeys(node_ids, 0)
+        for node_id in node_ids:
+            for receiver_node_id in successors(node_id):
+                if receiver_node_id in waiting:
+                    waiting[receiver_node_id] += 1
+        ready = [node_id for node_id in reversed(node_ids) if waiting[node_id] == 0]
+        ranks: Dict[str, int] = {}
+        while ready:
+            node_id = ready.pop()
+            ranks[node_id] = len(ranks)
+            for receiver_node_id in successors(node_id):
+                if receiver_node_id in waiting:
+                    waiting[receiver_node_id] -= 1
+                    if waiting[receiver_node_id] == 0:
+                        ready.append(receiver_node_id)
+        if len(ranks) < len(node_ids):
+            return None
+        return cls(ranks, len(ranks))
+
+    def sorted(self) -> List[str]:
+        """Return the node ids in order."""
+        return sorted(self.ranks, key=self.ranks.__getitem__)
+
+    def with_node(self, node_id: str) -> 'TopologicalOrder':
+        """Return the order with node_id, not connected yet, ranked last."""
+        if node_id in self.ranks:
+            return self
+        ranks = dict(self.ranks)
+        ranks[node_id] = self.next_rank
+        return TopologicalOrder(ranks, self.next_rank + 1)
+
+    def without_node(self, node_id: str) -> 'TopologicalOrder':
+        if node_id not in self.ranks:
+            return self
+        ranks = dict(self.ranks)
+        del ranks[node_id]
+        return TopologicalOrder(ranks, self.next_rank)
+
+    def _visit(self, start: str, neighbors: Callable[[str], Iterable[str]], is_inside: Callable[[int], bool]) -> Set[str]:
+        """Return the nodes reachable from start through nodes whose rank is_inside."""
+        ranks = self.ranks
+        visited = {start}
+        stack = [start]
+        while stack:
+            for neighbor in neighbors(stack.pop()):
+                rank = ranks.get(neighbor)
+                if rank is not None and neighbor not in visited and is_inside(rank):
+                    visited.add(neighbor)
+                    stack.append(neighbor)
+        return visited
+
+    def reaches(self, start: str, end: str, successors: Callable[[str], Iterable[str]]) -> bool:
+        """Return whether a path leads from start to end, only visiting nodes ranked before end."""
+        end_rank = self.ranks[end]
+        if self.ranks[start] > end_rank:
+            return False
+        return end in self._visit(start, successors, lambda rank: rank <= end_rank)
+
+    def with_edges(self, edges: Iterable[Tuple[str, str]], successors: Callable[[str], Iterable[str]], predecessors: Callable[[str], Iterable[str]]) -> Optional['TopologicalOrder']:
+        """
+        Return the order once the (emitter, receiver) edges are connected, or None when
+        they close a cycle.
+
+        successors and predecessors must describe the flow with the edges connected.
+        """
+        order = self
+        copied = False
+        for emitter_node_id, receiver_node_id in edges:
+            ranks = order.ranks
+            if emitter_node_id not in ranks or receiver_node_id not in ranks:
+                continue
+            upper, lower = ranks[emitter_node_id], ranks[receiver_node_id]
+            if upper < lower:
+                continue
+            if upper == lower:
+                return None  # A node connected to itself
+
+            # Nodes after the receiver up to the emitter, reachable from the receiver
+            forward = order._visit(receiver_node_id, successors, lambda rank: rank <= upper)
+            if emitter_node_id in forward:
+                return None
+            # Nodes after the receiver and before the emitter, reaching the emitter
+            backward = order._visit(emitter_node_id, predecessors, lambda rank: rank > lower)
+
+            # Rank the nodes reaching the emitter before the nodes reached from the
+            # receiver, reusing their ranks and keeping the relative order of each group
+            if not copied:
+                order = TopologicalOrder(dict(ranks), order.next_rank)
+                copied = True
+            ranks = order.ranks
+            moved = sorted(backward, key=ranks.__getitem__) + sorted(forward, key=ranks.__getitem__)
+            for node_id, rank in zip(moved, sorted(ranks[node_id] for node_id in moved)):
+                ranks[node_id] = rank
+        return order
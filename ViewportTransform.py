@@ -0,0 +1,21 @@
+from reactpy import component, html
+
+from CanvasState import CanvasState, use_canvas_state
+from drawflow_logger import log
+
+@component
+def ViewportTransform(canvas: CanvasState, *, canvas_id: str = "drawflow"):
+    """
+    A ReactPy component translating the canvas by the viewport of canvas.
+
+    The translation is a style rule rather than an attribute of the canvas element, so
+    panning re-renders this rule alone instead of the canvas and every node in it.
+
+    Args:
+        canvas (CanvasState): The gesture state holding the viewport.
+        canvas_id (str): The ID of the canvas element. Defaults to "drawflow".
+    """
+    use_canvas_state(canvas, ["viewport"])
+    viewport_x, viewport_y = canvas.viewport
+    log('ViewportTransform ➜ 🖼 %s, %s', viewport_x, viewport_y)
+    return html.style(f"#{canvas_id} {{ transform: translate({viewport_x}px, {viewport_y}px); }}")
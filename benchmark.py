@@ -0,0 +1,550 @@
+"""
+Micro-benchmarks of Drawflow rendering and event handling on synthetic flows.
+
+Each scenario mounts a Drawflow in an in-process ReactPy layout, drives a scripted
+mouse gesture through its event handlers and measures, for every event, the time
+spent in the handler and in the re-renders it causes, the memory allocated
+meanwhile, the size of the resulting vdom and the bytes of the layout updates sent
+to the browser. Results are written as JSON so runs can be compared, and wire-size
+budgets can be enforced per scenario. The layout scenarios time FlowLayout on the
+same flows instead: a whole-flow layout and the relayout of a selection. The model
+scenarios time loading a flow, with the memory the loaded graph retains, and copying
+it and the small model objects.
+
+    python benchmark.py --nodes 100 1000 --fan-out 2 --output before.json
+    python benchmark.py --nodes 100 1000 --fan-out 2 --output after.json --compare before.json
+    python benchmark.py --nodes 1000 --scenarios drag_node --budget drag_node:1000=16
+    python benchmark.py --nodes 10000 --scenarios layout relayout
+    python benchmark.py --nodes 10000 --scenarios load copy
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type
+
+import reactpy
+from reactpy import component, html, use_state
+from reactpy.core.layout import Layout
+
+from DragInfo import DragInfo
+from DrawflowInfo import DrawflowInfo
+from Drawflow import Drawflow
+from FlowLayout import layered_layout
+from GeometryProxy import Rect
+from your_component_file import component_map
+
+# Pixels between the grid cells of synthetic nodes
+GRID_STEP_X = 350
+GRID_STEP_Y = 200
+# Port geometry reported for synthetic nodes, relative to the node
+INPUT_RECT = {"offsetLeft": 0, "offsetTop": 20, "width": 20, "height": 20}
+OUTPUT_RECT = {"offsetLeft": 280, "offsetTop": 20, "width": 20, "height": 20}
+# Seconds without a new render after which an event is considered handled
+SETTLE_TIMEOUT = 0.01
+
+SCENARIOS = ("drag_node", "pan_canvas", "drag_connection")
+LAYOUT_SCENARIOS = ("layout", "relayout")
+# Nodes re-laid out by the relayout scenario, and runs of each layout scenario
+RELAYOUT_NODES = 100
+LAYOUT_RUNS = 5
+MODEL_SCENARIOS = ("load", "copy")
+# Runs of each model scenario, and Rects and DragInfos copied per node by the copy scenario
+MODEL_RUNS = 5
+COPIES_PER_NODE = 2
+# Kilobytes any pointer move may send, checked whenever the scenario runs on that many
+# nodes (the tree sends about 7, 0.2 and 0.4 KB). A move only re-renders what it moves,
+# so the budgets hold at any node count; the press and release of a gesture select a
+# node or edit the flow, which re-renders the canvas, and are not budgeted
+DEFAULT_BUDGETS = (
+    ("drag_node", 100, 16),
+    ("pan_canvas", 100, 1),
+    ("drag_connection", 100, 2),
+)
+BUDGETED_EVENTS = ("onMouseMove",)
+
+def synthetic_flow(node_count: int, fan_out: int, *, columns: int = 0, seed: int = 0) -> Dict[str, Any]:
+    """
+    Return a flow of node_count nodes in the `DrawflowInfo.to_dict` format.
+
+    Nodes are laid out on a grid of `columns` columns (by default, a square one) and
+    cycle through the components of the example. The output of every node connects to
+    up to fan_out nodes picked at random among the following ones, so the flow is
+    acyclic.
+
+    Args:
+        node_count (int): The number of nodes.
+        fan_out (int): The number of connections leaving each node.
+        columns (int): The number of grid columns, 0 for a square grid.
+        seed (int): The seed of the random connections.
+    """
+    generator = random.Random(seed)
+    columns = columns or max(1, round(node_count ** 0.5))
+    components = sorted(component_map)
+    flow = {}
+    for index in range(node_count):
+        later = range(index + 1, node_count)
+        targets = generator.sample(later, min(fan_out, len(later)))
+        flow[str(index + 1)] = {
+            "name": f"node {index + 1}",
+            "data": {},
+            "class": "synthetic",
+            "component": components[index % len(components)],
+            "inputs": ["input_1"],
+            "outputs": {
+                "output_1": {"connections": [{"node": str(target + 1), "input": "input_1"} for target in sorted(targets)]},
+            },
+            "pos_x": 50 + (index % columns) * GRID_STEP_X,
+            "pos_y": 50 + (index // columns) * GRID_STEP_Y,
+        }
+    return flow
+
+def iter_elements(model: Any) -> Iterator[Dict[str, Any]]:
+    """Yield every element of a vdom model, depth first."""
+    stack = [model]
+    while stack:
+        element = stack.pop()
+        if isinstance(element, dict):
+            yield element
+            stack.extend(reversed(element.get("children", ())))
+
+def count_elements(model: Any) -> int:
+    return sum(1 for _ in iter_elements(model))
+
+def find_element(model: Any, predicate: Callable[[Dict[str, Any]], bool]) -> Dict[str, Any]:
+    for element in iter_elements(model):
+        if predicate(element):
+            return element
+    raise LookupError("No element matches the benchmark script")
+
+def wire_size(update: Dict[str, Any]) -> int:
+    """Return the bytes of update once serialized the way ReactPy sends it over the websocket."""
+    return len(json.dumps(update).encode())
+
+def has_id(element_id: str) -> Callable[[Dict[str, Any]], bool]:
+    return lambda element: element.get("attributes", {}).get("id") == element_id
+
+def has_class(class_name: str) -> Callable[[Dict[str, Any]], bool]:
+    return lambda element: class_name in element.get("attributes", {}).get("class_name", "").split()
+
+class BenchmarkSession:
+    """
+    A Drawflow mounted in an in-process ReactPy layout, with the client-side model
+    kept up to date from the layout updates.
+    """
+
+    def __init__(self, flow: Dict[str, Any], *, cls: Type[DrawflowInfo] = DrawflowInfo, **drawflow_options: Any):
+        session = self
+
+        @component
+        def App():
+            nodes_data, set_nodes_data = use_state(lambda: cls.from_dict(flow))
+            session.nodes_data = nodes_data
+            return html.div(Drawflow(nodes_data, set_nodes_data, component_map, **drawflow_options))
+
+        self.layout = Layout(App())
+        self.model: Any = None
+        self.nodes_data: Optional[DrawflowInfo] = None
+
+    async def __aenter__(self) -> 'BenchmarkSession':
+        await self.layout.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info: Any):
+        await self.layout.__aexit__(*exc_info)
+
+    async def settle(self) -> Tuple[float, List[Dict[str, Any]]]:
+        """Render until the layout is idle; return the time spent rendering and the updates."""
+        seconds = 0.0
+        updates = []
+        while True:
+            start = time.perf_counter()
+            try:
+                update = await asyncio.wait_for(self.layout.render(), SETTLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                break
+            seconds += time.perf_counter() - start
+            updates.append(update)
+        for update in updates:
+            self._apply_update(update)
+        return seconds, updates
+
+    def _apply_update(self, update: Dict[str, Any]):
+        parts = [part for part in update["path"].split("/") if part]
+        if not parts:
+            self.model = update["model"]
+            return
+        parent = self.model
+        for part in parts[:-1]:
+            parent = parent[int(part)] if isinstance(parent, list) else parent[part]
+        if isinstance(parent, list):
+            parent[int(parts[-1])] = update["model"]
+        else:
+            parent[parts[-1]] = update["model"]
+
+    async def fire(self, predicate: Callable[[Dict[str, Any]], bool], event_name: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Send an event to the first element matching predicate and measure its handling."""
+        target = find_element(self.model, predicate)["eventHandlers"][event_name]["target"]
+        start = time.perf_counter()
+        await self.layout.deliver({"type": "layout-event", "target": target, "data": [data]})
+        handler_seconds = time.perf_counter() - start
+        render_seconds, updates = await self.settle()
+        return {
+            "event": event_name,
+            "handler_seconds": handler_seconds,
+            "render_seconds": render_seconds,
+            "seconds": handler_seconds + render_seconds,
+            "renders": len(updates),
+            "update_elements": sum(count_elements(update["model"]) for update in updates),
+            "update_bytes": sum(wire_size(update) for update in updates),
+            "vdom_elements": count_elements(self.model),
+        }
+
+    async def report_ports(self, node_id: str):
+        """Report the geometry of the ports of node_id, as the browser does after mounting it."""
+        node = self.nodes_data[node_id]
+        ports = [dict(INPUT_RECT, name=name, type="input") for name in node.inputs] + [
+            dict(OUTPUT_RECT, name=name, type="output") for name in node.outputs
+        ]
+        await self.fire(has_id(f"{node_id} ports"), "onresize", {"currentTarget": {"value": json.dumps(ports)}})
+
+def gesture(start: Tuple[float, float], end: Tuple[float, float], moves: int) -> List[Tuple[str, Dict[str, Any]]]:
+    """Return the canvas mouse-move and mouse-up events of a drag from start to end."""
+    events = []
+    for step in range(1, moves + 1):
+        client_x = start[0] + (end[0] - start[0]) * step / moves
+        client_y = start[1] + (end[1] - start[1]) * step / moves
+        events.append(("onMouseMove", {"button": 0, "buttons": 1, "clientX": client_x, "clientY": client_y}))
+    events.append(("onMouseUp", {"button": 0, "buttons": 0, "clientX": end[0], "clientY": end[1]}))
+    return events
+
+async def run_scenario(session: BenchmarkSession, scenario: str, flow: Dict[str, Any], moves: int, offset: Tuple[float, float]) -> List[Dict[str, Any]]:
+    """Drive the gesture of scenario through session and return the measures of its events."""
+    source = flow["1"]
+    source_x, source_y = source["pos_x"] + offset[0] + 100, source["pos_y"] + offset[1] + 50
+    measures = []
+    canvas = has_id("drawflow")
+
+    if scenario == "drag_node":
+        measures.append(await session.fire(has_id("node-1"), "onMouseDown", {"button": 0, "clientX": source_x, "clientY": source_y}))
+        end = (source_x + GRID_STEP_X / 2, source_y + GRID_STEP_Y / 2)
+    elif scenario == "pan_canvas":
+        measures.append(await session.fire(canvas, "onMouseDown", {"button": 0, "clientX": source_x, "clientY": source_y}))
+        end = (source_x - 2 * GRID_STEP_X, source_y - 2 * GRID_STEP_Y)
+    elif scenario == "drag_connection":
+        connected = {connection["node"] for connection in source["outputs"]["output_1"]["connections"]}
+        target_id = next((node_id for node_id in flow if node_id != "1" and node_id not in connected), None)
+        if target_id is None:
+            return measures
+        target = flow[target_id]
+        await session.report_ports("1")
+        await session.report_ports(target_id)
+        output = lambda element: has_class("output_1")(element) and "onMouseOver" in element.get("eventHandlers", {})
+        port = find_element(find_element(session.model, has_id("node-1")), output)
+        measures.append(await session.fire(lambda element: element is port, "onMouseOver", {"clientX": source_x, "clientY": source_y}))
+        measures.append(await session.fire(has_id("node-1"), "onMouseDown", {"button": 0, "clientX": source_x, "clientY": source_y}))
+        end = (
+            target["pos_x"] + INPUT_RECT["offsetLeft"] + INPUT_RECT["width"] / 2 + offset[0],
+            target["pos_y"] + INPUT_RECT["offsetTop"] + INPUT_RECT["height"] / 2 + offset[1],
+        )
+    else:
+        raise ValueError(f"Unknown scenario {scenario!r}")
+
+    for event_name, data in gesture((source_x, source_y), end, moves):
+        measures.append(await session.fire(canvas, event_name, data))
+    return measures
+
+async def measure_scenario(scenario: str, flow: Dict[str, Any], *, moves: int, cls: Type[DrawflowInfo], trace_allocations: bool, **drawflow_options: Any) -> Tuple[float, List[Dict[str, Any]]]:
+    """Mount a fresh Drawflow for scenario and return its first render time and event measures."""
+    offset = drawflow_options.get("_offset", (0, 0))
+    async with BenchmarkSession(flow, cls=cls, **drawflow_options) as session:
+        initial_render_seconds, _ = await session.settle()
+        if not trace_allocations:
+            return initial_render_seconds, await run_scenario(session, scenario, flow, moves, offset)
+
+        # Allocations are measured in a separate run, as tracing them slows everything down
+        tracemalloc.start()
+        try:
+            original_fire = session.fire
+
+            async def traced_fire(*args: Any) -> Dict[str, Any]:
+                tracemalloc.reset_peak()
+                before, _ = tracemalloc.get_traced_memory()
+                measure = await original_fire(*args)
+                after, peak = tracemalloc.get_traced_memory()
+                measure["allocated_bytes"] = peak - before
+                measure["retained_bytes"] = after - before
+                return measure
+
+            session.fire = traced_fire
+            return initial_render_seconds, await run_scenario(session, scenario, flow, moves, offset)
+        finally:
+            tracemalloc.stop()
+
+def measure_layout(scenario: str, flow: Dict[str, Any], *, cls: Type[DrawflowInfo], trace_allocations: bool) -> Tuple[float, List[Dict[str, Any]]]:
+    """Load flow and return the load time and the measures of LAYOUT_RUNS layouts of scenario."""
+    start = time.perf_counter()
+    nodes_data = cls.from_dict(flow)
+    load_seconds = time.perf_counter() - start
+    if scenario == "layout":
+        node_ids = None
+    elif scenario == "relayout":
+        node_ids = list(flow)[:RELAYOUT_NODES]
+    else:
+        raise ValueError(f"Unknown scenario {scenario!r}")
+
+    measures = []
+    for _ in range(LAYOUT_RUNS):
+        if trace_allocations:
+            tracemalloc.start()
+        try:
+            start = time.perf_counter()
+            positions = layered_layout(nodes_data, node_ids)
+            layout_seconds = time.perf_counter() - start
+            nodes_data.with_node_positions(positions)
+            seconds = time.perf_counter() - start
+            measure = {"event": scenario, "layout_seconds": layout_seconds, "seconds": seconds, "nodes_placed": len(positions)}
+            if trace_allocations:
+                measure["retained_bytes"], measure["allocated_bytes"] = tracemalloc.get_traced_memory()
+        finally:
+            if trace_allocations:
+                tracemalloc.stop()
+        measures.append(measure)
+    return load_seconds, measures
+
+def measure_model(scenario: str, flow: Dict[str, Any], *, cls: Type[DrawflowInfo], trace_allocations: bool) -> Tuple[float, List[Dict[str, Any]]]:
+    """
+    Load flow and return the load time and the measures of MODEL_RUNS runs of scenario.
+
+    A load measure retains the loaded graph, so its retained_bytes is the size of the
+    graph. The copy scenario deep-copies the graph, then copies COPIES_PER_NODE Rects
+    and DragInfos per node.
+    """
+    start = time.perf_counter()
+    nodes_data = cls.from_dict(flow)
+    load_seconds = time.perf_counter() - start
+    copies = range(COPIES_PER_NODE * len(flow))
+    if scenario == "load":
+        operations = [("load", lambda: cls.from_dict(flow))]
+    elif scenario == "copy":
+        rect = Rect.from_dict(INPUT_RECT)
+        drag_data = DragInfo(is_dragging_node=True, node_id="node", offset_x=10, offset_y=10)
+        operations = [
+            ("deep_copy", nodes_data.deep_copy),
+            ("Rect.copy", lambda: [rect.copy() for _ in copies]),
+            ("DragInfo.copy", lambda: [drag_data.copy() for _ in copies]),
+        ]
+    else:
+        raise ValueError(f"Unknown scenario {scenario!r}")
+
+    measures = []
+    for _ in range(MODEL_RUNS):
+        for event, operation in operations:
+            if trace_allocations:
+                tracemalloc.start()
+            try:
+                start = time.perf_counter()
+                result = operation()
+                measure = {"event": event, "seconds": time.perf_counter() - start}
+                if trace_allocations:
+                    measure["retained_bytes"], measure["allocated_bytes"] = tracemalloc.get_traced_memory()
+                del result
+            finally:
+                if trace_allocations:
+                    tracemalloc.stop()
+            measures.append(measure)
+    return load_seconds, measures
+
+async def measure_benchmark(scenario: str, flow: Dict[str, Any], *, moves: int, cls: Type[DrawflowInfo], trace_allocations: bool, **drawflow_options: Any) -> Tuple[float, List[Dict[str, Any]]]:
+    """Return the initial time and the measures of scenario on flow, whatever its kind."""
+    if scenario in LAYOUT_SCENARIOS:
+        return measure_layout(scenario, flow, cls=cls, trace_allocations=trace_allocations)
+    if scenario in MODEL_SCENARIOS:
+        return measure_model(scenario, flow, cls=cls, trace_allocations=trace_allocations)
+    return await measure_scenario(scenario, flow, moves=moves, cls=cls, trace_allocations=trace_allocations, **drawflow_options)
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def summarize(measures: List[Dict[str, Any]], key: str) -> Dict[str, float]:
+    values = [measure[key] for measure in measures if key in measure]
+    if not values:
+        return {}
+    return {
+        "mean": statistics.fmean(values),
+        "median": statistics.median(values),
+        "p95": percentile(values, 0.95),
+        "max": max(values),
+    }
+
+async def run_benchmarks(node_counts: List[int], fan_out: int, *, scenarios: List[str], moves: int, cls: Type[DrawflowInfo], trace_allocations: bool, seed: int, **drawflow_options: Any) -> List[Dict[str, Any]]:
+    results = []
+    for node_count in node_counts:
+        flow = synthetic_flow(node_count, fan_out, seed=seed)
+        for scenario in scenarios:
+            initial_render_seconds, measures = await measure_benchmark(
+                scenario, flow, moves=moves, cls=cls, trace_allocations=False, **drawflow_options
+            )
+            if trace_allocations:
+                # Pair the measures of both runs, which replay the same events
+                _, traced_measures = await measure_benchmark(
+                    scenario, flow, moves=moves, cls=cls, trace_allocations=True, **drawflow_options
+                )
+                for measure, traced_measure in zip(measures, traced_measures):
+                    measure["allocated_bytes"] = traced_measure["allocated_bytes"]
+                    measure["retained_bytes"] = traced_measure["retained_bytes"]
+            result = {
+                "scenario": scenario,
+                "nodes": node_count,
+                "fan_out": fan_out,
+                "initial_render_seconds": initial_render_seconds,
+                "events": len(measures),
+                "seconds": summarize(measures, "seconds"),
+                "render_seconds": summarize(measures, "render_seconds"),
+                "layout_seconds": summarize(measures, "layout_seconds"),
+                "allocated_bytes": summarize(measures, "allocated_bytes"),
+                "retained_bytes": summarize(measures, "retained_bytes"),
+                "vdom_elements": measures[-1].get("vdom_elements", 0) if measures else 0,
+                "update_elements": summarize(measures, "update_elements"),
+                "update_bytes": summarize(measures, "update_bytes"),
+                "measures": measures,
+            }
+            results.append(result)
+            if scenario in LAYOUT_SCENARIOS:
+                details = f"{measures[-1]['nodes_placed']} nodes placed"
+            elif scenario in MODEL_SCENARIOS:
+                details = ", ".join(
+                    f"{event} {statistics.fmean(measure['seconds'] for measure in measures if measure['event'] == event) * 1000:.2f} ms"
+                    for event in dict.fromkeys(measure["event"] for measure in measures)
+                )
+                if result["retained_bytes"] and scenario == "load":
+                    details += f", {result['retained_bytes']['max'] / 2 ** 20:.1f} MB retained"
+            else:
+                details = f"{result['vdom_elements']} vdom elements, up to {result['update_bytes'].get('max', 0) / 1024:.1f} KB sent per event"
+            print(f"{scenario:<16} {node_count:>6} nodes: {result['events']} events, "
+                  f"mean {result['seconds'].get('mean', 0) * 1000:.2f} ms, p95 {result['seconds'].get('p95', 0) * 1000:.2f} ms, "
+                  f"{details}", file=sys.stderr)
+    return results
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], *, threshold: float) -> List[str]:
+    """
+    Return a line per scenario whose mean event time or mean bytes sent per event grew
+    by more than threshold (e.g. 0.1 for 10%) relative to the matching scenario of
+    baseline.
+    """
+    baseline_by_key = {(result["scenario"], result["nodes"], result["fan_out"]): result for result in baseline}
+    regressions = []
+    for result in results:
+        previous = baseline_by_key.get((result["scenario"], result["nodes"], result["fan_out"]))
+        if not previous:
+            continue
+        for key, label in (("seconds", "mean event time"), ("update_bytes", "mean bytes sent per event")):
+            if not previous.get(key) or not result.get(key) or not previous[key]["mean"]:
+                continue
+            ratio = result[key]["mean"] / previous[key]["mean"]
+            if ratio > 1 + threshold:
+                regressions.append(f"{result['scenario']} with {result['nodes']} nodes: {label} x{ratio:.2f}")
+    return regressions
+
+def parse_budget(budget: str) -> Tuple[str, int, float]:
+    """Parse a SCENARIO:NODES=KB budget, e.g. "drag_node:1000=64"."""
+    try:
+        key, kilobytes = budget.split("=")
+        scenario, node_count = key.split(":")
+        return scenario, int(node_count), float(kilobytes)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid budget {budget!r}, expected SCENARIO:NODES=KB") from None
+
+def check_budgets(results: List[Dict[str, Any]], budgets: List[Tuple[str, int, float]]) -> List[str]:
+    """
+    Return a line per event sending more than the budget of its scenario.
+
+    A budget (scenario, node count, kilobytes) bounds the bytes of the layout updates
+    caused by any pointer move (see BUDGETED_EVENTS) of the scenario on a flow of that
+    many nodes.
+    """
+    violations = []
+    for scenario, node_count, kilobytes in budgets:
+        matching = [result for result in results if result["scenario"] == scenario and result["nodes"] == node_count]
+        if not matching:
+            violations.append(f"{scenario} with {node_count} nodes: budget of {kilobytes:g} KB was not measured")
+        for result in matching:
+            for measure in result["measures"]:
+                if measure["event"] in BUDGETED_EVENTS and measure.get("update_bytes", 0) > kilobytes * 1024:
+                    violations.append(
+                        f"{scenario} with {node_count} nodes: {measure['event']} sent "
+                        f"{measure['update_bytes'] / 1024:.1f} KB, over the budget of {kilobytes:g} KB"
+                    )
+    return violations
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, nargs="+", default=[100, 1000, 10000], help="node counts of the synthetic flows")
+    parser.add_argument("--fan-out", type=int, default=2, help="connections leaving each node")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS + LAYOUT_SCENARIOS + MODEL_SCENARIOS, default=list(SCENARIOS + LAYOUT_SCENARIOS + MODEL_SCENARIOS))
+    parser.add_argument("--moves", type=int, default=20, help="mouse moves per gesture")
+    parser.add_argument("--move-interval", type=float, default=0, help="the Drawflow move_interval option")
+    parser.add_argument("--virtualize", action="store_true", help="enable the Drawflow virtualize option")
+    parser.add_argument("--columnar", action="store_true", help="use a ColumnarDrawflowInfo (requires numpy)")
+    parser.add_argument("--no-allocations", action="store_true", help="skip the allocation tracing runs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark.json", help="where to write the JSON results")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown reported as a regression by --compare")
+    parser.add_argument("--budget", type=parse_budget, action="append", default=[], metavar="SCENARIO:NODES=KB",
+                        help="fail when a pointer move of SCENARIO on NODES nodes sends more than KB kilobytes, on top of or replacing DEFAULT_BUDGETS; repeatable")
+    args = parser.parse_args(argv)
+
+    cls = DrawflowInfo
+    if args.columnar:
+        from ColumnarDrawflowInfo import ColumnarDrawflowInfo
+        cls = ColumnarDrawflowInfo
+
+    results = asyncio.run(run_benchmarks(
+        args.nodes,
+        args.fan_out,
+        scenarios=args.scenarios,
+        moves=args.moves,
+        cls=cls,
+        trace_allocations=not args.no_allocations,
+        seed=args.seed,
+        move_interval=args.move_interval,
+        virtualize=args.virtualize,
+        _offset=(0, 37),
+    ))
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "reactpy": reactpy.__version__,
+            "platform": platform.platform(),
+        },
+        "options": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "threshold", "budget")},
+        "results": results,
+    }
+    with open(args.output, "w") as stream:
+        json.dump(report, stream, indent=1)
+
+    measured = {(result["scenario"], result["nodes"]) for result in results}
+    budgets = {(scenario, node_count): kilobytes for scenario, node_count, kilobytes in DEFAULT_BUDGETS if (scenario, node_count) in measured}
+    budgets.update({(scenario, node_count): kilobytes for scenario, node_count, kilobytes in args.budget})
+    failures = check_budgets(results, [(scenario, node_count, kilobytes) for (scenario, node_count), kilobytes in budgets.items()])
+    for failure in failures:
+        print(f"Over budget: {failure}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare) as stream:
+            regressions = compare(results, json.load(stream)["results"], threshold=args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        failures += regressions
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
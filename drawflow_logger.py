@@ -1,5 +1,102 @@
+import bisect
 import datetime
+import os
+import time
+from typing import Any, Dict, List, Tuple
 
-def log(message):
-    # print(f'DEBUG({datetime.datetime.now().strftime("%M:%S")}):\t', message)
-    pass
\ No newline at end of file
+# Debug output is off unless DRAWFLOW_LOG is set or enable_logging is called
+LOG_ENABLED = bool(os.environ.get("DRAWFLOW_LOG"))
+# Spans are only timed when DRAWFLOW_TRACE is set or enable_tracing is called
+TRACE_ENABLED = bool(os.environ.get("DRAWFLOW_TRACE"))
+
+# Upper bounds, in seconds, of the latency histogram buckets
+SPAN_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+def enable_logging(enabled: bool = True):
+    global LOG_ENABLED
+    LOG_ENABLED = enabled
+
+def enable_tracing(enabled: bool = True):
+    global TRACE_ENABLED
+    TRACE_ENABLED = enabled
+
+def log(message: str, *args: Any):
+    """
+    Print a debug record when logging is enabled.
+
+    message is %-formatted with args only then, so callers pass the values instead of
+    building the string: `log("Drawflow ➜ %s", nodes_data._nodes.keys())`.
+    """
+    if not LOG_ENABLED:
+        return
+    print(f'DEBUG({datetime.datetime.now().strftime("%M:%S")}):\t', message % args if args else message)
+
+class Histogram:
+    """Counts of observed durations per SPAN_BUCKETS bucket, with their sum."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * (len(SPAN_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(SPAN_BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def cumulative_counts(self) -> List[Tuple[str, int]]:
+        """Return (upper bound, observations at or below it) pairs, ending with "+Inf"."""
+        total = 0
+        pairs = []
+        for bound, count in zip([str(bound) for bound in SPAN_BUCKETS] + ["+Inf"], self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+histograms: Dict[str, Histogram] = {}
+
+class _TimedSpan:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        histogram = histograms.get(self.name)
+        if histogram is None:
+            histogram = histograms[self.name] = Histogram()
+        histogram.observe(time.perf_counter() - self.start)
+        return False
+
+class _NoSpan:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+def span(name: str) -> Any:
+    """Return a context manager recording how long its block takes in the histogram of name."""
+    if not TRACE_ENABLED:
+        return _NO_SPAN
+    return _TimedSpan(name)
+
+def render_prometheus() -> str:
+    """Return the span histograms in the Prometheus text exposition format."""
+    lines = [
+        "# HELP drawflow_span_seconds Time spent in instrumented Drawflow handlers and renders.",
+        "# TYPE drawflow_span_seconds histogram",
+    ]
+    for name, histogram in sorted(histograms.items()):
+        for bound, count in histogram.cumulative_counts():
+            lines.append(f'drawflow_span_seconds_bucket{{span="{name}",le="{bound}"}} {count}')
+        lines.append(f'drawflow_span_seconds_sum{{span="{name}"}} {histogram.sum}')
+        lines.append(f'drawflow_span_seconds_count{{span="{name}"}} {histogram.count}')
+    return "\n".join(lines) + "\n"
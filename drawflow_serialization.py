@@ -0,0 +1,278 @@
+import json
+import struct
+from typing import Any, BinaryIO, Dict, Iterator, List, TextIO, Tuple, Type
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from NodeInfo import NodeInfo
+from OutputInfo import OutputInfo
+from ConnectionInfo import ConnectionInfo
+from DrawflowInfo import DrawflowInfo
+
+# Binary layout, all integers little-endian:
+#
+#   header  magic "DRFL", u8 version, u32 node count
+#   node    id, name, class, component: string
+#           data: string holding compact JSON
+#           u32 input count, then one string per input
+#           u32 output count, then per output: name string, u32 connection count,
+#           then per connection: node string, input string
+#           pos_x, pos_y: number
+#   string  u32 tag; odd tags introduce a new string of tag >> 1 UTF-8 bytes, even
+#           tags refer to the (tag >> 1)-th string introduced so far
+#   number  u8 kind ("i" or "d"), then an i64 or an f64
+#
+# Node ids, component names and port names repeat a lot, so they are written once.
+BINARY_MAGIC = b"DRFL"
+BINARY_VERSION = 1
+BINARY_CHUNK_SIZE = 1 << 16
+JSON_CHUNK_SIZE = 1 << 16
+
+_HEADER = struct.Struct("<4sBI")
+_U32 = struct.Struct("<I")
+_KIND = struct.Struct("<B")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+
+class _BinaryWriter:
+    def __init__(self, stream: BinaryIO):
+        self._write = stream.write
+        self._strings: Dict[str, int] = {}
+
+    def u32(self, value: int):
+        self._write(_U32.pack(value))
+
+    def string(self, value: str):
+        index = self._strings.get(value)
+        if index is not None:
+            self.u32(index << 1)
+            return
+        self._strings[value] = len(self._strings)
+        encoded = value.encode("utf-8")
+        self.u32(len(encoded) << 1 | 1)
+        self._write(encoded)
+
+    def number(self, value: Any):
+        if isinstance(value, int) and not isinstance(value, bool):
+            self._write(_KIND.pack(ord("i")))
+            self._write(_I64.pack(value))
+        else:
+            self._write(_KIND.pack(ord("d")))
+            self._write(_F64.pack(value))
+
+    def node(self, node_id: str, node: NodeInfo):
+        self.string(node_id)
+        self.string(node.name)
+        self.string(node.custom_class)
+        self.string(node.component)
+        self.string(json.dumps(node.data, separators=(",", ":")))
+        self.u32(len(node.inputs))
+        for input_name in node.inputs:
+            self.string(input_name)
+        self.u32(len(node.outputs))
+        for output_name, output in node.outputs.items():
+            self.string(output_name)
+            self.u32(len(output.connections))
+            for connection in output.connections:
+                self.string(connection.node)
+                self.string(connection.input)
+        self.number(node.pos_x)
+        self.number(node.pos_y)
+
+class _BinaryReader:
+    def __init__(self, stream: BinaryIO):
+        self._read = stream.read
+        self._buffer = b""
+        self._offset = 0
+        self._strings: List[str] = []
+
+    def _fill(self, size: int):
+        # Keep reading in chunks until size bytes are available past the offset
+        buffer = self._buffer[self._offset:]
+        while len(buffer) < size:
+            chunk = self._read(max(BINARY_CHUNK_SIZE, size - len(buffer)))
+            if not chunk:
+                raise ValueError("Truncated Drawflow binary data")
+            buffer += chunk
+        self._buffer = buffer
+        self._offset = 0
+
+    def exactly(self, size: int) -> bytes:
+        if self._offset + size > len(self._buffer):
+            self._fill(size)
+        data = self._buffer[self._offset:self._offset + size]
+        self._offset += size
+        return data
+
+    def u32(self) -> int:
+        if self._offset + 4 > len(self._buffer):
+            self._fill(4)
+        value = _U32.unpack_from(self._buffer, self._offset)[0]
+        self._offset += 4
+        return value
+
+    def string(self) -> str:
+        tag = self.u32()
+        if not tag & 1:
+            return self._strings[tag >> 1]
+        value = self.exactly(tag >> 1).decode("utf-8")
+        self._strings.append(value)
+        return value
+
+    def number(self) -> Any:
+        if self._offset + 9 > len(self._buffer):
+            self._fill(9)
+        kind = self._buffer[self._offset]
+        if kind == ord("i"):
+            value = _I64.unpack_from(self._buffer, self._offset + 1)[0]
+        elif kind == ord("d"):
+            value = _F64.unpack_from(self._buffer, self._offset + 1)[0]
+        else:
+            raise ValueError(f"Unknown number kind {chr(kind)!r} in Drawflow binary data")
+        self._offset += 9
+        return value
+
+    def node(self) -> Tuple[str, NodeInfo]:
+        node_id = self.string()
+        name = self.string()
+        custom_class = self.string()
+        component = self.string()
+        encoded_data = self.string()
+        data = json.loads(encoded_data) if encoded_data != "{}" else {}
+        inputs = [self.string() for _ in range(self.u32())]
+        outputs = {}
+        for _ in range(self.u32()):
+            output_name = self.string()
+            outputs[output_name] = OutputInfo([ConnectionInfo(node=self.string(), input=self.string()) for _ in range(self.u32())])
+        pos_x = self.number()
+        pos_y = self.number()
+        return node_id, NodeInfo(name=name, data=data, custom_class=custom_class, component=component, inputs=inputs, outputs=outputs, pos_x=pos_x, pos_y=pos_y)
+
+def dump_binary(info: DrawflowInfo, stream: BinaryIO):
+    """Write info to a binary stream using the versioned binary layout."""
+    stream.write(_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(info._nodes)))
+    writer = _BinaryWriter(stream)
+    for node_id, node in info._nodes.items():
+        writer.node(node_id, node)
+
+def iter_binary_nodes(stream: BinaryIO) -> Iterator[Tuple[str, NodeInfo]]:
+    """Yield the (node_id, NodeInfo) pairs of a binary stream one by one."""
+    reader = _BinaryReader(stream)
+    magic, version, count = _HEADER.unpack(reader.exactly(_HEADER.size))
+    if magic != BINARY_MAGIC:
+        raise ValueError("Not Drawflow binary data")
+    if version != BINARY_VERSION:
+        raise ValueError(f"Unsupported Drawflow binary version {version}")
+    for _ in range(count):
+        yield reader.node()
+
+def load_binary(stream: BinaryIO, cls: Type[DrawflowInfo] = DrawflowInfo) -> DrawflowInfo:
+    """Read a flow written by dump_binary."""
+    return cls(nodes=dict(iter_binary_nodes(stream)))
+
+def dump_json(info: DrawflowInfo, stream: TextIO):
+    """Write info to a text stream in the to_dict JSON format, one node at a time."""
+    stream.write("{")
+    for index, (node_id, node) in enumerate(info._nodes.items()):
+        if index:
+            stream.write(",")
+        stream.write(json.dumps(node_id))
+        stream.write(":")
+        stream.write(json.dumps(node.to_dict()))
+    stream.write("}")
+
+def iter_json_nodes(stream: TextIO, chunk_size: int = JSON_CHUNK_SIZE) -> Iterator[Tuple[str, NodeInfo]]:
+    """
+    Yield the (node_id, NodeInfo) pairs of a JSON document in the to_dict format.
+
+    The document is read in chunks of chunk_size characters and only one node is
+    decoded at a time, so the whole document is never held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    at_end = False
+
+    def fill() -> bool:
+        nonlocal buffer, position, at_end
+        if at_end:
+            return False
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            at_end = True
+            return False
+        buffer = buffer[position:] + chunk
+        position = 0
+        return True
+
+    def skip_whitespace() -> str:
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer):
+                return buffer[position]
+            if not fill():
+                raise ValueError("Unexpected end of Drawflow JSON data")
+
+    def expect(characters: str) -> str:
+        nonlocal position
+        character = skip_whitespace()
+        if character not in characters:
+            raise ValueError(f"Expected one of {characters!r} in Drawflow JSON data, found {character!r}")
+        position += 1
+        return character
+
+    def decode() -> Any:
+        nonlocal position
+        skip_whitespace()
+        while True:
+            try:
+                value, position = decoder.raw_decode(buffer, position)
+                return value
+            except json.JSONDecodeError:
+                # Either invalid or cut at the end of the buffer: only more data can tell
+                if not fill():
+                    raise
+
+    expect("{")
+    if skip_whitespace() == "}":
+        return
+    while True:
+        node_id = decode()
+        if not isinstance(node_id, str):
+            raise ValueError("Drawflow JSON keys must be strings")
+        expect(":")
+        yield node_id, NodeInfo.from_dict(decode())
+        if expect(",}") == "}":
+            return
+
+def load_json(stream: TextIO, cls: Type[DrawflowInfo] = DrawflowInfo, chunk_size: int = JSON_CHUNK_SIZE) -> DrawflowInfo:
+    """Read a flow from a JSON text stream without materializing the whole document."""
+    return cls(nodes=dict(iter_json_nodes(stream, chunk_size)))
+
+def _require_msgpack():
+    if msgpack is None:
+        raise ImportError("MessagePack serialization requires msgpack, install it with `pip install msgpack`")
+
+def dump_msgpack(info: DrawflowInfo, stream: BinaryIO):
+    """Write info to a binary stream as a MessagePack map in the to_dict format."""
+    _require_msgpack()
+    packer = msgpack.Packer()
+    stream.write(packer.pack_map_header(len(info._nodes)))
+    for node_id, node in info._nodes.items():
+        stream.write(packer.pack(node_id))
+        stream.write(packer.pack(node.to_dict()))
+
+def load_msgpack(stream: BinaryIO, cls: Type[DrawflowInfo] = DrawflowInfo) -> DrawflowInfo:
+    """Read a flow written by dump_msgpack, one node at a time."""
+    _require_msgpack()
+    unpacker = msgpack.Unpacker(stream, raw=False)
+    nodes = {}
+    for _ in range(unpacker.read_map_header()):
+        node_id = unpacker.unpack()
+        nodes[node_id] = NodeInfo.from_dict(unpacker.unpack())
+    return cls(nodes=nodes)
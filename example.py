@@ -1,14 +1,20 @@
 from pathlib import Path
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from reactpy import component, hooks, html
 from reactpy.backend.fastapi import configure, FastAPI
 
-from drawflow_logger import log
+from drawflow_logger import enable_tracing, log, render_prometheus
 from DrawflowInfo import DrawflowInfo
 from Drawflow import Drawflow
-from your_component_file import component_map
+from FlowLog import FlowLog
+from FlowHistory import FlowHistory
+from SharedFlow import use_shared_flow
+from SyncedFlow import SyncedFlow
+from FlowExecutor import FlowExecutor
+from your_component_file import component_map, task_map
 
 app = FastAPI()
 
@@ -19,6 +25,32 @@ app.mount(
     name="static",
 )
 
+# Handler latencies are exposed in the Prometheus format at /metrics
+enable_tracing()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return render_prometheus()
+
+# Every edit is appended to this log, so the flow survives restarts and reloads
+flow_log = FlowLog(str(Path(__file__).parent / "flow.sqlite3"))
+
+# Every session edits this same flow, created from the log by the first one. The log
+# also keeps it in sync with the other processes of `uvicorn example:app --workers N`
+shared_flow = None
+
+def get_shared_flow(initial_drawflow):
+    global shared_flow
+    if shared_flow is None:
+        if flow_log.load() is None:
+            flow_log.snapshot(DrawflowInfo.from_dict(initial_drawflow, validate=True))
+        shared_flow = SyncedFlow(flow_log)
+    shared_flow.start()
+    return shared_flow
+
+# Runs the flow on demand, streaming each node status back to the canvas
+flow_executor = FlowExecutor(task_map, max_concurrency=4, timeout=10)
+
 @component
 def App():
     initial_drawflow = {
@@ -168,9 +200,30 @@ def App():
                     "pos_y": 272
                 }
     }
-    nodes_data, set_nodes_data = hooks.use_state(DrawflowInfo.from_dict(initial_drawflow))
+    shared_flow = get_shared_flow(initial_drawflow)
+    nodes_data, set_nodes_data = use_shared_flow(shared_flow)
+    history, _ = hooks.use_state(FlowHistory)
+    node_status, set_node_status = hooks.use_state({})
+    is_running, set_is_running = hooks.use_state(False)
+    # Set at once, unlike is_running, so that a second click never starts a second run
+    running = hooks.use_ref(False)
+
+    async def run_flow(event):
+        if running.current:
+            return
+        running.current = True
+        set_is_running(True)
+
+        def on_status(node_id, status, value):
+            set_node_status(lambda current: {**current, node_id: status})
+
+        try:
+            await flow_executor.run(nodes_data, on_status=on_status)
+        finally:
+            running.current = False
+            set_is_running(False)
 
-    log(f'App ➜ 🖼 {initial_drawflow.keys()}')
+    log('App ➜ 🖼 %s', initial_drawflow.keys())
 
     return html.div(
         {"style": {"user-select": "none", "-moz-user-select": "none", "-webkit-user-select": "none", "-ms-user-select": "none"}},
@@ -178,7 +231,8 @@ def App():
         html.link({"rel": "stylesheet", "type": "text/css", "href": app.url_path_for('static', path='beautiful.css')}),
         html.link({"rel": "stylesheet", "href":"https://cdnjs.cloudflare.com/ajax/libs/font-awesome/5.13.0/css/all.min.css", "integrity": "sha256-h20CPZ0QyXlBuAw7A+KluUYx/3pK+c7lYEpqLTlxjYQ=", "crossorigin": "anonymous"}),
         html.link({"href": "https://fonts.googleapis.com/css2?family=Roboto&display=swap", "rel": "stylesheet"}),
-        Drawflow(nodes_data, set_nodes_data, component_map, _offset=(0, 37))
+        html.div({"class_name": "btn-export running" if is_running else "btn-export", "onClick": run_flow}, "Running…" if is_running else "Run"),
+        Drawflow(nodes_data, set_nodes_data, component_map, move_interval=1/60, on_operation=shared_flow.append, history=history, node_status=node_status, _offset=(0, 37))
     )
 
 # run
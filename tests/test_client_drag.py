@@ -0,0 +1,32 @@
+import asyncio
+import json
+
+from benchmark import BenchmarkSession, has_id, synthetic_flow
+from FlowHistory import FlowHistory
+
+def test_client_drag_of_a_node_is_one_edit():
+    flow = synthetic_flow(4, 1)
+    origin = (flow["1"]["pos_x"], flow["1"]["pos_y"])
+    history = FlowHistory()
+    operations = []
+
+    async def run():
+        async with BenchmarkSession(flow, client_drag=True, history=history, on_operation=lambda operation, _: operations.append(operation)) as session:
+            await session.settle()
+            await session.fire(has_id("node-1"), "onMouseDown", {"button": 0, "clientX": 100, "clientY": 100})
+            # The browser commits the drop while capturing the mouse-up, before the canvas handler sees it
+            commit = {"kind": "node", "node_id": "1", "x": origin[0] + 40, "y": origin[1] + 30}
+            await session.fire(has_id("drawflow-client-drag"), "onresize", {"currentTarget": {"value": json.dumps(commit)}})
+            await session.fire(has_id("drawflow"), "onMouseUp", {"button": 0, "buttons": 0, "clientX": 140, "clientY": 130})
+            return session
+
+    session = asyncio.run(run())
+
+    assert [(operation.kind, operation.node_id) for operation in operations] == [("move", "1")]
+    assert len(history._undo) == 1
+    node = session.nodes_data["1"]
+    assert (node.pos_x, node.pos_y) == (origin[0] + 40, origin[1] + 30)
+
+    # Undoing the drop goes back to where the gesture started
+    undone = history.undo()
+    assert [(operation.kind, operation.node_id, operation.args) for operation in undone] == [("move", "1", {"pos_x": origin[0], "pos_y": origin[1]})]
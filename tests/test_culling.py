@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+from benchmark import BenchmarkSession, has_id, iter_elements, synthetic_flow
+from DrawflowInfo import DrawflowInfo
+from PortIndex import PortIndex
+from Rectangles import Rectangles
+
+WINDOW = (800, 500)
+MARGIN = 100
+
+def rendered_nodes(model):
+    return {
+        element["attributes"]["id"][len("node-"):]
+        for element in iter_elements(model)
+        if element.get("attributes", {}).get("id", "").startswith("node-")
+    }
+
+def expected_nodes(flow, viewport, window=WINDOW):
+    left, top = -viewport[0] - MARGIN, -viewport[1] - MARGIN
+    right, bottom = -viewport[0] + window[0] + MARGIN, -viewport[1] + window[1] + MARGIN
+    return {
+        node_id for node_id, node in flow.items()
+        if node["pos_x"] + Rectangles.NODE_MIN_WIDTH >= left and node["pos_x"] <= right and
+        node["pos_y"] + Rectangles.NODE_MIN_HEIGHT >= top and node["pos_y"] <= bottom
+    }
+
+def pan(session, start, end):
+    async def run():
+        measures = [await session.fire(has_id("drawflow"), "onMouseDown", {"button": 0, "clientX": start[0], "clientY": start[1]})]
+        measures.append(await session.fire(has_id("drawflow"), "onMouseMove", {"button": 0, "buttons": 1, "clientX": end[0], "clientY": end[1]}))
+        measures.append(await session.fire(has_id("drawflow"), "onMouseUp", {"button": 0, "buttons": 0, "clientX": end[0], "clientY": end[1]}))
+        return measures
+    return run()
+
+def test_virtualized_canvas_renders_the_measured_window():
+    flow = synthetic_flow(400, 2)
+
+    async def run():
+        async with BenchmarkSession(flow, virtualize=True, cull_margin=MARGIN) as session:
+            await session.settle()
+            # The default viewport_size is larger than the window the browser measures
+            initial = rendered_nodes(session.model)
+            window = {"offsetLeft": 0, "offsetTop": 0, "width": WINDOW[0], "height": WINDOW[1]}
+            await session.fire(has_id("drawflow-window"), "onresize", {"currentTarget": {"value": json.dumps(window)}})
+            measured = rendered_nodes(session.model)
+
+            # Within the margin, panning only moves the transform
+            small_pan = await pan(session, (500, 300), (450, 250))
+            after_small_pan = rendered_nodes(session.model)
+
+            # Beyond it, the nodes around the new window are rendered
+            await pan(session, (500, 300), (-700, -500))
+            return initial, measured, small_pan, after_small_pan, rendered_nodes(session.model)
+
+    initial, measured, small_pan, after_small_pan, after_large_pan = asyncio.run(run())
+
+    assert initial == expected_nodes(flow, (0, 0), (1920, 1080))
+    assert measured == expected_nodes(flow, (0, 0))
+    assert max(measure["update_bytes"] for measure in small_pan) < 1024
+    assert after_small_pan == measured
+    # The second pan starts from (-50, -50)
+    assert after_large_pan == expected_nodes(flow, (-1250, -850))
+
+def test_find_nodes_matches_a_scan_before_and_after_follow():
+    nodes_data = DrawflowInfo.from_dict(synthetic_flow(200, 2))
+    rects = Rectangles()
+    rects.follow(nodes_data)
+    area = (1000, 500, 2500, 1500)
+
+    def scanned(nodes_data):
+        left, top, right, bottom = area
+        return sorted(
+            node_id for node_id, node in nodes_data._nodes.items()
+            if node.pos_x + Rectangles.NODE_MIN_WIDTH >= left and node.pos_x <= right and
+            node.pos_y + Rectangles.NODE_MIN_HEIGHT >= top and node.pos_y <= bottom
+        )
+
+    assert rects.find_nodes(nodes_data, *area) == scanned(nodes_data)
+    # Moved into, out of, and removed from the area, before the grid follows
+    edited = nodes_data.with_node_position("1", 1200, 600).with_node_position(scanned(nodes_data)[0], 0, 0).without_node(scanned(nodes_data)[1])
+    assert rects.find_nodes(edited, *area) == scanned(edited)
+    rects.follow(edited)
+    assert rects.find_nodes(edited, *area) == scanned(edited)
+
+def test_port_index_area_query():
+    index = PortIndex(cell_size=100)
+    index.insert("a", 0, 0, 50, 50)
+    index.insert("b", 150, 150, 350, 250)
+    index.insert("c", 1000, 1000, 1010, 1010)
+
+    assert sorted(index.query_area(40, 40, 160, 160)) == ["a", "b"]
+    assert index.query_area(60, 60, 140, 140) == []
+    assert index.query_area(300, 100, 400, 200) == ["b"]
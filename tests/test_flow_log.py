@@ -0,0 +1,51 @@
+from ConnectionInfo import ConnectionInfo
+from DrawflowInfo import DrawflowInfo
+from FlowLog import FlowLog
+from FlowOperation import FlowOperation
+from NodeInfo import NodeInfo
+
+def node(name, pos_x=0, pos_y=0):
+    return NodeInfo.from_dict({
+        "name": name,
+        "data": {},
+        "class": "",
+        "component": "",
+        "inputs": ["input_1"],
+        "outputs": {"output_1": {"connections": []}},
+        "pos_x": pos_x,
+        "pos_y": pos_y,
+    })
+
+def test_empty_log_loads_nothing(tmp_path):
+    flow_log = FlowLog(str(tmp_path / "flow.db"))
+    assert flow_log.load_versioned() == (None, 0)
+
+def test_operations_without_snapshot_are_replayed(tmp_path):
+    path = str(tmp_path / "flow.db")
+    flow_log = FlowLog(path)
+    operations = [
+        FlowOperation.add_node("a", node("a")),
+        FlowOperation.add_node("b", node("b", 300, 0)),
+        FlowOperation.connect("a", "output_1", ConnectionInfo(node="b", input="input_1")),
+        FlowOperation.move("b", 400, 100),
+    ]
+    expected = DrawflowInfo({})
+    for operation in operations:
+        expected = operation.apply(expected)
+        flow_log.append(operation)
+    flow_log.close()
+
+    nodes_data, seq = FlowLog(path).load_versioned()
+    assert seq == len(operations)
+    assert nodes_data.to_dict() == expected.to_dict()
+    assert nodes_data.get_sources("b", "input_1") == [("a", "output_1")]
+
+def test_operations_after_snapshot_are_replayed(tmp_path):
+    flow_log = FlowLog(str(tmp_path / "flow.db"))
+    flow_log.append(FlowOperation.add_node("a", node("a")))
+    flow_log.snapshot(DrawflowInfo({"a": node("a")}))
+    flow_log.append(FlowOperation.move("a", 10, 20))
+
+    nodes_data, seq = flow_log.load_versioned()
+    assert seq == 2
+    assert (nodes_data["a"].pos_x, nodes_data["a"].pos_y) == (10, 20)
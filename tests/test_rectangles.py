@@ -0,0 +1,88 @@
+import asyncio
+
+from benchmark import BenchmarkSession, run_scenario, synthetic_flow
+from DrawflowInfo import DrawflowInfo
+from GeometryProxy import Rect
+from Rectangles import Rectangles
+
+PORT = Rect(offset_left=0, offset_top=20, width=20, height=20)
+
+def measured(nodes_data):
+    rects = Rectangles()
+    for node_id, node in nodes_data._nodes.items():
+        rects.move_node(node_id, node.pos_x, node.pos_y)
+        rects.add_rectangle(node_id, "input_1", "input", PORT)
+    rects.follow(nodes_data)
+    return rects
+
+def count_moves(rects):
+    """Record the nodes rects.move_node is called with."""
+    moved = []
+    move_node = rects.move_node
+
+    def counted(node_id, pos_x, pos_y):
+        moved.append(node_id)
+        move_node(node_id, pos_x, pos_y)
+
+    rects.move_node = counted
+    return moved
+
+def test_follow_only_visits_the_nodes_placed_since():
+    nodes_data = DrawflowInfo.from_dict(synthetic_flow(50, 2))
+    rects = measured(nodes_data)
+    moved = count_moves(rects)
+
+    moved_nodes_data = nodes_data.with_node_position("3", 1000, 2000)
+    rects.follow(moved_nodes_data.with_node_data("5", {"edited": True}))
+
+    assert moved == ["3", "5"]
+    assert rects.find_rectangles(1010, 2030) == [("3", "input_1", "input")]
+
+def test_follow_deletes_the_ports_of_removed_nodes():
+    nodes_data = DrawflowInfo.from_dict(synthetic_flow(50, 2))
+    rects = measured(nodes_data)
+    moved = count_moves(rects)
+    node = nodes_data["4"]
+
+    rects.follow(nodes_data.without_node("4"))
+
+    assert moved == []
+    assert rects.get_rectangle("4", "input_1", "input") is None
+    assert rects.find_rectangles(node.pos_x + 10, node.pos_y + 30) == []
+
+def test_follow_compares_every_node_of_an_unrelated_version():
+    nodes_data = DrawflowInfo.from_dict(synthetic_flow(50, 2))
+    rects = measured(nodes_data)
+    moved = count_moves(rects)
+
+    # A reloaded flow does not derive from the version rects follows
+    reloaded = DrawflowInfo.from_dict(nodes_data.with_node_position("2", 1000, 2000).to_dict())
+    rects.follow(reloaded)
+
+    assert len(moved) == 50
+    assert rects.find_rectangles(1010, 2030) == [("2", "input_1", "input")]
+
+def test_placed_since():
+    nodes_data = DrawflowInfo.from_dict(synthetic_flow(5, 1))
+    mark = nodes_data.placement_mark()
+    moved = nodes_data.with_node_position("1", 10, 10).with_node_position("2", 20, 20).with_node_position("1", 30, 30)
+
+    assert moved.placed_since(mark) == ["1", "2"]
+    assert moved.placed_since(moved.placement_mark()) == []
+    assert nodes_data.placed_since(moved.placement_mark()) is None
+    assert nodes_data.with_node_position("3", 0, 0).placed_since(moved.placement_mark()) is None
+    assert moved.placed_since(None) is None
+
+def test_connection_dropped_on_an_input_is_made():
+    flow = synthetic_flow(20, 1)
+    connected = {connection["node"] for connection in flow["1"]["outputs"]["output_1"]["connections"]}
+    target_id = next(node_id for node_id in flow if node_id != "1" and node_id not in connected)
+
+    async def run():
+        async with BenchmarkSession(flow) as session:
+            await session.settle()
+            await run_scenario(session, "drag_connection", flow, 3, (0, 0))
+            return session
+
+    session = asyncio.run(run())
+    assert ("1", "output_1") in session.nodes_data.get_sources(target_id, "input_1")
@@ -0,0 +1,49 @@
+import asyncio
+
+from benchmark import BenchmarkSession, GRID_STEP_X, GRID_STEP_Y, find_element, has_id, iter_elements, run_scenario, synthetic_flow
+
+MOVES = 5
+
+def drive(flow, scenario, **drawflow_options):
+    """Run the benchmark gesture of scenario on flow; return the session and the measures of its pointer moves."""
+    async def run():
+        async with BenchmarkSession(flow, **drawflow_options) as session:
+            await session.settle()
+            measures = await run_scenario(session, scenario, flow, MOVES, (0, 0))
+            return session, [measure for measure in measures if measure["event"] == "onMouseMove"]
+    return asyncio.run(run())
+
+def max_move_bytes(measures):
+    return max(measure["update_bytes"] for measure in measures)
+
+def test_node_drag_moves_only_send_the_dragged_node():
+    small_session, small_moves = drive(synthetic_flow(20, 2), "drag_node")
+    large_session, large_moves = drive(synthetic_flow(200, 2), "drag_node")
+
+    assert len(large_moves) == MOVES
+    # The node, its connections, never the other nodes: ten times the nodes, the same bytes
+    assert max_move_bytes(large_moves) <= max_move_bytes(small_moves) * 1.5
+    assert max_move_bytes(large_moves) < 16 * 1024
+
+def test_dragged_node_follows_the_pointer_and_is_dropped_once():
+    flow = synthetic_flow(20, 2)
+    session, _ = drive(flow, "drag_node")
+
+    node = session.nodes_data["1"]
+    assert (node.pos_x, node.pos_y) == (flow["1"]["pos_x"] + GRID_STEP_X / 2, flow["1"]["pos_y"] + GRID_STEP_Y / 2)
+    style = find_element(session.model, has_id("node-1"))["attributes"]["style"]
+    assert (style["left"], style["top"]) == (f"{node.pos_x}px", f"{node.pos_y}px")
+
+def test_pan_moves_only_send_the_viewport_transform():
+    flow = synthetic_flow(200, 2)
+    session, moves = drive(flow, "pan_canvas")
+
+    assert max_move_bytes(moves) < 1024
+    rule = next(element for element in iter_elements(session.model) if element.get("tagName") == "style")
+    assert rule["children"] == [f"#drawflow {{ transform: translate({-2.0 * GRID_STEP_X}px, {-2.0 * GRID_STEP_Y}px); }}"]
+
+def test_connection_drag_moves_only_send_the_dragged_connection():
+    _, moves = drive(synthetic_flow(200, 2), "drag_connection")
+
+    assert len(moves) == MOVES
+    assert max_move_bytes(moves) < 2 * 1024
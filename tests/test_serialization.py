@@ -0,0 +1,80 @@
+import io
+
+import pytest
+
+from DrawflowInfo import DrawflowInfo
+from drawflow_serialization import dump_binary, dump_json, dump_msgpack, load_binary, load_json, load_msgpack
+
+FLOW = {
+    "1": {
+        "name": "welcome",
+        "data": {"title": "Grüße, 世界 ✓", "nested": {"values": [1, 2.5, None, True], "quote": "\"{[\\]}\""}},
+        "class": "welcome",
+        "component": "WelcomeComponent",
+        "inputs": [],
+        "outputs": {"output_1": {"connections": [{"node": "ノード", "input": "input_1"}]}},
+        "pos_x": 50,
+        "pos_y": 50.5,
+    },
+    "ノード": {
+        "name": "ünïcödé",
+        "data": {},
+        "class": "",
+        "component": "TemplateComponent",
+        "inputs": ["input_1", "input_2"],
+        "outputs": {"output_1": {"connections": []}, "output_2": {"connections": [{"node": "1", "input": "input_1"}]}},
+        "pos_x": -120,
+        "pos_y": 3000,
+    },
+}
+
+def columnar():
+    pytest.importorskip("numpy")
+    from ColumnarDrawflowInfo import ColumnarDrawflowInfo
+    return ColumnarDrawflowInfo
+
+def round_trip_json(info, cls=DrawflowInfo, **options):
+    stream = io.StringIO()
+    dump_json(info, stream)
+    stream.seek(0)
+    return load_json(stream, cls, **options)
+
+def round_trip_binary(info, cls=DrawflowInfo):
+    stream = io.BytesIO()
+    dump_binary(info, stream)
+    stream.seek(0)
+    return load_binary(stream, cls)
+
+def round_trip_msgpack(info, cls=DrawflowInfo):
+    pytest.importorskip("msgpack")
+    stream = io.BytesIO()
+    dump_msgpack(info, stream)
+    stream.seek(0)
+    return load_msgpack(stream, cls)
+
+@pytest.mark.parametrize("round_trip", [round_trip_json, round_trip_binary, round_trip_msgpack])
+def test_round_trip(round_trip):
+    info = DrawflowInfo.from_dict(FLOW)
+    loaded = round_trip(info)
+    assert type(loaded) is DrawflowInfo
+    assert loaded.to_dict() == info.to_dict()
+    assert loaded.get_sources("1", "input_1") == [("ノード", "output_2")]
+
+@pytest.mark.parametrize("round_trip", [round_trip_json, round_trip_binary, round_trip_msgpack])
+def test_round_trip_to_columnar(round_trip):
+    cls = columnar()
+    info = DrawflowInfo.from_dict(FLOW)
+    loaded = round_trip(info, cls)
+    assert type(loaded) is cls
+    assert loaded.to_dict() == info.to_dict()
+    assert loaded.bounds() == info.bounds()
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7])
+def test_json_round_trip_in_small_chunks(chunk_size):
+    info = DrawflowInfo.from_dict(FLOW)
+    assert round_trip_json(info, chunk_size=chunk_size).to_dict() == info.to_dict()
+
+def test_round_trip_empty_flow():
+    info = DrawflowInfo.from_dict({})
+    assert round_trip_json(info, chunk_size=1).to_dict() == {}
+    assert round_trip_binary(info).to_dict() == {}
@@ -0,0 +1,81 @@
+import multiprocessing
+import random
+import time
+
+from ConnectionInfo import ConnectionInfo
+from DrawflowInfo import DrawflowInfo
+from FlowLog import FlowLog
+from FlowOperation import FlowOperation
+from NodeInfo import NodeInfo
+from SyncedFlow import SyncedFlow
+
+WORKERS = 4
+EDITS = 300
+
+def node(name):
+    return {
+        "name": name,
+        "data": {},
+        "class": "",
+        "component": "",
+        "inputs": ["input_1"],
+        "outputs": {"output_1": {"connections": []}},
+        "pos_x": 0,
+        "pos_y": 0,
+    }
+
+def random_operation(generator: random.Random, nodes_data: DrawflowInfo, worker: int, edit: int) -> FlowOperation:
+    node_ids = nodes_data.list_nodes()
+    node_id = generator.choice(node_ids)
+    kind = generator.random()
+    if kind < 0.4:
+        # Few nodes, so that workers keep moving the same ones concurrently
+        return FlowOperation.move(generator.choice(node_ids[:3]), generator.randint(0, 2000), generator.randint(0, 2000))
+    if kind < 0.55:
+        return FlowOperation.data(node_id, {"worker": worker, "edit": edit})
+    if kind < 0.75:
+        return FlowOperation.connect(node_id, "output_1", ConnectionInfo(generator.choice(node_ids), "input_1"))
+    if kind < 0.85:
+        return FlowOperation.disconnect(node_id, "output_1", ConnectionInfo(generator.choice(node_ids), "input_1"))
+    if kind < 0.95 or len(node_ids) < 4:
+        return FlowOperation.add_node(f"{worker}-{edit}", NodeInfo.from_dict(node(f"{worker}-{edit}")))
+    return FlowOperation.remove_node(node_id)
+
+def edit_concurrently(path: str, worker: int, barrier, results):
+    """Edit the flow of the log like a session of one worker process, then report the converged flow."""
+    synced_flow = SyncedFlow(FlowLog(path, snapshot_interval=50))
+    generator = random.Random(worker)
+    barrier.wait()
+    for edit in range(EDITS):
+        operation = random_operation(generator, synced_flow.nodes_data, worker, edit)
+        if operation.applies_to(synced_flow.nodes_data):
+            synced_flow.set_nodes_data(operation.apply(synced_flow.nodes_data))
+            synced_flow.append(operation)
+        if generator.random() < 0.2:
+            synced_flow.sync()
+        # Let the other workers log their edits in between
+        time.sleep(generator.random() * 0.002)
+    barrier.wait()  # Every operation is logged
+    synced_flow.sync()
+    results.put((worker, synced_flow.nodes_data.to_dict()))
+
+def test_workers_converge(tmp_path):
+    path = str(tmp_path / "flow.sqlite")
+    flow_log = FlowLog(path, snapshot_interval=50)
+    flow_log.snapshot(DrawflowInfo.from_dict({str(index): node(str(index)) for index in range(8)}))
+
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(WORKERS)
+    results = context.Queue()
+    processes = [context.Process(target=edit_concurrently, args=(path, worker, barrier, results)) for worker in range(WORKERS)]
+    for process in processes:
+        process.start()
+    replicas = dict(results.get(timeout=120) for _ in processes)
+    for process in processes:
+        process.join(timeout=30)
+        assert process.exitcode == 0
+
+    expected = FlowLog(path).load().to_dict()
+    assert len(expected) > 8
+    for worker in range(WORKERS):
+        assert replicas[worker] == expected
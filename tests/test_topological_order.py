@@ -0,0 +1,48 @@
+from ConnectionInfo import ConnectionInfo
+from DrawflowInfo import DrawflowInfo
+
+def node(*receivers):
+    return {
+        "name": "node",
+        "data": {},
+        "class": "",
+        "component": "",
+        "inputs": ["input_1"],
+        "outputs": {"output_1": {"connections": [{"node": receiver, "input": "input_1"} for receiver in receivers]}},
+        "pos_x": 0,
+        "pos_y": 0,
+    }
+
+def chain():
+    nodes_data = DrawflowInfo.from_dict({"a": node("b"), "b": node("c"), "c": node()})
+    assert nodes_data.topological_order() == ["a", "b", "c"]
+    return nodes_data
+
+def test_with_connection_closing_a_cycle():
+    nodes_data = DrawflowInfo.from_dict({"a": node("b"), "b": node()})
+    assert nodes_data.topological_order() == ["a", "b"]
+    cyclic = nodes_data.with_connection("b", "output_1", ConnectionInfo("a", "input_1"))
+    assert cyclic.topological_order() is None
+
+def test_with_connections_closing_a_cycle():
+    cyclic = chain().with_connections([("c", "output_1", ConnectionInfo("a", "input_1"))])
+    assert cyclic.topological_order() is None
+
+def test_with_connection_reordering_without_cycle():
+    nodes_data = DrawflowInfo.from_dict({"a": node(), "b": node("c"), "c": node()})
+    nodes_data.topological_order()
+    reordered = nodes_data.with_connection("c", "output_1", ConnectionInfo("a", "input_1"))
+    order = reordered.topological_order()
+    assert order.index("b") < order.index("c") < order.index("a")
+
+def test_cyclic_flag_is_carried_forward():
+    cyclic = chain().with_connection("c", "output_1", ConnectionInfo("a", "input_1"))
+    assert cyclic._is_cyclic
+    added = cyclic.with_node_position("a", 10, 10).with_connection("a", "output_1", ConnectionInfo("c", "input_1"))
+    assert added._is_cyclic
+    assert added.would_create_cycle("b", "a")
+
+    broken = cyclic.without_connection("c", "output_1", ConnectionInfo("a", "input_1"))
+    assert not broken._is_cyclic
+    assert broken.topological_order() == ["a", "b", "c"]
+    assert cyclic.without_node("b").topological_order() is not None
@@ -0,0 +1,52 @@
+import pytest
+
+from DrawflowInfo import DrawflowInfo, FlowValidationError
+
+def node(*connections, **fields):
+    node_data = {
+        "name": "node",
+        "data": {},
+        "class": "",
+        "component": "",
+        "inputs": ["input_1"],
+        "outputs": {"output_1": {"connections": [{"node": receiver, "input": input_name} for receiver, input_name in connections]}},
+        "pos_x": 0,
+        "pos_y": 0,
+    }
+    node_data.update(fields)
+    return node_data
+
+def test_valid_flow_loads():
+    nodes_data = DrawflowInfo.from_dict({"a": node(("b", "input_1")), "b": node()}, validate=True)
+    assert nodes_data.get_sources("b", "input_1") == [("a", "output_1")]
+    assert nodes_data.topological_order() == ["a", "b"]
+
+def test_every_problem_is_reported():
+    data = {
+        # Invalid itself, and its connection to a missing input must still be reported
+        "a": node(("b", "input_2"), pos_x="left"),
+        # Valid, but connected to a missing input of an invalid node
+        "b": node(("c", "input_9"), ("missing", "input_1")),
+        "c": node(pos_y=None),
+        "d": node(("a", "input_1"), ("a", "input_1")),
+        "e": "not a node",
+    }
+    with pytest.raises(FlowValidationError) as raised:
+        DrawflowInfo.from_dict(data, validate=True)
+    assert raised.value.problems == [
+        "Node 'a' has a non-numeric position ('left', 0)",
+        "Node 'c' has a non-numeric position (0, None)",
+        "Output 'output_1' of node 'd' connects to input 'input_1' of node 'a' more than once",
+        "Node 'e' is not an object",
+        "Output 'output_1' of node 'a' connects to missing input 'input_2' of node 'b'",
+        "Output 'output_1' of node 'b' connects to missing input 'input_9' of node 'c'",
+        "Output 'output_1' of node 'b' connects to missing node 'missing'",
+    ]
+
+def test_node_missing_fields_still_has_its_connections_checked():
+    with pytest.raises(FlowValidationError) as raised:
+        DrawflowInfo.from_dict({"a": {"outputs": {"output_1": {"connections": [{"node": "b", "input": "nope"}]}}}, "b": node()}, validate=True)
+    assert raised.value.problems == [
+        "Node 'a' misses name, data, class, component, inputs, pos_x, pos_y",
+        "Output 'output_1' of node 'a' connects to missing input 'nope' of node 'b'",
+    ]
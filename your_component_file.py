@@ -1,4 +1,5 @@
-from typing import Dict, Any
+import asyncio
+from typing import Dict, Any, List
 
 from reactpy import component, html, event, hooks
 
@@ -205,4 +206,35 @@ component_map = {
     "PersonalizedComponent": PersonalizedComponent,
     "DbClickComponent": DbClickComponent,
     # Add more components if needed...
-}
\ No newline at end of file
+}
+
+
+# Simulated work run by FlowExecutor for each kind of node
+async def receive_message(node_id: str, node: NodeInfo, inputs: Dict[str, List[Any]]) -> Any:
+    await asyncio.sleep(0.5)
+    return f"{node.name} message"
+
+async def fetch_repository(node_id: str, node: NodeInfo, inputs: Dict[str, List[Any]]) -> Any:
+    await asyncio.sleep(1)
+    return node.data.get("name", "")
+
+async def fill_template(node_id: str, node: NodeInfo, inputs: Dict[str, List[Any]]) -> Any:
+    await asyncio.sleep(0.2)
+    values = [value for values in inputs.values() for value in values]
+    return f"{node.data.get('template', '')} {' '.join(map(str, values))}".strip()
+
+async def send_message(node_id: str, node: NodeInfo, inputs: Dict[str, List[Any]]) -> Any:
+    await asyncio.sleep(1.5)
+    return [value for values in inputs.values() for value in values]
+
+# Map component names to the tasks running their nodes
+task_map = {
+    "FacebookComponent": receive_message,
+    "GithubComponent": fetch_repository,
+    "TemplateComponent": fill_template,
+    "SlackComponent": send_message,
+    "TelegramComponent": send_message,
+    "EmailComponent": send_message,
+    "LogComponent": send_message,
+    "AWSComponent": send_message,
+}